@@ -10,9 +10,10 @@ from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
 from api.assign.services import ServicesAssign  # Importing the module instead of the class
 from api.assign.models.Assign import Assign
 from django.db import models
-from api.assign.serializers.SerializerAssign import BulkAssignSerializer, AssignOperatorSerializer
+from django.db.models import Prefetch
+from api.assign.serializers.SerializerAssign import BulkAssignSerializer, AssignOperatorSerializer, SerializerAssignBulkItem
 from django.db import transaction
-from rest_framework.exceptions import ValidationError, PermissionDenied
+from rest_framework.exceptions import ValidationError, PermissionDenied, NotFound
 from datetime import datetime, timedelta
 from django.db.models.functions import ExtractWeek
 from api.payment.models.Payment import Payment
@@ -22,7 +23,10 @@ from api.order.serializers.OrderSerializer import OrderSerializer
 from api.truck.serializers.SerializerTruck import SerializerTruck
 from api.workCost.serializers.SerializerWorkCost import WorkCostSerializer
 from api.workCost.models.WorkCost import WorkCost
+from api.common.pagination import KeysetPagination, ORDER_KEYSET, ASSIGN_KEYSET, is_keyset_requested
+from api.utils.location import location_q, parse_location
 import re # Importing regex for validation
+from api.common.etag import versioned_etag
 class CustomPagination(pagination.PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
@@ -136,55 +140,62 @@ class ControllerAssign(viewsets.ViewSet):
             else:
                 start_date = end_date = None
             
-            # Get orders with proper ordering to avoid pagination warning
+            # Get orders with proper ordering to avoid pagination warning.
+            # Assignments (with operator, truck and payment) are prefetched for
+            # the whole page in a single query when the page is evaluated.
             orders = self.order_service.get_all_orders(company_id).order_by('-date', '-key')
             if start_date and end_date:
                 orders = orders.filter(date__range=(start_date, end_date))
+            orders = orders.prefetch_related(
+                Prefetch(
+                    'assignments',
+                    queryset=Assign.objects.select_related('operator__person', 'truck', 'payment').order_by('id')
+                )
+            )
             
-            print(f'ordenes: {orders}')
-            
-            # Paginación
-            paginator = self.paginator
+            # Paginación (keyset sobre (date, key) si el cliente usa ?pagination=cursor)
+            if is_keyset_requested(request):
+                paginator = KeysetPagination(ORDER_KEYSET)
+            else:
+                paginator = self.paginator
             paginator.page_size = int(page_size)
             page = paginator.paginate_queryset(orders, request, view=self)
+            summaries = self.order_service.calculate_summaries([order.key for order in page])
+
+            # Serialize the page at once with a single serializer context
+            serialized_orders = OrderSerializer(page, many=True, context={'request': request}).data
+
+            # Each truck is serialized once per page, even if it is shared by several orders
+            trucks_data = {}
 
             resultados = []
-            for order in page:
-                # Serialize the order with request context
-                order_data = OrderSerializer(order, context={'request': request}).data
+            for order, order_data in zip(page, serialized_orders):
                 
                 # Ensure date is serialized as string
                 if 'date' in order_data and order_data['date']:
                     if hasattr(order_data['date'], 'strftime'):
                         order_data['date'] = order_data['date'].strftime('%Y-%m-%d')
 
-                assigns = (
-                    Assign.objects
-                        .filter(order=order)
-                        .select_related('operator__person', 'truck', 'payment')
-                )
+                assigns = order.assignments.all()  # prefetched, no query
 
-                # Serialize operators and handle date fields
-                operators_data = AssignOperatorSerializer(assigns, many=True).data
-                for op in operators_data:
-                    if 'assigned_at' in op and op['assigned_at']:
-                        if hasattr(op['assigned_at'], 'strftime'):
-                            op['assigned_at'] = op['assigned_at'].strftime('%Y-%m-%d')
-                order_data['operators'] = operators_data
+                order_data['operators'] = AssignOperatorSerializer(assigns, many=True).data
 
-                seen = set()
+                # Vehicles of the order, de-duplicated in memory
                 vehicles = []
+                seen = set()
                 for a in assigns:
                     t = a.truck
                     if t and t.id_truck not in seen:
                         seen.add(t.id_truck)
-                        vehicles.append(SerializerTruck(t).data)
+                        if t.id_truck not in trucks_data:
+                            trucks_data[t.id_truck] = SerializerTruck(t).data
+                        vehicles.append(trucks_data[t.id_truck])
                 order_data['vehicles'] = vehicles
 
                 # work_costs = WorkCost.objects.filter(id_order=order.key)
                 # order_data['workcosts'] = WorkCostSerializer(work_costs, many=True).data
 
-                order_data['summaryCost'] = self.order_service.calculate_summary(order.key)
+                order_data['summaryCost'] = summaries.get(order.key)
 
                 resultados.append(order_data)
 
@@ -206,6 +217,15 @@ class ControllerAssign(viewsets.ViewSet):
                 "data":     None
             }, status=status.HTTP_403_FORBIDDEN)
 
+        except NotFound as exc:
+            # Page or cursor out of range / tampered
+            return Response({
+                "status":   "error",
+                "messDev":  str(exc),
+                "messUser": "The requested page does not exist.",
+                "data":     None
+            }, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as exc:
             return Response({
                 "status":   "error",
@@ -442,7 +462,7 @@ class ControllerAssign(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # 3) Verify assignments exist
-        assigns_qs = Assign.objects.filter(id__in=id_assigns)
+        assigns_qs = Assign.objects.filter(id__in=id_assigns).select_related('payment')
         found_assigns = list(assigns_qs)
         found_ids = [a.id for a in found_assigns]
         if not found_ids:
@@ -457,12 +477,13 @@ class ControllerAssign(viewsets.ViewSet):
 
         # 4) Skip assignments already paid
         already_paid = []
-        to_update_ids = []
+        to_update = []
         for assign in found_assigns:
             if assign.payment and getattr(assign.payment, 'status', '').lower() == 'paid':
                 already_paid.append(assign.id)
             else:
-                to_update_ids.append(assign.id)
+                to_update.append(assign)
+        to_update_ids = [assign.id for assign in to_update]
 
         # If there's nothing to update, return an error
         if not to_update_ids:
@@ -487,7 +508,10 @@ class ControllerAssign(viewsets.ViewSet):
                     date_start=date_start,
                     date_end=date_end
                 )
-                Assign.objects.filter(id__in=to_update_ids).update(payment=payment)
+                # Audited like save(), in a constant number of queries
+                for assign in to_update:
+                    assign.payment = payment
+                Assign.objects.bulk_update_with_audit(to_update, ['payment'])
 
             # 6) Successful response
             return Response({
@@ -535,10 +559,8 @@ class ControllerAssign(viewsets.ViewSet):
             500: OpenApiResponse(description="Internal Server Error: Unexpected error.")
         }
     )
+    @versioned_etag('assigns', 'orders', 'operators', 'persons')
     def list_assign_operator(self, request):
-        import re
-        from django.db.models import Q
-
         """
         GET /api/assign/operators/?number_week=15&year=2025&status=pending&state_usa=CA
         Returns paginated assignments filtered by ISO week number, year, order status, and state_usa,
@@ -590,25 +612,9 @@ class ControllerAssign(viewsets.ViewSet):
             # — Apply state_usa filter if provided —
             
             if state_usa_filter:
-                # Solo separa por coma o guion, no por espacios
-                parts = [p.strip() for p in re.split(r',|-', state_usa_filter) if p.strip()]
-                country = parts[0] if len(parts) > 0 else None
-                state = parts[1] if len(parts) > 1 else None
-                city = parts[2] if len(parts) > 2 else None
-
-                if country and state and city:
-                    regex = rf'^{re.escape(country)}[,|\s|-]+{re.escape(state)}[,|\s|-]+{re.escape(city)}$'
-                    print("Regex usado (country, state, city):", regex)
-                    qs = qs.filter(order__state_usa__regex=regex)
-                elif country and state:
-                    regex = rf'^{re.escape(country)}[,|\s|-]+{re.escape(state)}([,|\s|-]+.*)?$'
-                    print("Regex usado (country, state):", regex)
-                    qs = qs.filter(order__state_usa__regex=regex)
-                elif country:
-                    regex = rf'^{re.escape(country)}([,|\s|-]+.*)?$'
-                    print("Regex usado (country):", regex)
-                    qs = qs.filter(order__state_usa__regex=regex)
-            
+                # "Country[, State[, City]]" (o separado por guiones) contra las columnas estructuradas de la orden
+                qs = qs.filter(location_q(*parse_location(state_usa_filter), prefix='order__'))
+
             # — Filter by week if requested —
             week_info = {}
             if number_week is not None:
@@ -640,7 +646,13 @@ class ControllerAssign(viewsets.ViewSet):
                         "data": None
                     }, status=status.HTTP_400_BAD_REQUEST)
 
-            qs = qs.order_by('-assigned_at')
+            # — Opt-in keyset pagination on (assigned_at, id); the default stays the full list —
+            keyset_paginator = None
+            if is_keyset_requested(request):
+                keyset_paginator = KeysetPagination(ASSIGN_KEYSET)
+                qs = keyset_paginator.paginate_queryset(qs, request, view=self)
+            else:
+                qs = qs.order_by('-assigned_at', '-id')
 
             # — Crear una lista personalizada con los datos necesarios incluyendo id_operator e id_payment —
             results = []
@@ -666,6 +678,14 @@ class ControllerAssign(viewsets.ViewSet):
                 "year": year
             }
             
+            # — Cursor links, only in keyset mode —
+            cursor_links = {}
+            if keyset_paginator is not None:
+                cursor_links = {
+                    "next":     keyset_paginator.get_next_link(),
+                    "previous": keyset_paginator.get_previous_link(),
+                }
+
             # — If there is no data, respond empty but with company_id —
             if not results:
                 return Response({
@@ -675,7 +695,8 @@ class ControllerAssign(viewsets.ViewSet):
                     "data":       [],
                     "week_info":  week_info or None,
                     "filters_applied": filters_applied,
-                    "current_company_id": company_id
+                    "current_company_id": company_id,
+                    **cursor_links
                 }, status=status.HTTP_200_OK)
 
             # — Response with all data and company_id —
@@ -686,7 +707,8 @@ class ControllerAssign(viewsets.ViewSet):
                 "data":       results,
                 "week_info":  week_info or None,
                 "filters_applied": filters_applied,
-                "current_company_id": company_id
+                "current_company_id": company_id,
+                **cursor_links
             }, status=status.HTTP_200_OK)
 
         except ValidationError as exc:
@@ -705,6 +727,15 @@ class ControllerAssign(viewsets.ViewSet):
                 "data":     None
             }, status=status.HTTP_403_FORBIDDEN)
 
+        except NotFound as exc:
+            # Page or cursor out of range / tampered
+            return Response({
+                "status":   "error",
+                "messDev":  str(exc),
+                "messUser": "The requested page does not exist.",
+                "data":     None
+            }, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as exc:
             return Response({
                 "status":   "error",
@@ -840,85 +871,78 @@ class ControllerAssign(viewsets.ViewSet):
         }
     )
     def bulk_create(self, request):
-        serializers = [SerializerAssign(data=item) for item in request.data]
-        
-        # Initial validation
-        errors = []
-        for idx, serializer in enumerate(serializers):
-            if not serializer.is_valid():
-                errors.append({
-                    'index': idx,
-                    'errors': serializer.errors,
-                    'operator_id': request.data[idx].get('operator'),
-                    'message': "Validation error in the operator assignment"
-                })
-        
+        if not isinstance(request.data, list):
+            return Response({
+                "status": "error",
+                "messDev": "Expected a list of assignments",
+                "messUser": "Please check the assignment data",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Initial validation (field types only, no queries)
+        serializer = SerializerAssignBulkItem(data=request.data, many=True)
+        serializer.is_valid()
+        item_errors = serializer.errors
+        # DRF >= 3.15 reports {index: errors}, older versions one entry per item
+        if isinstance(item_errors, dict):
+            errors = sorted(item_errors.items())
+        else:
+            errors = [(idx, item_error) for idx, item_error in enumerate(item_errors) if item_error]
+
+        # Referenced objects: one in_bulk per model for the whole batch
+        items = []
+        if not errors:
+            items, errors = self.assign_service.resolve_bulk_references(
+                serializer.validated_data, company_id=request.company_id
+            )
+
         if errors:
             return Response({
                 "status": "error",
                 "messDev": "Validation errors found",
                 "messUser": "Please check the assignment data",
-                "data": errors
+                "data": [
+                    {
+                        'index': idx,
+                        'errors': item_errors,
+                        'operator_id': request.data[idx].get('operator') if isinstance(request.data[idx], dict) else None,
+                        'message': "Validation error in the operator assignment"
+                    }
+                    for idx, item_errors in errors
+                ]
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             with transaction.atomic():
-                created_assigns = []
-                conflicts = []
-                
-                for idx, serializer in enumerate(serializers):
-                    data = serializer.validated_data
-                    operator_id = data["operator"].id_operator
-                    order = data["order"]
-                    truck = data.get("truck")
-                    truck_id = truck.id_truck if truck else None
-
-                    # Check for existing assignment
-                    existing_assign = Assign.objects.filter(
-                        operator__id_operator=operator_id,
-                        order__key=order.key
-                    )
-                    
-                    if existing_assign.exists():
-                        # Provide detailed information about the conflict
-                        existing = existing_assign.first()
-                        truck_info = f"with truck {existing.truck.id_truck}" if existing.truck else "without truck"
-                        
-                        conflicts.append({
-                            'index': idx,
-                            'operator_id': operator_id,
-                            'order_key': str(order.key),
-                            'message': f"Operator already assigned to this order {truck_info}"
-                        })
-                        continue  # Skip this record but continue with the others
-
-                    # Create assignment
-                    assign = self.assign_service.create_assign(
-                        operator_id=operator_id,
-                        truck_id=truck_id,
-                        order_id=str(order.key),
-                        additional_costs=data.get("additional_costs"),
-                        rol=data.get("rol")
-                    )
-                    created_assigns.append(assign)
+                created_assigns, found_conflicts = self.assign_service.bulk_create_assigns(items)
 
-                if conflicts:
-                    return Response({
-                        "status": "partial_success",
-                        "messDev": f"Created {len(created_assigns)} assignments, {len(conflicts)} conflicts",
-                        "messUser": f"{len(created_assigns)} assignments were saved. {len(conflicts)} operators were already assigned.",
-                        "data": {
-                            "created": SerializerAssign(created_assigns, many=True).data,
-                            "conflicts": conflicts
-                        }
-                    }, status=status.HTTP_207_MULTI_STATUS)
+            conflicts = []
+            for idx, item, truck_id in found_conflicts:
+                truck_info = f"with truck {truck_id}" if truck_id else "without truck"
+                conflicts.append({
+                    'index': idx,
+                    'operator_id': item['operator'].id_operator,
+                    'order_key': str(item['order'].key),
+                    'message': f"Operator already assigned to this order {truck_info}"
+                })
 
+            if conflicts:
                 return Response({
-                    "status": "success",
-                    "messDev": f"{len(created_assigns)} assignments created",
-                    "messUser": "All assignments completed successfully",
-                    "data": SerializerAssign(created_assigns, many=True).data
-                }, status=status.HTTP_201_CREATED)
+                    "status": "partial_success",
+                    "messDev": f"Created {len(created_assigns)} assignments, {len(conflicts)} conflicts",
+                    "messUser": f"{len(created_assigns)} assignments were saved. {len(conflicts)} operators were already assigned.",
+                    "data": {
+                        "created": SerializerAssign(created_assigns, many=True).data,
+                        "conflicts": conflicts
+                    }
+                }, status=status.HTTP_207_MULTI_STATUS)
+
+            return Response({
+                "status": "success",
+                "messDev": f"{len(created_assigns)} assignments created",
+                "messUser": "All assignments completed successfully",
+                "data": SerializerAssign(created_assigns, many=True).data
+            }, status=status.HTTP_201_CREATED)
 
         except Exception as e:
             return Response({
@@ -4,9 +4,79 @@ from api.order.models.Order import Order
 from api.truck.models.Truck import Truck
 from api.payment.models.Payment import Payment
 from django.utils import timezone
+from django.db import transaction
 from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 
+# Columns tracked in AssignAudit (FK attnames, so diffs never load related objects)
+AUDITED_FIELDS = ('operator_id', 'order_id', 'truck_id', 'payment_id', 'assigned_at', 'rol')
+# Columns the order cost rollups are computed from (salaries are split by rol)
+ROLLUP_SOURCE_FIELDS = ('operator_id', 'order_id', 'rol')
+
+
+class AssignManager(models.Manager):
+    def bulk_update_with_audit(self, assigns, fields, batch_size=None):
+        """
+        bulk_update() that also records the AssignAudit rows save() would write.
+
+        The stored values of all the assignments are read in one query (locked
+        until the transaction ends) and diffed in memory against the given
+        instances; the updates and the audit rows are then written with
+        bulk_update and bulk_create. The query count does not depend on the
+        number of assignments.
+
+        Args:
+        - assigns: Assign instances with the new values already set.
+        - fields: Names of the fields to update, as in bulk_update().
+
+        Returns the number of updated rows.
+        """
+        assigns = [assign for assign in assigns if assign.pk]
+        if not assigns:
+            return 0
+        attnames = {self.model._meta.get_field(field).attname for field in fields}
+        audited = [attname for attname in AUDITED_FIELDS if attname in attnames]
+
+        with transaction.atomic(using=self.db):
+            snapshot = {}
+            if audited:
+                rows = (
+                    self.select_for_update()
+                    .filter(pk__in=[assign.pk for assign in assigns])
+                    .values('pk', *AUDITED_FIELDS)
+                )
+                snapshot = {row.pop('pk'): row for row in rows}
+
+            audits = []
+            for assign in assigns:
+                old_values = snapshot.get(assign.pk)
+                if old_values is None:
+                    continue
+                # Fields not being updated keep their stored value in the audit
+                new_values = dict(old_values, **{attname: getattr(assign, attname) for attname in audited})
+                if new_values != old_values:
+                    audits.append(AssignAudit.from_values(assign.pk, old_values, new_values))
+
+            updated = self.bulk_update(assigns, fields, batch_size=batch_size)
+            AssignAudit.objects.bulk_create(audits, batch_size=batch_size)
+
+        if attnames.intersection(ROLLUP_SOURCE_FIELDS):
+            # bulk_update does not send post_save: refresh the cost rollups here
+            from api.order.models.OrderCostRollup import schedule_rollup_refresh
+            schedule_rollup_refresh(
+                [assign.order_id for assign in assigns] +
+                [values['order_id'] for values in snapshot.values()]
+            )
+
+        # Nor the data version bumps behind the listing ETags
+        from api.dataVersion.models.CompanyDataVersion import bump_data_version_of_orders
+        bump_data_version_of_orders(
+            [assign.order_id for assign in assigns] + [values['order_id'] for values in snapshot.values()],
+            'assigns'
+        )
+        return updated
+
+
 class Assign(models.Model):
     """
     Model that represents an assignment between an operator, order, truck and payment.
@@ -38,11 +108,17 @@ class Assign(models.Model):
     assigned_at = models.DateField(null=True, blank=True)
     rol = models.CharField(max_length=100, null=True, blank=True)
     additional_costs = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True)
+
+    objects = AssignManager()
     
     class Meta:
         db_table = 'api_assign'
         #unique_together = ('operator', 'order', 'truck')
         app_label = 'api'
+        indexes = [
+            # Keyset pagination of the assignment listings on (assigned_at, id)
+            models.Index(fields=['assigned_at', 'id'], name='assign_assigned_at_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.operator} assigned to {self.order} with {self.truck}"
@@ -59,94 +135,29 @@ class Assign(models.Model):
             self.assigned_at = self.assigned_at or timezone.now().date()
             # Primero guardamos la nueva asignación
             super().save(*args, **kwargs)
-        else:
-            # Si es una actualización, obtenemos la instancia actual
-            try:
-                old_instance = Assign.objects.get(pk=self.pk)
-                old_values = {
-                    'operator': old_instance.operator,
-                    'order': old_instance.order,
-                    'truck': old_instance.truck,
-                    'payment': old_instance.payment,
-                    'assigned_at': old_instance.assigned_at,
-                    'rol': old_instance.rol
-                }
-                
-                # Guardamos los cambios
-                super().save(*args, **kwargs)
-                
-                # Comparamos los valores para ver si hubo cambios
-                new_values = {
-                    'operator': self.operator,
-                    'order': self.order,
-                    'truck': self.truck,
-                    'payment': self.payment,
-                    'assigned_at': self.assigned_at,
-                    'rol': self.rol
-                }
-
-                # Solo creamos un registro si algo cambió
-                if any(old_values[field] != new_values[field] for field in old_values):
-                    # Convertir dates a datetime para el audit
-                    old_assigned_at_dt = None
-                    new_assigned_at_dt = None
-                    
-                    if old_values['assigned_at']:
-                        old_assigned_at_dt = timezone.make_aware(
-                            timezone.datetime.combine(old_values['assigned_at'], timezone.datetime.min.time())
-                        )
-                    
-                    if new_values['assigned_at']:
-                        new_assigned_at_dt = timezone.make_aware(
-                            timezone.datetime.combine(new_values['assigned_at'], timezone.datetime.min.time())
-                        )
-                    
-                    AssignAudit.objects.create(
-                        assign=self,
-                        old_operator=old_values['operator'],
-                        new_operator=new_values['operator'],
-                        old_order=old_values['order'],
-                        new_order=new_values['order'],
-                        old_truck=old_values['truck'],
-                        new_truck=new_values['truck'],
-                        old_payment=old_values['payment'],
-                        new_payment=new_values['payment'],
-                        old_assigned_at=old_assigned_at_dt,
-                        new_assigned_at=new_assigned_at_dt,
-                        old_rol=old_values['rol'],
-                        new_rol=new_values['rol']
-                    )
-            except Assign.DoesNotExist:
-                # Si por alguna razón no encontramos la instancia, solo guardamos
-                super().save(*args, **kwargs)
+            return
+
+        # Si es una actualización, leemos solo las columnas auditadas (sin cargar las FKs)
+        old_values = Assign.objects.filter(pk=self.pk).values(*AUDITED_FIELDS).first()
+
+        # Guardamos los cambios
+        super().save(*args, **kwargs)
+
+        if old_values is None:
+            # Si por alguna razón no encontramos la instancia, solo guardamos
+            return
+        new_values = {attname: getattr(self, attname) for attname in AUDITED_FIELDS}
+        # Solo creamos un registro si algo cambió
+        if new_values != old_values:
+            AssignAudit.from_values(self.pk, old_values, new_values).save()
 
 @receiver(pre_delete, sender=Assign)
 def assign_pre_delete(sender, instance, **kwargs):
     """
     Signal handler to create an audit record before assign deletion
     """
-    # Convertir date a datetime para el audit
-    old_assigned_at_dt = None
-    if instance.assigned_at:
-        old_assigned_at_dt = timezone.make_aware(
-            timezone.datetime.combine(instance.assigned_at, timezone.datetime.min.time())
-        )
-    
-    AssignAudit.objects.create(
-        assign=instance,
-        old_operator=instance.operator,
-        new_operator=None,
-        old_order=instance.order,
-        new_order=None,
-        old_truck=instance.truck,
-        new_truck=None,
-        old_payment=instance.payment,
-        new_payment=None,
-        old_assigned_at=old_assigned_at_dt,
-        new_assigned_at=None,
-        old_rol=instance.rol,
-        new_rol=None
-    )
+    old_values = {attname: getattr(instance, attname) for attname in AUDITED_FIELDS}
+    AssignAudit.from_values(instance.pk, old_values, None).save()
 
 #audit assign
 class AssignAudit(models.Model):
@@ -180,4 +191,34 @@ class AssignAudit(models.Model):
         ordering = ['-modified_at']
 
     def __str__(self):
-        return f"Assign Audit#: {self.assign.id} - {self.modified_at}"
\ No newline at end of file
+        return f"Assign Audit#: {self.assign.id} - {self.modified_at}"
+
+    @staticmethod
+    def _as_datetime(value):
+        # assigned_at is a date on Assign and a datetime in the audit
+        if value is None:
+            return None
+        return timezone.make_aware(timezone.datetime.combine(value, timezone.datetime.min.time()))
+
+    @classmethod
+    def from_values(cls, assign_id, old_values, new_values):
+        """
+        Unsaved audit row from two {AUDITED_FIELDS attname: value} dicts;
+        new_values is None for a deletion.
+        """
+        new_values = new_values or dict.fromkeys(AUDITED_FIELDS)
+        return cls(
+            assign_id=assign_id,
+            old_operator_id=old_values['operator_id'],
+            new_operator_id=new_values['operator_id'],
+            old_order_id=old_values['order_id'],
+            new_order_id=new_values['order_id'],
+            old_truck_id=old_values['truck_id'],
+            new_truck_id=new_values['truck_id'],
+            old_payment_id=old_values['payment_id'],
+            new_payment_id=new_values['payment_id'],
+            old_assigned_at=cls._as_datetime(old_values['assigned_at']),
+            new_assigned_at=cls._as_datetime(new_values['assigned_at']),
+            old_rol=old_values['rol'],
+            new_rol=new_values['rol'],
+        )
\ No newline at end of file
@@ -2,11 +2,14 @@ from typing import List, Optional
 from uuid import UUID
 
 from django.db import IntegrityError
+from django.db.models import Q, Sum
 from api.assign.models.Assign import Assign
 from api.truck.models.Truck import Truck
 from api.operator.models.Operator import Operator
 from api.order.models.Order import Order
 from api.assign.models.Assign import AssignAudit
+from api.order.models.OrderCostRollup import schedule_rollup_refresh
+from api.dataVersion.models.CompanyDataVersion import bump_data_version_of_orders
 
 class RepositoryAssign():
 
@@ -28,12 +31,63 @@ class RepositoryAssign():
     def create_bulk(assignments):
         try:
             Assign.objects.bulk_create(assignments)
+            # bulk_create does not send post_save, so refresh the cost rollups
+            # and the data version behind the listing ETags here
+            schedule_rollup_refresh(a.order_id for a in assignments)
+            bump_data_version_of_orders([a.order_id for a in assignments], 'assigns')
             return True, None
         except IntegrityError:
             return False, "Asignación duplicada o violación de restricciones"
         except Exception as e:
             return False, str(e)
 
+    def get_existing_pairs(self, pairs) -> dict:
+        """
+        {(operator_id, order_id): truck_id} of the given pairs that already have
+        an assignment (the oldest one if repeated), in a single query.
+        """
+        pairs = set(pairs)
+        if not pairs:
+            return {}
+        operator_ids = {operator_id for operator_id, _ in pairs}
+        order_ids = {order_id for _, order_id in pairs}
+        # Both IN lists hit the FK indexes; the exact pairs are matched here
+        rows = (
+            Assign.objects.filter(operator_id__in=operator_ids, order_id__in=order_ids)
+            .order_by('-id')
+            .values_list('operator_id', 'order_id', 'truck_id')
+        )
+        return {
+            (operator_id, order_id): truck_id
+            for operator_id, order_id, truck_id in rows
+            if (operator_id, order_id) in pairs
+        }
+
+    def bulk_insert(self, assignments: List[Assign]) -> List[Assign]:
+        """
+        Inserts the assignments with a single bulk_create and returns them reloaded
+        (MySQL does not return the new ids), ready to be serialized.
+        The (operator, order) pairs must not exist yet.
+        """
+        if not assignments:
+            return []
+        Assign.objects.bulk_create(assignments)
+        # bulk_create does not send post_save, so refresh the cost rollups
+        # and the data version behind the listing ETags here
+        schedule_rollup_refresh(a.order_id for a in assignments)
+        bump_data_version_of_orders([a.order_id for a in assignments], 'assigns')
+
+        pairs = Q()
+        for a in assignments:
+            pairs |= Q(operator_id=a.operator_id, order_id=a.order_id)
+        created = {
+            (a.operator_id, a.order_id): a
+            for a in Assign.objects.filter(pairs)
+            .select_related('order__person')
+            .prefetch_related('audit_records', 'order__assign', 'order__tool')
+        }
+        return [created[(a.operator_id, a.order_id)] for a in assignments]
+
     def get_assign_by_id(self, assign_id: int) -> Optional[Assign]:
         try:
             return Assign.objects.get(id=assign_id)
@@ -118,4 +172,25 @@ class RepositoryAssign():
 
     def get_assigned_operators(self, order_id: UUID):
         """Recupera los operadores asignados a un pedido específico"""
-        return Assign.objects.filter(order__key=order_id).select_related('operator')
\ No newline at end of file
+        return Assign.objects.filter(order__key=order_id).select_related('operator')
+
+    def get_salaries_by_orders(self, order_keys) -> dict:
+        """
+        Sums operator salaries per order in a single grouped query.
+
+        Returns a dict ``{order_key: (driver_salaries, other_salaries)}``.
+        """
+        rows = (
+            Assign.objects
+            .filter(order_id__in=order_keys)
+            .values('order_id')
+            .annotate(
+                total=Sum('operator__salary'),
+                drivers=Sum('operator__salary', filter=Q(rol='driver')),
+            )
+        )
+        salaries = {}
+        for row in rows:
+            driver = float(row['drivers'] or 0)
+            salaries[row['order_id']] = (driver, float(row['total'] or 0) - driver)
+        return salaries
@@ -103,6 +103,21 @@ class BulkAssignSerializer(serializers.Serializer):
     rol = serializers.CharField()
 
 
+class SerializerAssignBulkItem(serializers.Serializer):
+    """
+    One item of ControllerAssign.bulk_create. Related objects are plain ids:
+    they are resolved for the whole batch with one in_bulk per model
+    (see ServicesAssign.resolve_bulk_references) instead of one query per field.
+    """
+    operator = serializers.IntegerField()
+    order = serializers.UUIDField()
+    truck = serializers.IntegerField(allow_null=True, required=False)
+    payment = serializers.IntegerField(allow_null=True, required=False)
+    assigned_at = serializers.DateField(allow_null=True, required=False)
+    rol = serializers.CharField(max_length=100, allow_null=True, required=False)
+    additional_costs = serializers.DecimalField(max_digits=20, decimal_places=2, allow_null=True, required=False)
+
+
 #report serializers in assign
 class TruckSerializer(serializers.ModelSerializer):
     class Meta:
@@ -4,6 +4,7 @@ from django.db import transaction, IntegrityError
 from api.operator.models.Operator import Operator
 from api.order.models.Order import Order
 from api.truck.models.Truck import Truck
+from api.payment.models.Payment import Payment
 from api.assign.models.Assign import Assign
 from api.assign.repositories.RepositoryAssign import RepositoryAssign
 from django.utils import timezone
@@ -76,6 +77,82 @@ class ServicesAssign:
         except Exception as e:
             return False, str(e)
         
+    def resolve_bulk_references(self, items, company_id=None):
+        """
+        Resolves the ids of validated SerializerAssignBulkItem data with one
+        in_bulk per model. Returns (resolved, errors): resolved items carry the
+        Operator/Order/Truck instances, errors use the shape of a
+        PrimaryKeyRelatedField error ({field: [message]}) per item index.
+
+        With company_id, operators, orders and trucks of another company are
+        reported like unknown ids.
+        """
+        lookups = {
+            'operator': Operator.objects.all(),
+            'order': Order.objects.all(),
+            'truck': Truck.objects.all(),
+            'payment': Payment.objects.all(),
+        }
+        if company_id is not None:
+            lookups['operator'] = lookups['operator'].filter(person__id_company_id=company_id)
+            lookups['order'] = lookups['order'].filter(id_company_id=company_id)
+            lookups['truck'] = lookups['truck'].filter(id_company_id=company_id)
+        found = {}
+        for field, queryset in lookups.items():
+            ids = {item[field] for item in items if item.get(field) is not None}
+            found[field] = queryset.in_bulk(ids) if ids else {}
+
+        resolved, errors = [], []
+        for idx, item in enumerate(items):
+            item_errors = {}
+            item = dict(item)
+            for field in lookups:
+                pk = item.get(field)
+                if pk is None:
+                    continue
+                instance = found[field].get(pk)
+                if instance is None:
+                    item_errors[field] = [f'Invalid pk "{pk}" - object does not exist.']
+                item[field] = instance
+            if item_errors:
+                errors.append((idx, item_errors))
+            resolved.append(item)
+        return resolved, errors
+
+    def bulk_create_assigns(self, items):
+        """
+        Creates the assignments of resolved bulk items that do not conflict with
+        an existing (operator, order) assignment, or with an earlier item of the
+        same batch. One conflict query and one INSERT for the whole batch.
+
+        Returns (created, conflicts) where conflicts are (index, item, truck_id).
+        """
+        existing = self.repository.get_existing_pairs(
+            (item['operator'].id_operator, item['order'].key) for item in items
+        )
+
+        to_create, conflicts = [], []
+        for idx, item in enumerate(items):
+            operator, order, truck = item['operator'], item['order'], item.get('truck')
+            pair = (operator.id_operator, order.key)
+            if pair in existing:
+                conflicts.append((idx, item, existing[pair]))
+                continue
+            existing[pair] = truck.id_truck if truck else None
+            to_create.append(Assign(
+                operator=operator,
+                order=order,
+                truck=truck,
+                additional_costs=item.get('additional_costs'),
+                rol=item.get('rol'),
+                # payment is only validated, as with the per-item create_assign
+                # Same as create_assign: the order date is the assignment date
+                # (Assign.save() falls back to today, bulk_create skips save())
+                assigned_at=order.date or timezone.now().date(),
+            ))
+
+        return self.repository.bulk_insert(to_create), conflicts
+
     #to audit table assign
     def get_assign(self, assign_id: int) -> Optional[Assign]:
         """Retrieves an assignment by ID"""
@@ -134,4 +211,8 @@ class ServicesAssign:
 
     def get_assigned_operators(self, order_id: UUID):
         """Retrieves all operators assigned to a specific order"""
-        return self.repository.get_assigned_operators(order_id)
\ No newline at end of file
+        return self.repository.get_assigned_operators(order_id)
+
+    def get_salaries_by_orders(self, order_keys) -> dict:
+        """Retrieves driver and other salaries grouped by order"""
+        return self.repository.get_salaries_by_orders(order_keys)
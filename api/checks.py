@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries are visible only to the process that wrote them
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+}
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The identity, subscription, fuel efficiency and storage index caches are
+    invalidated by the process that changes the data (or by a management
+    command), so every process must read the same cache.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f"The default cache ({backend}) is local to each process.",
+            hint="Set CACHE_REDIS_URL or use the DatabaseCache configured in settings.",
+            id='api.E001',
+        )]
+    return []
@@ -0,0 +1,48 @@
+from functools import wraps
+
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.dataVersion.services.ServicesDataVersion import ServicesDataVersion
+
+
+def versioned_etag(*resources):
+    """
+    Conditional GET for a ViewSet read method built from the given resources.
+
+    The ETag comes from the company's data version counters of those
+    resources (one query on api_company_data_version) plus the path, query
+    string and user. A request whose If-None-Match carries it gets a 304
+    without running the view, so the main tables are not touched and no
+    body is sent. Only successful responses are tagged.
+
+    Usage (below @extend_schema / @action):
+
+        @versioned_etag('orders', 'persons')
+        def list_all_status(self, request): ...
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            company_id = getattr(request, 'company_id', None)
+            if company_id is None:
+                return view_method(self, request, *args, **kwargs)
+
+            # Read before the view runs: the tag may be older than the data, never newer
+            etag = ServicesDataVersion().get_etag(
+                company_id, resources, request.get_full_path(), getattr(request.user, 'pk', None)
+            )
+            if_none_match = request.headers.get('If-None-Match')
+            if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+            response['ETag'] = etag
+            # Clients may keep the body but must revalidate it every time
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
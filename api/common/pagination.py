@@ -0,0 +1,167 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Keyset orderings (lead field, unique tiebreaker), always descending
+ORDER_KEYSET = ('date', 'key')
+ASSIGN_KEYSET = ('assigned_at', 'id')
+PAYMENT_KEYSET = ('date_payment', 'id_pay')
+# CostFuel has no date of its own: newest records first
+COST_FUEL_KEYSET = ('id_fuel', 'id_fuel')
+
+
+def is_keyset_requested(request):
+    """Cursor mode is opt-in: ?pagination=cursor or an explicit ?cursor=..."""
+    params = request.query_params
+    return params.get('pagination') == 'cursor' or 'cursor' in params
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a (lead, tiebreaker) pair of columns sorted descending.
+
+    Unlike PageNumberPagination there is no OFFSET nor COUNT(*): each page is a
+    range scan starting right after the last row of the previous one, so deep
+    pages cost the same as the first. The lead column may be NULL (NULLs sort
+    last, as in MySQL), the tiebreaker must be unique and not null.
+
+    Response: {"next": url|None, "previous": url|None, "results": [...]}
+    """
+    cursor_query_param = 'cursor'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, fields, page_size=None):
+        self.lead, self.tiebreaker = fields
+        if page_size:
+            self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+
+        model = queryset.model
+        self.lead_field = model._meta.get_field(self.lead)
+        self.tiebreaker_field = model._meta.get_field(self.tiebreaker)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+
+        if cursor:
+            queryset = queryset.filter(self._after(cursor['position'], reverse))
+
+        if reverse:
+            queryset = queryset.order_by(self.lead, self.tiebreaker)
+        else:
+            queryset = queryset.order_by(f'-{self.lead}', f'-{self.tiebreaker}')
+
+        # One extra row tells whether there is another page in this direction
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else cursor is not None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Went past the end: the previous page is simply the first one
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    # --- cursor helpers ---
+
+    def _position(self, obj):
+        return [
+            getattr(obj, self.lead_field.attname),
+            getattr(obj, self.tiebreaker_field.attname),
+        ]
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, cls=DjangoJSONEncoder)
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+            lead_value, tiebreaker_value = payload['p']
+            position = (
+                None if lead_value is None else self.lead_field.to_python(lead_value),
+                self.tiebreaker_field.to_python(tiebreaker_value),
+            )
+            return {'position': position, 'reverse': bool(payload.get('r'))}
+        except (TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError) as e:
+            raise NotFound(self.invalid_cursor_message) from e
+
+    def _after(self, position, reverse):
+        """
+        Rows strictly after `position` in the descending order (or strictly
+        before it when paging backwards), NULL leads sorting last.
+        """
+        lead_value, tiebreaker_value = position
+        lead, tie = self.lead, self.tiebreaker
+        if not reverse:
+            if lead_value is None:
+                return Q(**{f'{lead}__isnull': True, f'{tie}__lt': tiebreaker_value})
+            return (
+                Q(**{f'{lead}__lt': lead_value}) |
+                Q(**{lead: lead_value, f'{tie}__lt': tiebreaker_value}) |
+                Q(**{f'{lead}__isnull': True})
+            )
+        if lead_value is None:
+            return Q(**{f'{lead}__isnull': False}) | Q(**{f'{lead}__isnull': True, f'{tie}__gt': tiebreaker_value})
+        return (
+            Q(**{f'{lead}__gt': lead_value}) |
+            Q(**{lead: lead_value, f'{tie}__gt': tiebreaker_value})
+        )
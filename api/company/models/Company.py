@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from api.subscription.models.Subscription import Subscription
+from api.subscription.subscription_cache import invalidate_subscription_state
 
 class Company(models.Model):
     id = models.AutoField(primary_key=True)
@@ -18,4 +21,11 @@ class Company(models.Model):
         app_label = 'api'
 
     def __str__(self):
-        return f"{self.name} - {self.license_number}" 
+        return f"{self.name} - {self.license_number}"
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def company_invalidate_subscription_state(sender, instance, **kwargs):
+    """Drops the cached subscription state used by SubscriptionMiddleware"""
+    invalidate_subscription_state([instance.id])
@@ -1,12 +1,15 @@
 from rest_framework import status, viewsets, pagination
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
 from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
-from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample, OpenApiParameter
 from api.costFuel.services.ServicesCostFuel import ServicesCostFuel
 
 from api.costFuel.serializers.SerializerCostFuel import SerializerCostFuel, SerializerCostFuelDetail
 from api.costFuel.models.CostFuel import CostFuel
+from api.common.pagination import KeysetPagination, COST_FUEL_KEYSET, is_keyset_requested
+from api.utils.query_params import parse_date_param
 
 class ControllerCostFuel(viewsets.ViewSet):
     """
@@ -18,8 +21,12 @@ class ControllerCostFuel(viewsets.ViewSet):
         self.cost_fuel_service = ServicesCostFuel()
 
     @extend_schema(
-        summary="Get all cost fuel records",
-        description="Retrieves all cost fuel records with pagination.",
+        summary="Get the company's cost fuel records",
+        description=(
+            "Retrieves the cost fuel records of the current company's orders with pagination "
+            "(?pagination=cursor for keyset pagination). Optional filters: truck, order, "
+            "date_from and date_to (order date, YYYY-MM-DD). `aggregates` totals the whole filtered set."
+        ),
         responses={
             200: OpenApiResponse(
                 response=SerializerCostFuel(many=True),
@@ -29,22 +36,55 @@ class ControllerCostFuel(viewsets.ViewSet):
     )
     def list(self, request):
         """
-        Returns a paginated list of all cost fuel records.
+        Returns a paginated list of the company's cost fuel records.
         """
         try:
-            cost_fuels = self.cost_fuel_service.get_all()
+            company_id = request.company_id
+            params = request.query_params
+            try:
+                date_from = parse_date_param(params, "date_from")
+                date_to = parse_date_param(params, "date_to")
+            except ValueError as e:
+                return Response({
+                    "status": "error",
+                    "messDev": str(e),
+                    "messUser": "Fecha inválida",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            cost_fuels = self.cost_fuel_service.get_by_company(
+                company_id,
+                truck_id=params.get("truck"),
+                order_key=params.get("order"),
+                date_from=date_from,
+                date_to=date_to,
+            )
+            aggregates = self.cost_fuel_service.get_totals(cost_fuels)
             
             # Pagination setup
-            paginator = pagination.PageNumberPagination()
-            paginator.page_size = request.query_params.get("page_size", 10)
+            if is_keyset_requested(request):
+                paginator = KeysetPagination(COST_FUEL_KEYSET)
+            else:
+                paginator = pagination.PageNumberPagination()
+                paginator.page_size = request.query_params.get("page_size", 10)
+                cost_fuels = cost_fuels.order_by('-id_fuel')
             paginated_cost_fuels = paginator.paginate_queryset(cost_fuels, request)
             
             return paginator.get_paginated_response({
                 "status": "success",
                 "messDev": "Cost fuel records fetched",
                 "messUser": "Registros de costo de combustible obtenidos",
+                "aggregates": aggregates,
                 "data": SerializerCostFuel(paginated_cost_fuels, many=True).data
             })
+        except NotFound as e:
+            # Page or cursor out of range / tampered
+            return Response({
+                "status": "error",
+                "messDev": str(e),
+                "messUser": "The requested page does not exist",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({
                 "status": "error",
@@ -174,6 +214,50 @@ class ControllerCostFuel(viewsets.ViewSet):
                 "data": None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @extend_schema(
+        summary="Truck fuel efficiency",
+        description=(
+            "Fuel efficiency of the current company's trucks, computed by the database: cost per mile, "
+            "gallons per mile and cost per gallon for the whole fleet, per truck and per ISO week of the "
+            "order date (with the distance of each week). Optional filters: truck, date_from and date_to "
+            "(order date, YYYY-MM-DD). Ratios are null when their denominator is zero."
+        ),
+        parameters=[
+            OpenApiParameter(name='truck', type=int, location=OpenApiParameter.QUERY, description='Truck ID'),
+            OpenApiParameter(name='date_from', type=str, location=OpenApiParameter.QUERY, description='First order date (YYYY-MM-DD)'),
+            OpenApiParameter(name='date_to', type=str, location=OpenApiParameter.QUERY, description='Last order date (YYYY-MM-DD)'),
+        ],
+        responses={200: OpenApiResponse(description="Fuel efficiency report: {fleet, trucks, weeks}")}
+    )
+    @action(detail=False, methods=['get'], url_path='efficiency')
+    def efficiency(self, request):
+        """
+        Returns the fleet, per-truck and weekly fuel efficiency of the company.
+        """
+        company_id = request.company_id
+        try:
+            truck_id = int(request.query_params["truck"]) if request.query_params.get("truck") else None
+            date_from = parse_date_param(request.query_params, "date_from")
+            date_to = parse_date_param(request.query_params, "date_to")
+        except ValueError as e:
+            return Response({
+                "status": "error",
+                "messDev": str(e),
+                "messUser": "Filtros inválidos",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        report = self.cost_fuel_service.get_fuel_efficiency(
+            company_id, truck_id=truck_id, date_from=date_from, date_to=date_to
+        )
+        return Response({
+            "status": "success",
+            "messDev": "Fuel efficiency computed",
+            "messUser": "Rendimiento de combustible obtenido",
+            "current_company_id": company_id,
+            "data": report
+        })
+
     @extend_schema(
         summary="Create cost fuel record",
         description="Creates a new cost fuel record.",
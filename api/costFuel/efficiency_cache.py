@@ -0,0 +1,59 @@
+# api/costFuel/efficiency_cache.py
+"""
+Cache of the fuel-efficiency reports (ServicesCostFuel.get_fuel_efficiency),
+one entry per company and set of filters.
+
+Every entry of a company carries its current generation in the key; the
+signal handlers in api.costFuel.models.CostFuel bump the generation when a
+fuel record or an order date changes, which orphans the old entries at once.
+The generation lives in the shared settings.CACHES backend (see the api.E001
+system check), so the bump reaches every worker, not only the writer. The TTL
+only bounds staleness for changes that bypass the ORM.
+"""
+import logging
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+FUEL_EFFICIENCY_CACHE_TTL = getattr(settings, 'FUEL_EFFICIENCY_CACHE_TTL', 300)  # seconds, 0 disables
+
+
+def _generation_key(company_id):
+    return f"fuel:efficiency:gen:{company_id}"
+
+
+def report_key(company_id, filters):
+    """
+    Key of the report for these filters at the company's current generation.
+    Read it before computing the report, so a change made meanwhile is not
+    cached under the new generation.
+    """
+    generation = cache.get(_generation_key(company_id), 0)
+    suffix = ":".join(f"{name}={filters[name]}" for name in sorted(filters))
+    return f"fuel:efficiency:{company_id}:{generation}:{suffix}"
+
+
+def get_report(key):
+    """The cached report, or None."""
+    if FUEL_EFFICIENCY_CACHE_TTL <= 0:
+        return None
+    return cache.get(key)
+
+
+def set_report(key, report):
+    if FUEL_EFFICIENCY_CACHE_TTL > 0:
+        cache.set(key, report, FUEL_EFFICIENCY_CACHE_TTL)
+
+
+def invalidate_company(company_id):
+    if company_id is None:
+        return
+    logger.debug(f"Invalidating fuel efficiency reports of company {company_id}")
+    key = _generation_key(company_id)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, None)
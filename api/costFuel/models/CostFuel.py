@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from api.order.models.Order import Order
 from api.truck.models.Truck import Truck
+from api.costFuel.efficiency_cache import invalidate_company
 
 class CostFuel(models.Model):
     id_fuel = models.AutoField(primary_key=True)
@@ -12,4 +15,26 @@ class CostFuel(models.Model):
     distance = models.FloatField()     # Cambiado a numérico
     
     def __str__(self):
-        return f"Fuel {self.id_fuel} - Order: {self.order.key_ref} - Truck: {self.truck.number_truck}"
\ No newline at end of file
+        return f"Fuel {self.id_fuel} - Order: {self.order.key_ref} - Truck: {self.truck.number_truck}"
+
+
+# Fuel efficiency reports are cached per company (api.costFuel.efficiency_cache)
+@receiver(post_save, sender=CostFuel)
+@receiver(post_delete, sender=CostFuel)
+def cost_fuel_efficiency_changed(sender, instance, **kwargs):
+    company_ids = set(Order.objects.filter(
+        pk__in=[instance.order_id, getattr(instance, '_rollup_previous_order', None)]
+    ).values_list('id_company_id', flat=True))
+    for company_id in company_ids:
+        invalidate_company(company_id)
+
+@receiver(post_save, sender=Order)
+def order_efficiency_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # Only the order date moves fuel records between weeks
+    if created or (update_fields is not None and 'date' not in update_fields):
+        return
+    invalidate_company(instance.id_company_id)
+
+@receiver(post_delete, sender=Order)
+def order_efficiency_deleted(sender, instance, **kwargs):
+    invalidate_company(instance.id_company_id)
@@ -2,6 +2,24 @@ from typing import List, Optional, Dict
 from api.costFuel.models.CostFuel import CostFuel
 from api.costFuel.repositories.IRepositoryCostFuel import IRepositoryCostFuel
 from django.shortcuts import get_object_or_404
+from django.db.models import Count, FloatField, Sum, Value
+from django.db.models.functions import ExtractIsoYear, ExtractWeek, NullIf
+
+
+def efficiency_metrics():
+    """Aggregates of a fuel-efficiency report row; the ratios are computed by the database."""
+    def ratio(numerator, denominator):
+        return Sum(numerator) / NullIf(Sum(denominator), Value(0.0), output_field=FloatField())
+
+    return {
+        'entries': Count('id_fuel'),
+        'total_cost': Sum('cost_fuel'),
+        'total_gallons': Sum('fuel_qty'),
+        'total_distance': Sum('distance'),
+        'cost_per_mile': ratio('cost_fuel', 'distance'),
+        'gallons_per_mile': ratio('fuel_qty', 'distance'),
+        'cost_per_gallon': ratio('cost_fuel', 'fuel_qty'),
+    }
 
 class RepositoryCostFuel(IRepositoryCostFuel):
     """Implementation of the CostFuel repository interface."""
@@ -10,6 +28,49 @@ class RepositoryCostFuel(IRepositoryCostFuel):
         """Returns all cost fuel records."""
         return CostFuel.objects.all()
     
+    def get_by_company(self, company_id, truck_id=None, order_key=None, date_from=None, date_to=None):
+        """Returns the cost fuel records of the company's orders (Order → company), filtered."""
+        cost_fuels = CostFuel.objects.filter(order__id_company_id=company_id)
+        if truck_id:
+            cost_fuels = cost_fuels.filter(truck_id=truck_id)
+        if order_key:
+            cost_fuels = cost_fuels.filter(order_id=order_key)
+        if date_from:
+            cost_fuels = cost_fuels.filter(order__date__gte=date_from)
+        if date_to:
+            cost_fuels = cost_fuels.filter(order__date__lte=date_to)
+        return cost_fuels
+    
+    def get_efficiency_totals(self, cost_fuels) -> Dict:
+        """Returns the efficiency metrics of all the given records, in one aggregate query."""
+        return cost_fuels.order_by().aggregate(**efficiency_metrics())
+    
+    def get_efficiency_by_truck(self, cost_fuels) -> List[Dict]:
+        """Returns the efficiency metrics of the given records per truck, in one grouped query."""
+        return list(
+            cost_fuels
+            .values('truck_id', 'truck__number_truck', 'truck__name')
+            .annotate(**efficiency_metrics())
+            .order_by('truck__number_truck')
+        )
+    
+    def get_efficiency_by_week(self, cost_fuels) -> List[Dict]:
+        """Returns the efficiency metrics of the given records per ISO week of the order date, in one grouped query."""
+        return list(
+            cost_fuels
+            .filter(order__date__isnull=False)
+            .annotate(iso_year=ExtractIsoYear('order__date'), iso_week=ExtractWeek('order__date'))
+            .values('iso_year', 'iso_week')
+            .annotate(**efficiency_metrics())
+            .order_by('iso_year', 'iso_week')
+        )
+    
+    def get_totals(self, cost_fuels) -> Dict:
+        """Returns the count and summed cost_fuel / fuel_qty of the given records in one query."""
+        return cost_fuels.order_by().aggregate(
+            count=Count('id_fuel'), total_cost_fuel=Sum('cost_fuel'), total_fuel_qty=Sum('fuel_qty')
+        )
+    
     def get_by_id(self, id_fuel: int) -> Optional[CostFuel]:
         """Returns a cost fuel record by its ID."""
         try:
@@ -21,10 +82,24 @@ class RepositoryCostFuel(IRepositoryCostFuel):
         """Returns cost fuel records associated with an order."""
         return CostFuel.objects.filter(order__key=order_key)
     
+    def get_by_orders(self, order_keys) -> List[CostFuel]:
+        """Returns cost fuel records (with their truck) of several orders."""
+        return CostFuel.objects.filter(order_id__in=order_keys).select_related('truck')
+    
     def get_by_truck(self, truck_id: int) -> List[CostFuel]:
         """Returns cost fuel records associated with a truck."""
         return CostFuel.objects.filter(truck__id_truck=truck_id)
     
+    def get_totals_by_orders(self, order_keys) -> Dict:
+        """Returns the summed fuel cost per order key in a single grouped query."""
+        rows = (
+            CostFuel.objects
+            .filter(order_id__in=order_keys)
+            .values('order_id')
+            .annotate(total=Sum('cost_fuel'))
+        )
+        return {row['order_id']: float(row['total'] or 0) for row in rows}
+    
     def create_cost_fuel(self, cost_fuel_data: Dict) -> CostFuel:
         """Creates a new cost fuel record."""
         return CostFuel.objects.create(**cost_fuel_data)
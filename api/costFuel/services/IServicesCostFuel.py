@@ -8,6 +8,18 @@ class IServicesCostFuel:
         """Returns all cost fuel records."""
         pass
     
+    def get_by_company(self, company_id, truck_id=None, order_key=None, date_from=None, date_to=None):
+        """Returns the cost fuel records of a company's orders, filtered."""
+        pass
+    
+    def get_totals(self, cost_fuels) -> Dict:
+        """Returns the count and summed cost_fuel / fuel_qty of the given records."""
+        pass
+    
+    def get_fuel_efficiency(self, company_id, truck_id=None, date_from=None, date_to=None) -> Dict:
+        """Returns the fleet, per-truck and per-week fuel efficiency of a company."""
+        pass
+    
     def get_by_id(self, id_fuel: int) -> Optional[CostFuel]:
         """Returns a cost fuel record by its ID."""
         pass
@@ -16,10 +28,18 @@ class IServicesCostFuel:
         """Returns cost fuel records associated with an order."""
         pass
     
+    def get_by_orders(self, order_keys) -> List[CostFuel]:
+        """Returns cost fuel records (with their truck) of several orders."""
+        pass
+    
     def get_by_truck(self, truck_id: int) -> List[CostFuel]:
         """Returns cost fuel records associated with a truck."""
         pass
     
+    def get_totals_by_orders(self, order_keys) -> Dict:
+        """Returns the summed fuel cost per order key."""
+        pass
+    
     def create_cost_fuel(self, cost_fuel_data: Dict) -> CostFuel:
         """Creates a new cost fuel record."""
         pass
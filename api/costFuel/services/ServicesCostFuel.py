@@ -2,6 +2,7 @@ from typing import List, Optional, Dict
 from api.costFuel.models.CostFuel import CostFuel
 from api.costFuel.repositories.RepositoryCostFuel import RepositoryCostFuel
 from api.costFuel.services.IServicesCostFuel import IServicesCostFuel
+from api.costFuel import efficiency_cache
 
 class ServicesCostFuel(IServicesCostFuel):
     """Implementation of the CostFuel service interface."""
@@ -13,6 +14,48 @@ class ServicesCostFuel(IServicesCostFuel):
         """Returns all cost fuel records."""
         return self.repository.get_all()
     
+    def get_by_company(self, company_id, truck_id=None, order_key=None, date_from=None, date_to=None):
+        """Returns the cost fuel records of a company's orders, filtered."""
+        return self.repository.get_by_company(
+            company_id, truck_id=truck_id, order_key=order_key, date_from=date_from, date_to=date_to
+        )
+    
+    def get_totals(self, cost_fuels) -> Dict:
+        """Returns the count and summed cost_fuel / fuel_qty of the given records (the whole filtered window)."""
+        totals = self.repository.get_totals(cost_fuels)
+        return {
+            'count': totals['count'],
+            'total_cost_fuel': totals['total_cost_fuel'] or 0,
+            'total_fuel_qty': totals['total_fuel_qty'] or 0,
+        }
+    
+    def get_fuel_efficiency(self, company_id, truck_id=None, date_from=None, date_to=None) -> Dict:
+        """
+        Returns the fuel efficiency of a company's trucks, optionally for one
+        truck and a range of order dates:
+        - fleet: metrics of every record in the window.
+        - trucks: metrics per truck.
+        - weeks: metrics per ISO week of the order date (cost per gallon trend, distance per week).
+
+        Each part is a single aggregate query; the result is cached per
+        company until its fuel records or order dates change.
+        """
+        cache_key = efficiency_cache.report_key(company_id, {'truck': truck_id, 'from': date_from, 'to': date_to})
+        report = efficiency_cache.get_report(cache_key)
+        if report is not None:
+            return report
+
+        cost_fuels = self.repository.get_by_company(
+            company_id, truck_id=truck_id, date_from=date_from, date_to=date_to
+        )
+        report = {
+            'fleet': self.repository.get_efficiency_totals(cost_fuels),
+            'trucks': self.repository.get_efficiency_by_truck(cost_fuels),
+            'weeks': self.repository.get_efficiency_by_week(cost_fuels),
+        }
+        efficiency_cache.set_report(cache_key, report)
+        return report
+    
     def get_by_id(self, id_fuel: int) -> Optional[CostFuel]:
         """Returns a cost fuel record by its ID."""
         return self.repository.get_by_id(id_fuel)
@@ -21,10 +64,18 @@ class ServicesCostFuel(IServicesCostFuel):
         """Returns cost fuel records associated with an order."""
         return self.repository.get_by_order(order_key)
     
+    def get_by_orders(self, order_keys) -> List[CostFuel]:
+        """Returns cost fuel records (with their truck) of several orders."""
+        return self.repository.get_by_orders(order_keys)
+    
     def get_by_truck(self, truck_id: int) -> List[CostFuel]:
         """Returns cost fuel records associated with a truck."""
         return self.repository.get_by_truck(truck_id)
     
+    def get_totals_by_orders(self, order_keys) -> Dict:
+        """Returns the summed fuel cost per order key."""
+        return self.repository.get_totals_by_orders(order_keys)
+    
     def create_cost_fuel(self, cost_fuel_data: Dict) -> CostFuel:
         """Creates a new cost fuel record."""
         return self.repository.create_cost_fuel(cost_fuel_data)
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from api.customerFactory.serializers.SerializerCustomerFactory import SerializerCustomerFactory
 from api.customerFactory.services.ServiceCustomerFactory import ServicesCustomerFactory
+from api.common.etag import versioned_etag
 class CustomerFactoryController(viewsets.ViewSet):
     """
     CRUD completo de CustomerFactory.
@@ -13,6 +14,7 @@ class CustomerFactoryController(viewsets.ViewSet):
         self.service = ServicesCustomerFactory()
 
     @extend_schema(responses={200: OpenApiResponse(response=SerializerCustomerFactory(many=True))})
+    @versioned_etag('customer_factories')
     def list(self, request):
         qs = self.service.list()
         return Response(SerializerCustomerFactory(qs, many=True).data)
@@ -0,0 +1,126 @@
+from functools import partial
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from api.order.models.Order import Order
+from api.assign.models.Assign import Assign
+from api.operator.models.Operator import Operator
+from api.person.models.Person import Person
+from api.truck.models.Truck import Truck
+from api.job.models.Job import Job
+from api.tool.models.Tool import Tool
+from api.customerFactory.models.CustomerFactory import CustomerFactory
+
+class CompanyDataVersion(models.Model):
+    """
+    Version of a resource (orders, operators, trucks...) of a company,
+    bumped by the signal handlers below whenever one of its rows is saved
+    or deleted. Read endpoints derive their ETag from it, so a conditional
+    request is answered with 304 from this table alone.
+
+    id_company is 0 for the resources listed to every company
+    (ServicesDataVersion.SHARED_RESOURCES), hence not a foreign key.
+    """
+    pk = models.CompositePrimaryKey('id_company', 'resource')
+    id_company = models.PositiveIntegerField()
+    resource = models.CharField(max_length=30)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'api_company_data_version'
+        app_label = 'api'
+
+    def __str__(self):
+        return f"{self.resource} of company {self.id_company}: v{self.version}"
+
+
+def bump_data_version(company_id, *resources):
+    # Imported here to avoid a circular import between models and services
+    from api.dataVersion.services.ServicesDataVersion import ServicesDataVersion
+    ServicesDataVersion().bump(company_id, *resources)
+
+
+def _bump_order_companies(order_ids, resource):
+    company_ids = set(Order.objects.filter(pk__in=order_ids).values_list('id_company_id', flat=True))
+    for company_id in company_ids:
+        bump_data_version(company_id, resource)
+
+
+def bump_data_version_of_orders(order_ids, resource):
+    """
+    Bumps `resource` for the companies of the given orders. The companies are
+    resolved after the transaction commits, so the writer pays no extra query.
+    """
+    order_ids = {order_id for order_id in order_ids if order_id}
+    if order_ids:
+        transaction.on_commit(partial(_bump_order_companies, order_ids, resource))
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def order_data_changed(sender, instance, **kwargs):
+    bump_data_version(instance.id_company_id, 'orders')
+
+@receiver(post_save, sender=Assign)
+@receiver(post_delete, sender=Assign)
+def assign_data_changed(sender, instance, **kwargs):
+    if Assign.order.is_cached(instance):
+        bump_data_version(instance.order.id_company_id, 'assigns')
+    else:
+        bump_data_version_of_orders([instance.order_id], 'assigns')
+
+@receiver(post_save, sender=Operator)
+@receiver(post_delete, sender=Operator)
+def operator_data_changed(sender, instance, **kwargs):
+    company_id = (
+        Person.all_objects.filter(pk=instance.person_id).values_list('id_company_id', flat=True).first()
+    )
+    bump_data_version(company_id, 'operators')
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def person_data_changed(sender, instance, **kwargs):
+    # Client and operator names are part of the order, operator and assign listings
+    bump_data_version(instance.id_company_id, 'persons')
+
+@receiver(post_save, sender=Truck)
+@receiver(post_delete, sender=Truck)
+def truck_data_changed(sender, instance, **kwargs):
+    bump_data_version(instance.id_company_id, 'trucks')
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def job_data_changed(sender, instance, **kwargs):
+    bump_data_version(instance.id_company_id, 'jobs')
+
+@receiver(post_save, sender=Tool)
+@receiver(post_delete, sender=Tool)
+def tool_data_changed(sender, instance, **kwargs):
+    bump_data_version(instance.company_id, 'tools')
+
+@receiver(post_save, sender=CustomerFactory)
+@receiver(post_delete, sender=CustomerFactory)
+def customer_factory_data_changed(sender, instance, **kwargs):
+    # Shared by every company: counted under ServicesDataVersion.SHARED_COMPANY
+    bump_data_version(0, 'customer_factories')
+
+
+_HANDLERS = {
+    Order: order_data_changed,
+    Assign: assign_data_changed,
+    Operator: operator_data_changed,
+    Person: person_data_changed,
+    Truck: truck_data_changed,
+    Job: job_data_changed,
+    Tool: tool_data_changed,
+    CustomerFactory: customer_factory_data_changed,
+}
+
+
+def bump_for_instances(instances):
+    """Bumps the resources of instances changed without save() (bulk_update, queryset update)."""
+    for instance in instances:
+        handler = _HANDLERS.get(type(instance))
+        if handler is not None:
+            handler(type(instance), instance)
@@ -0,0 +1,30 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from api.dataVersion.models.CompanyDataVersion import CompanyDataVersion
+
+class RepositoryDataVersion:
+    """
+    Persistence of the per-company data version counters (CompanyDataVersion).
+    """
+
+    def increment(self, company_id, resource):
+        """Adds one to the counter with a single UPDATE, creating it on first use."""
+        counter = CompanyDataVersion.objects.filter(id_company=company_id, resource=resource)
+        if counter.update(version=F('version') + 1, updated_at=timezone.now()):
+            return
+        try:
+            with transaction.atomic():
+                CompanyDataVersion.objects.create(id_company=company_id, resource=resource, version=1)
+        except IntegrityError:
+            # Created by a concurrent bump
+            counter.update(version=F('version') + 1, updated_at=timezone.now())
+
+    def get_versions(self, keys):
+        """{(company_id, resource): version} of the given pairs in one query; missing counters are left out."""
+        company_ids = {company_id for company_id, _ in keys}
+        resources = {resource for _, resource in keys}
+        rows = CompanyDataVersion.objects.filter(
+            id_company__in=company_ids, resource__in=resources
+        ).values_list('id_company', 'resource', 'version')
+        return {(company_id, resource): version for company_id, resource, version in rows}
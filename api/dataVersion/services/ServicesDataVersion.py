@@ -0,0 +1,51 @@
+import hashlib
+from functools import partial
+from django.db import transaction
+from api.dataVersion.repositories.RepositoryDataVersion import RepositoryDataVersion
+
+# Counter of the resources listed to every company (their endpoints are not
+# company-scoped), e.g. jobs and customer factories
+SHARED_COMPANY = 0
+SHARED_RESOURCES = frozenset({'jobs', 'customer_factories'})
+
+
+def _counter_company(company_id, resource):
+    return SHARED_COMPANY if resource in SHARED_RESOURCES else company_id
+
+
+class ServicesDataVersion:
+    """
+    Per-company, per-resource version counters behind the ETags of the read
+    endpoints (api.common.etag).
+
+    The signal handlers in api.dataVersion.models.CompanyDataVersion bump a
+    resource when one of its rows is saved or deleted. The bump runs after
+    the transaction commits, so a client never receives a new ETag with old
+    data, and the counter row is only locked for that single UPDATE.
+    """
+
+    def __init__(self):
+        self.repository = RepositoryDataVersion()
+
+    def bump(self, company_id, *resources):
+        """Schedules +1 on the company's counters of the given resources once the current transaction commits."""
+        if company_id is None:
+            return
+        for resource in resources:
+            transaction.on_commit(partial(self.repository.increment, _counter_company(company_id, resource), resource))
+
+    def get_versions(self, company_id, resources):
+        """[version] of each resource for the company (0 if never bumped), in one query."""
+        keys = [(_counter_company(company_id, resource), resource) for resource in resources]
+        versions = self.repository.get_versions(keys)
+        return [versions.get(key, 0) for key in keys]
+
+    def get_etag(self, company_id, resources, *variant):
+        """
+        Strong ETag of a response built from the given resources of the
+        company. `variant` holds whatever else shapes the response (path,
+        query string, user), so different listings never share a tag.
+        """
+        versions = self.get_versions(company_id, resources)
+        parts = [str(company_id), *(f"{r}:{v}" for r, v in zip(resources, versions)), *map(str, variant)]
+        return '"' + hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest() + '"'
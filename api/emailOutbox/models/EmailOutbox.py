@@ -0,0 +1,46 @@
+from django.db import models
+
+
+class EmailOutbox(models.Model):
+    """
+    Email waiting to be delivered.
+
+    Requests only write the rendered message here, inside their own
+    transaction; the outbox worker sends it through EMAIL_BACKEND in the
+    background, retrying with backoff and leaving it as dead once it runs
+    out of attempts (see api.emailOutbox.services.ServicesEmailOutbox).
+    The bodies are cleared once the email is sent.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_DEAD, 'Dead'),
+    )
+
+    kind = models.CharField(max_length=50)          # e.g. 'password_reset'
+    to_email = models.EmailField(max_length=254)
+    from_email = models.CharField(max_length=254, null=True, blank=True)  # None: DEFAULT_FROM_EMAIL
+    subject = models.CharField(max_length=255)
+    text_body = models.TextField()
+    html_body = models.TextField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'api_email_outbox'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at', 'id'], name='email_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"EmailOutbox {self.pk} - {self.kind} to {self.to_email} ({self.status})"
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from django.db.models import F
+from django.utils import timezone
+from api.emailOutbox.models.EmailOutbox import EmailOutbox
+
+class RepositoryEmailOutbox:
+    """
+    Persistence of the queued emails (EmailOutbox).
+    """
+
+    def create(self, **fields):
+        return EmailOutbox.objects.create(next_attempt_at=timezone.now(), **fields)
+
+    def get_due_ids(self, limit):
+        """Pending emails whose next attempt is due, oldest first."""
+        return list(
+            EmailOutbox.objects.filter(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+
+    def claim(self, email_id):
+        """
+        Marks a pending email as sending and returns it, or None if another
+        worker claimed it first. The conditional UPDATE is the lock.
+        """
+        claimed = EmailOutbox.objects.filter(pk=email_id, status=EmailOutbox.STATUS_PENDING).update(
+            status=EmailOutbox.STATUS_SENDING,
+            attempts=F('attempts') + 1,
+            updated_at=timezone.now(),
+        )
+        if not claimed:
+            return None
+        return EmailOutbox.objects.get(pk=email_id)
+
+    def mark_sent(self, email):
+        """Marks the email as sent and drops its bodies, which may carry one-time links (reset tokens)."""
+        now = timezone.now()
+        EmailOutbox.objects.filter(pk=email.pk).update(
+            status=EmailOutbox.STATUS_SENT, text_body='', html_body=None,
+            last_error=None, sent_at=now, updated_at=now
+        )
+
+    def mark_failed(self, email, error, max_attempts, retry_in_seconds):
+        """Schedules another attempt in retry_in_seconds, or dead-letters the email once it ran out of attempts."""
+        now = timezone.now()
+        next_status = EmailOutbox.STATUS_DEAD if email.attempts >= max_attempts else EmailOutbox.STATUS_PENDING
+        EmailOutbox.objects.filter(pk=email.pk).update(
+            status=next_status,
+            last_error=str(error)[:2000],
+            next_attempt_at=now + timedelta(seconds=retry_in_seconds),
+            updated_at=now,
+        )
+        return next_status
+
+    def requeue_stale(self, older_than_seconds):
+        """Emails left in sending by a crashed worker go back to pending."""
+        limit = timezone.now() - timedelta(seconds=older_than_seconds)
+        return EmailOutbox.objects.filter(
+            status=EmailOutbox.STATUS_SENDING, updated_at__lt=limit
+        ).update(status=EmailOutbox.STATUS_PENDING, updated_at=timezone.now())
+
+    def requeue_dead(self, email_ids=None):
+        """Gives dead emails (all, or the given ones) a fresh set of attempts."""
+        dead = EmailOutbox.objects.filter(status=EmailOutbox.STATUS_DEAD)
+        if email_ids:
+            dead = dead.filter(pk__in=email_ids)
+        now = timezone.now()
+        return dead.update(status=EmailOutbox.STATUS_PENDING, attempts=0, next_attempt_at=now, updated_at=now)
@@ -0,0 +1,168 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, transaction
+from django.template.loader import get_template
+from api.emailOutbox.repositories.RepositoryEmailOutbox import RepositoryEmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Send queued emails from a local thread right after the request commits. When
+# disabled, they wait for the send_outbox_emails management command.
+EMAIL_OUTBOX_RUN_INLINE = getattr(settings, 'EMAIL_OUTBOX_RUN_INLINE', True)
+EMAIL_OUTBOX_MAX_ATTEMPTS = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+# Delay before the first retry; doubles on each failed attempt up to the maximum
+EMAIL_OUTBOX_RETRY_SECONDS = getattr(settings, 'EMAIL_OUTBOX_RETRY_SECONDS', 60)
+EMAIL_OUTBOX_MAX_RETRY_SECONDS = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_SECONDS', 60 * 60)
+
+# Subject and templates (under templates/) of each kind of email
+EMAIL_TEMPLATES = {
+    'password_reset': {
+        'subject': "GS PRO MASTER MOVING - Password Reset Request",
+        'text': 'emails/password_reset.txt',
+        'html': 'emails/password_reset.html',
+    },
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # One sender: the provider connection is the bottleneck, not the CPU
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-outbox')
+        return _executor
+
+
+@lru_cache(maxsize=None)
+def _compiled_template(template_name):
+    """Templates are parsed once per process and reused for every email."""
+    return get_template(template_name)
+
+
+def retry_delay(attempts):
+    """Seconds before the next attempt of an email that already failed `attempts` times."""
+    return min(EMAIL_OUTBOX_RETRY_SECONDS * 2 ** max(attempts - 1, 0), EMAIL_OUTBOX_MAX_RETRY_SECONDS)
+
+
+class ServicesEmailOutbox:
+    """
+    Transactional outbox for outgoing emails.
+
+    enqueue() renders the message and stores it as an EmailOutbox row in the
+    caller's transaction, so the request never waits on the email provider
+    and an email is only sent if the request committed. A worker sends the
+    due rows in batches over a single connection; failures are retried with
+    exponential backoff and dead-lettered after EMAIL_OUTBOX_MAX_ATTEMPTS.
+    """
+
+    def __init__(self):
+        self.repository = RepositoryEmailOutbox()
+
+    def render(self, kind, context):
+        """(subject, text, html) of an EMAIL_TEMPLATES kind."""
+        spec = EMAIL_TEMPLATES[kind]
+        text = _compiled_template(spec['text']).render(context)
+        html = _compiled_template(spec['html']).render(context) if spec.get('html') else None
+        return spec['subject'], text, html
+
+    def enqueue(self, kind, to_email, context):
+        """
+        Queues an email of one of the EMAIL_TEMPLATES kinds.
+
+        Args:
+        - kind: Key of EMAIL_TEMPLATES.
+        - to_email: Recipient address.
+        - context: Template context.
+        """
+        subject, text, html = self.render(kind, context)
+        email = self.repository.create(
+            kind=kind, to_email=to_email, subject=subject, text_body=text, html_body=html,
+        )
+        if EMAIL_OUTBOX_RUN_INLINE:
+            transaction.on_commit(lambda: _get_executor().submit(self._run_in_thread))
+        return email
+
+    def _retry_later(self, seconds):
+        timer = threading.Timer(seconds, lambda: _get_executor().submit(self._run_in_thread))
+        timer.daemon = True
+        timer.start()
+
+    def _run_in_thread(self):
+        close_old_connections()
+        try:
+            self.send_due()
+        except Exception as e:
+            logger.error(f"Email outbox worker failed: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+
+    def requeue_stale(self, older_than_seconds=600):
+        return self.repository.requeue_stale(older_than_seconds)
+
+    def requeue_dead(self, email_ids=None):
+        return self.repository.requeue_dead(email_ids)
+
+    def send_due(self, limit=50):
+        """
+        Sends up to `limit` due emails in this thread over one backend
+        connection. Returns (sent, failed).
+        """
+        email_ids = self.repository.get_due_ids(limit)
+        if not email_ids:
+            return 0, 0
+
+        sent = failed = 0
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            # Provider unreachable: the emails stay due for the next run
+            logger.error(f"Could not open the email connection: {e}")
+            if EMAIL_OUTBOX_RUN_INLINE:
+                self._retry_later(EMAIL_OUTBOX_RETRY_SECONDS)
+            return 0, 0
+        try:
+            for email_id in email_ids:
+                email = self.repository.claim(email_id)
+                if email is None:
+                    continue
+                if self._send(email, connection):
+                    sent += 1
+                else:
+                    failed += 1
+        finally:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing the email connection: {e}")
+        return sent, failed
+
+    def _send(self, email, connection):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.text_body,
+            from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+            to=[email.to_email],
+            connection=connection,
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        try:
+            message.send(fail_silently=False)
+        except Exception as e:
+            next_status = self.repository.mark_failed(
+                email, e, EMAIL_OUTBOX_MAX_ATTEMPTS, retry_delay(email.attempts)
+            )
+            logger.error(f"Email {email.pk} failed (attempt {email.attempts}, now {next_status}): {e}")
+            if EMAIL_OUTBOX_RUN_INLINE and next_status == email.STATUS_PENDING:
+                self._retry_later(retry_delay(email.attempts))
+            return False
+        self.repository.mark_sent(email)
+        return True
@@ -0,0 +1,47 @@
+from django.db import models
+
+
+class GeoCountry(models.Model):
+    """
+    Countries / states / cities offered by OrderLocationController.
+
+    The dataset is loaded (and replaced as a whole) by the load_geo_dataset
+    management command; requests read it from the in-process index of
+    api.geo.services.ServicesGeo, never from the external API.
+    """
+    id = models.IntegerField(primary_key=True)
+    name = models.CharField(max_length=100)
+    iso2 = models.CharField(max_length=2, blank=True, default='')
+    iso3 = models.CharField(max_length=3, blank=True, default='')
+    loaded_at = models.DateTimeField()  # same for every row of a load; the dataset version
+
+    class Meta:
+        db_table = 'api_geo_country'
+
+    def __str__(self):
+        return self.name
+
+
+class GeoState(models.Model):
+    id = models.IntegerField(primary_key=True)
+    country = models.ForeignKey(GeoCountry, on_delete=models.CASCADE, related_name='states', db_column='id_country')
+    name = models.CharField(max_length=100)
+    state_code = models.CharField(max_length=20, blank=True, default='')
+
+    class Meta:
+        db_table = 'api_geo_state'
+
+    def __str__(self):
+        return f"{self.name} ({self.country_id})"
+
+
+class GeoCity(models.Model):
+    id = models.IntegerField(primary_key=True)
+    state = models.ForeignKey(GeoState, on_delete=models.CASCADE, related_name='cities', db_column='id_state')
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'api_geo_city'
+
+    def __str__(self):
+        return self.name
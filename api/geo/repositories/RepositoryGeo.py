@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from api.geo.models.GeoLocation import GeoCountry, GeoState, GeoCity
+
+class RepositoryGeo:
+    """
+    Persistence of the geo dataset (GeoCountry / GeoState / GeoCity).
+    """
+
+    BATCH_SIZE = 2000
+
+    def replace_dataset(self, countries):
+        """
+        Replaces the whole dataset in one transaction, so readers see either
+        the old or the new one.
+
+        Args:
+        - countries: [{"name", "iso2", "iso3", "states": [{"name", "state_code", "cities": [name, ...]}]}]
+
+        Returns (countries, states, cities) written.
+        """
+        loaded_at = timezone.now()
+        country_rows, state_rows, city_rows = [], [], []
+        # Ids are assigned here: MySQL does not return them from bulk_create
+        for country in countries:
+            country_id = len(country_rows) + 1
+            country_rows.append(GeoCountry(
+                id=country_id,
+                name=country['name'][:100],
+                iso2=(country.get('iso2') or '')[:2],
+                iso3=(country.get('iso3') or '')[:3],
+                loaded_at=loaded_at,
+            ))
+            for state in country.get('states') or []:
+                state_id = len(state_rows) + 1
+                state_rows.append(GeoState(
+                    id=state_id,
+                    country_id=country_id,
+                    name=state['name'][:100],
+                    state_code=(state.get('state_code') or '')[:20],
+                ))
+                for city in state.get('cities') or []:
+                    city_rows.append(GeoCity(id=len(city_rows) + 1, state_id=state_id, name=city[:100]))
+
+        with transaction.atomic():
+            GeoCity.objects.all().delete()
+            GeoState.objects.all().delete()
+            GeoCountry.objects.all().delete()
+            GeoCountry.objects.bulk_create(country_rows, batch_size=self.BATCH_SIZE)
+            GeoState.objects.bulk_create(state_rows, batch_size=self.BATCH_SIZE)
+            GeoCity.objects.bulk_create(city_rows, batch_size=self.BATCH_SIZE)
+        return len(country_rows), len(state_rows), len(city_rows)
+
+    def get_version(self):
+        """loaded_at of the current dataset (None if empty); one aggregate over the countries."""
+        return GeoCountry.objects.aggregate(version=Max('loaded_at'))['version']
+
+    def get_rows(self):
+        """
+        Plain tuples of the whole dataset, three queries:
+        (countries [(id, name, iso2, iso3)], states [(id, country_id, name, state_code)],
+        cities [(state_id, name)]).
+        """
+        countries = list(GeoCountry.objects.values_list('id', 'name', 'iso2', 'iso3'))
+        states = list(GeoState.objects.values_list('id', 'country_id', 'name', 'state_code'))
+        cities = list(GeoCity.objects.values_list('state_id', 'name').iterator(chunk_size=self.BATCH_SIZE))
+        return countries, states, cities
@@ -0,0 +1,199 @@
+import logging
+import threading
+import time
+from types import MappingProxyType
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+from api.geo.repositories.RepositoryGeo import RepositoryGeo
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the stored dataset version by the background
+# refresher of each process; 0 disables it (the index is then built once).
+GEO_INDEX_REFRESH_SECONDS = getattr(settings, 'GEO_INDEX_REFRESH_SECONDS', 0)
+
+# External source read by the load_geo_dataset command only
+COUNTRIES_URL = "https://countriesnow.space/api/v0.1/countries"
+STATES_URL = "https://countriesnow.space/api/v0.1/countries/states"
+CITIES_URL = "https://countriesnow.space/api/v0.1/countries/state/cities"
+
+
+def _key(name):
+    return (name or '').strip().casefold()
+
+
+class GeoIndex:
+    """
+    Immutable in-process view of the geo dataset, already sorted by name:
+    countries as (name, iso2, iso3), states as (name, state_code) per country
+    and city names per (country, state). Lookups are case-insensitive.
+    """
+
+    def __init__(self, version, countries, states, cities):
+        self.version = version
+        id_to_country = {country_id: name for country_id, name, _, _ in countries}
+        self.countries = tuple(sorted((name, iso2, iso3) for _, name, iso2, iso3 in countries))
+
+        states_by_country = {}
+        state_path = {}
+        for state_id, country_id, name, state_code in states:
+            country = _key(id_to_country[country_id])
+            states_by_country.setdefault(country, []).append((name, state_code))
+            state_path[state_id] = (country, _key(name))
+
+        cities_by_state = {}
+        for state_id, name in cities:
+            cities_by_state.setdefault(state_path[state_id], []).append(name)
+
+        self.states = MappingProxyType({key: tuple(sorted(rows)) for key, rows in states_by_country.items()})
+        self.cities = MappingProxyType({key: tuple(sorted(rows)) for key, rows in cities_by_state.items()})
+
+    def __bool__(self):
+        return bool(self.countries)
+
+    def get_states(self, country):
+        return self.states.get(_key(country), ())
+
+    def get_cities(self, country, state):
+        return self.cities.get((_key(country), _key(state)), ())
+
+
+_index = None
+_index_lock = threading.Lock()
+_refresher = None
+
+
+class ServicesGeo:
+    """
+    Countries, states and cities for OrderLocationController.
+
+    The dataset lives in the database (loaded with `manage.py load_geo_dataset`)
+    and each process serves it from a GeoIndex built on first use, so no
+    request waits on the network or the cache. With GEO_INDEX_REFRESH_SECONDS
+    a daemon thread swaps in a new index when a reload changes the version.
+    """
+
+    def __init__(self):
+        self.repository = RepositoryGeo()
+
+    def get_index(self):
+        """The current GeoIndex; empty if the dataset was never loaded."""
+        global _index
+        index = _index
+        if index is not None:
+            return index
+        with _index_lock:
+            if _index is None:
+                index = self.build_index()
+                # An empty dataset is not kept, so loading it later needs no restart
+                if index:
+                    _index = index
+                    self._start_refresher()
+                return index
+            return _index
+
+    def build_index(self):
+        version = self.repository.get_version()
+        return GeoIndex(version, *self.repository.get_rows())
+
+    def refresh_index(self):
+        """Rebuilds the index if the stored dataset changed. Returns True if it was swapped."""
+        global _index
+        version = self.repository.get_version()
+        if _index is not None and _index.version == version:
+            return False
+        index = self.build_index()
+        with _index_lock:
+            _index = index
+        logger.info(f"Geo index refreshed: {len(index.countries)} countries (version {index.version})")
+        return True
+
+    def get_countries(self):
+        return [{'code': iso2, 'name': name, 'iso3': iso3} for name, iso2, iso3 in self.get_index().countries]
+
+    def get_states(self, country):
+        return [{'name': name, 'state_code': code} for name, code in self.get_index().get_states(country)]
+
+    def get_cities(self, country, state):
+        return [{'name': name} for name in self.get_index().get_cities(country, state)]
+
+    def is_loaded(self):
+        return bool(self.get_index())
+
+    def _start_refresher(self):
+        global _refresher
+        if GEO_INDEX_REFRESH_SECONDS <= 0 or _refresher is not None:
+            return
+        _refresher = threading.Thread(target=self._refresh_loop, name='geo-index-refresher', daemon=True)
+        _refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(GEO_INDEX_REFRESH_SECONDS)
+            close_old_connections()
+            try:
+                self.refresh_index()
+            except Exception as e:
+                logger.error(f"Geo index refresh failed: {e}", exc_info=True)
+            finally:
+                close_old_connections()
+
+    def load_dataset(self, countries):
+        """Replaces the stored dataset and this process' index. Returns (countries, states, cities)."""
+        counts = self.repository.replace_dataset(countries)
+        self.refresh_index()
+        return counts
+
+    @staticmethod
+    def fetch_remote_dataset(only_countries=None, with_cities=True, timeout=30, log=None):
+        """
+        Downloads the dataset from the CountriesNow API in the format of
+        RepositoryGeo.replace_dataset. Cities need one request per state.
+
+        Args:
+        - only_countries: Optional names of the countries to keep.
+        - with_cities: False to skip the per-state city requests.
+        - log: Optional callable receiving progress messages.
+        """
+        session = requests.Session()
+
+        def fetch(method, url, **kwargs):
+            response = session.request(method, url, timeout=timeout, **kwargs)
+            response.raise_for_status()
+            data = response.json()
+            if data.get('error'):
+                raise Exception(data.get('msg', 'API Error'))
+            return data.get('data') or []
+
+        wanted = {_key(name) for name in only_countries} if only_countries else None
+        codes = {
+            _key(country.get('country')): (country.get('country', ''), country.get('iso2', ''), country.get('iso3', ''))
+            for country in fetch('GET', COUNTRIES_URL)
+        }
+        # Countries without states in the source are still listed
+        sources = {_key(name): {'name': name, 'states': []} for name, _, _ in codes.values()}
+        for country in fetch('GET', STATES_URL):
+            if country.get('name'):
+                sources[_key(country['name'])] = country
+
+        countries = []
+        for key, country in sorted(sources.items()):
+            if not key or (wanted is not None and key not in wanted):
+                continue
+            name = country['name']
+            _, iso2, iso3 = codes.get(key, (name, country.get('iso2', ''), country.get('iso3', '')))
+            states = []
+            for state in country.get('states') or []:
+                cities = []
+                if with_cities:
+                    try:
+                        cities = fetch('POST', CITIES_URL, json={'country': name, 'state': state.get('name', '')})
+                    except Exception as e:
+                        # Some states have no cities in the source
+                        logger.warning(f"No cities for {state.get('name')}, {name}: {e}")
+                states.append({'name': state.get('name', ''), 'state_code': state.get('state_code', ''), 'cities': cities})
+            countries.append({'name': name, 'iso2': iso2, 'iso3': iso3, 'states': states})
+            if log:
+                log(f"{name}: {len(states)} states, {sum(len(s['cities']) for s in states)} cities")
+        return countries
@@ -0,0 +1,41 @@
+from django.db import models
+
+
+class ImageJob(models.Model):
+    """
+    Pending compression of an image that was stored as uploaded.
+
+    The request thread only saves the raw file and enqueues a job; the
+    background image worker compresses it, renders the thumbnails and swaps
+    the field to the compressed file (see api.imageJob.services.ServicesImageJob).
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    model_name = models.CharField(max_length=50)     # e.g. 'operator', 'order'
+    object_id = models.CharField(max_length=64)
+    field_name = models.CharField(max_length=50)
+    source_name = models.CharField(max_length=255)   # raw file stored in the field
+    options = models.JSONField(default=dict, blank=True)  # ImageProcessor.generate_derivatives kwargs
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'api_image_job'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='image_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"ImageJob {self.pk} - {self.model_name}:{self.object_id}.{self.field_name} ({self.status})"
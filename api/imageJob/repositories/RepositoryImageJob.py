@@ -0,0 +1,54 @@
+from datetime import timedelta
+from django.db.models import F
+from django.utils import timezone
+from api.imageJob.models.ImageJob import ImageJob
+
+class RepositoryImageJob:
+    """
+    Persistence of the image compression jobs (ImageJob).
+    """
+
+    def create_jobs(self, jobs):
+        """Stores the given unsaved ImageJob instances in one statement."""
+        return ImageJob.objects.bulk_create(jobs)
+
+    def get_pending_ids(self, limit):
+        return list(
+            ImageJob.objects.filter(status=ImageJob.STATUS_PENDING)
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+
+    def claim(self, job_id):
+        """
+        Marks a pending job as processing and returns it, or None if another
+        worker claimed it first. The conditional UPDATE is the lock.
+        """
+        claimed = ImageJob.objects.filter(pk=job_id, status=ImageJob.STATUS_PENDING).update(
+            status=ImageJob.STATUS_PROCESSING,
+            attempts=F('attempts') + 1,
+            updated_at=timezone.now(),
+        )
+        if not claimed:
+            return None
+        return ImageJob.objects.get(pk=job_id)
+
+    def mark_done(self, job, note=None):
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=ImageJob.STATUS_DONE, last_error=note, updated_at=timezone.now()
+        )
+
+    def mark_failed(self, job, error, max_attempts):
+        """Sends the job back to the queue, or to failed once it ran out of attempts."""
+        next_status = ImageJob.STATUS_FAILED if job.attempts >= max_attempts else ImageJob.STATUS_PENDING
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=next_status, last_error=str(error)[:2000], updated_at=timezone.now()
+        )
+        return next_status
+
+    def requeue_stale(self, older_than_seconds):
+        """Jobs left in processing by a crashed worker go back to pending."""
+        limit = timezone.now() - timedelta(seconds=older_than_seconds)
+        return ImageJob.objects.filter(
+            status=ImageJob.STATUS_PROCESSING, updated_at__lt=limit
+        ).update(status=ImageJob.STATUS_PENDING, updated_at=timezone.now())
@@ -0,0 +1,190 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from api.imageJob.models.ImageJob import ImageJob
+from api.imageJob.repositories.RepositoryImageJob import RepositoryImageJob
+from api.utils import storage_index
+from api.utils.image_processor import ImageProcessor
+from api.utils.s3utils import IMAGE_DERIVATIVE_SIZES, IMAGE_MAIN_SIZE, derivative_path
+
+logger = logging.getLogger(__name__)
+
+# Process images in a local thread pool right after the upload commits. When
+# disabled, jobs wait for the process_image_jobs management command.
+IMAGE_JOBS_RUN_INLINE = getattr(settings, 'IMAGE_JOBS_RUN_INLINE', True)
+IMAGE_JOBS_WORKERS = getattr(settings, 'IMAGE_JOBS_WORKERS', 2)
+IMAGE_JOBS_MAX_ATTEMPTS = getattr(settings, 'IMAGE_JOBS_MAX_ATTEMPTS', 3)
+# Seconds before the first inline retry of a failed job, doubled on each attempt
+IMAGE_JOBS_RETRY_SECONDS = getattr(settings, 'IMAGE_JOBS_RETRY_SECONDS', 30)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_JOBS_WORKERS, thread_name_prefix='image-job')
+        return _executor
+
+
+def retry_delay(attempts):
+    """Seconds before the next inline attempt of a job that already failed `attempts` times."""
+    return IMAGE_JOBS_RETRY_SECONDS * 2 ** max(attempts - 1, 0)
+
+
+class ServicesImageJob:
+    """
+    Background compression of uploaded images.
+
+    Models store uploads as-is and call schedule() after saving. Each changed
+    image field becomes an ImageJob row (committed with the upload), which a
+    worker later renders at IMAGE_DERIVATIVE_SIZES with ImageProcessor and
+    swaps into the field with a conditional UPDATE, so a newer upload is
+    never overwritten.
+
+    In IMAGE_JOBS_RUN_INLINE mode failed jobs are resubmitted by a timer of
+    the same process. Jobs left in processing by a crashed process are only
+    requeued by `manage.py process_image_jobs`, which must also be scheduled
+    (e.g. from cron, without --loop) in that mode.
+    """
+
+    def __init__(self):
+        self.repository = RepositoryImageJob()
+
+    def schedule(self, instance, fields_options):
+        """
+        Enqueues one job per image field of a saved instance.
+
+        Args:
+        - instance: The saved model instance.
+        - fields_options: {field_name: generate_derivatives kwargs} of the fields to process.
+        """
+        jobs = []
+        for field_name, options in fields_options.items():
+            field_file = getattr(instance, field_name)
+            if not field_file or not field_file.name:
+                continue
+            jobs.append(ImageJob(
+                model_name=instance._meta.model_name,
+                object_id=str(instance.pk),
+                field_name=field_name,
+                source_name=field_file.name,
+                options=options,
+            ))
+        if not jobs:
+            return []
+
+        storage_index.mark_present(*[job.source_name for job in jobs])
+        jobs = self.repository.create_jobs(jobs)
+        if IMAGE_JOBS_RUN_INLINE:
+            job_ids = [job.pk for job in jobs]
+            transaction.on_commit(lambda: self._submit(job_ids))
+        return jobs
+
+    def _submit(self, job_ids):
+        executor = _get_executor()
+        for job_id in job_ids:
+            executor.submit(self._run_in_thread, job_id)
+
+    def _retry_later(self, job_id, seconds):
+        timer = threading.Timer(seconds, lambda: _get_executor().submit(self._run_in_thread, job_id))
+        timer.daemon = True
+        timer.start()
+
+    def _run_in_thread(self, job_id):
+        close_old_connections()
+        try:
+            self.run_job(job_id)
+        finally:
+            close_old_connections()
+
+    def run_pending(self, limit=100):
+        """Processes up to `limit` pending jobs in this thread. Returns how many were run."""
+        processed = 0
+        for job_id in self.repository.get_pending_ids(limit):
+            if self.run_job(job_id):
+                processed += 1
+        return processed
+
+    def requeue_stale(self, older_than_seconds=600):
+        return self.repository.requeue_stale(older_than_seconds)
+
+    def run_job(self, job_id):
+        """Claims and processes a job. Returns False if it was already taken."""
+        job = self.repository.claim(job_id)
+        if job is None:
+            return False
+        try:
+            note = self._compress(job)
+            self.repository.mark_done(job, note)
+        except Exception as e:
+            next_status = self.repository.mark_failed(job, e, IMAGE_JOBS_MAX_ATTEMPTS)
+            logger.error(f"Image job {job.pk} failed (attempt {job.attempts}, now {next_status}): {e}", exc_info=True)
+            if IMAGE_JOBS_RUN_INLINE and next_status == ImageJob.STATUS_PENDING:
+                self._retry_later(job.pk, retry_delay(job.attempts))
+        return True
+
+    def _compress(self, job):
+        model = apps.get_model('api', job.model_name)
+        manager = model._base_manager
+        instance = manager.filter(pk=job.object_id).first()
+        if instance is None:
+            return "Object no longer exists"
+
+        field_file = getattr(instance, job.field_name)
+        if field_file.name != job.source_name:
+            return "Superseded by a newer upload"
+
+        # Only rendering options are honoured (older jobs may carry others)
+        options = {key: value for key, value in job.options.items() if key in ('quality', 'format')}
+        field_file.open('rb')
+        try:
+            derivatives = ImageProcessor.generate_derivatives(field_file, sizes=IMAGE_DERIVATIVE_SIZES, **options)
+            if not derivatives:
+                raise ValueError(f"Could not compress {job.source_name}")
+            # upload_to may read the file (e.g. to hash it), so it runs while it is open
+            field_file.seek(0)
+            base_name = field_file.field.generate_filename(instance, derivatives[IMAGE_MAIN_SIZE].name)
+        finally:
+            field_file.close()
+
+        # The main (largest) rendition goes to the field, the smaller ones next
+        # to it under the deterministic keys of api.utils.s3utils.derivative_path
+        storage = field_file.storage
+        try:
+            new_name = storage.save(
+                derivative_path(base_name, IMAGE_MAIN_SIZE),
+                derivatives[IMAGE_MAIN_SIZE],
+                max_length=field_file.field.max_length
+            )
+            saved = [new_name]
+            for size, content in derivatives.items():
+                if size != IMAGE_MAIN_SIZE:
+                    saved.append(storage.save(derivative_path(new_name, size), content))
+        finally:
+            # Renditions are spooled temp files
+            for content in derivatives.values():
+                content.close()
+
+        # Swap only if the field still points to the raw upload
+        swapped = manager.filter(pk=instance.pk, **{job.field_name: job.source_name}).update(
+            **{job.field_name: new_name}
+        )
+        if swapped:
+            storage.delete(job.source_name)
+            storage_index.mark_present(*saved)
+            storage_index.mark_missing(job.source_name)
+            logger.debug(f"Image job {job.pk}: {job.source_name} -> {new_name}")
+            # The update above skips post_save: the listings' ETags must change with the new URL
+            from api.dataVersion.models.CompanyDataVersion import bump_for_instances
+            bump_for_instances([instance])
+            return None
+        for name in saved:
+            storage.delete(name)
+        storage_index.mark_missing(*saved)
+        return "Superseded by a newer upload"
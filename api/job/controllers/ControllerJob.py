@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from api.job.services.ServicesJob import ServicesJob
 from api.job.serializers.SerializerJob import SerializerJob
+from api.common.etag import versioned_etag
 
 class JobController(viewsets.ViewSet):
     """
@@ -17,6 +18,7 @@ class JobController(viewsets.ViewSet):
         summary="List all jobs that are active",
         responses={200: OpenApiResponse(response=SerializerJob(many=True))}
     )
+    @versioned_etag('jobs')
     def list(self, request):
         jobs = self.job_service.get_all_jobs()
         return Response(SerializerJob(jobs, many=True).data)
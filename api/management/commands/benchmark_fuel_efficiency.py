@@ -0,0 +1,160 @@
+import datetime
+import random
+import statistics
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import connection
+from api.company.models.Company import Company
+from api.costFuel.models.CostFuel import CostFuel
+from api.costFuel.repositories.RepositoryCostFuel import RepositoryCostFuel
+from api.costFuel.services.ServicesCostFuel import ServicesCostFuel
+from api.job.models.Job import Job
+from api.order.models.Order import Order
+from api.person.models.Person import Person
+from api.truck.models.Truck import Truck
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the truck fuel efficiency report on a synthetic company: a Python loop over "
+        "get_by_truck against the grouped aggregate queries of ServicesCostFuel.get_fuel_efficiency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=500_000, help="Synthetic fuel entries to create")
+        parser.add_argument('--trucks', type=int, default=50, help="Synthetic trucks")
+        parser.add_argument('--orders', type=int, default=20_000, help="Synthetic orders the entries belong to")
+        parser.add_argument('--batch-size', type=int, default=5_000, help="Rows per bulk insert")
+        parser.add_argument('--runs', type=int, default=3, help="Runs per strategy")
+        parser.add_argument('--skip-loop', action='store_true', help="Do not time the per-truck Python loop")
+        parser.add_argument('--company', type=int, default=None,
+                            help="Benchmark an existing company instead of creating synthetic data")
+        parser.add_argument('--keep', action='store_true', help="Keep the synthetic company and its data")
+
+    def handle(self, *args, **options):
+        if options['company']:
+            company = Company.objects.get(pk=options['company'])
+            created = False
+        else:
+            company = self._create_dataset(
+                options['entries'], options['trucks'], options['orders'], options['batch_size']
+            )
+            created = True
+
+        try:
+            self.stdout.write(f"{connection.vendor}: company {company.pk}, "
+                              f"{CostFuel.objects.filter(order__id_company=company).count()} fuel entries")
+            repository = RepositoryCostFuel()
+            service = ServicesCostFuel()
+
+            def database_report():
+                cost_fuels = repository.get_by_company(company.pk)
+                return (
+                    repository.get_efficiency_totals(cost_fuels),
+                    repository.get_efficiency_by_truck(cost_fuels),
+                    repository.get_efficiency_by_week(cost_fuels),
+                )
+
+            strategies = [('database', database_report)]
+            if not options['skip_loop']:
+                strategies.insert(0, ('python loop', lambda: self._python_report(company)))
+            for name, run in strategies:
+                self._time(name, run, options['runs'])
+
+            # First call fills the cache, the next ones are served from it
+            service.get_fuel_efficiency(company.pk)
+            self._time('cached', lambda: service.get_fuel_efficiency(company.pk), options['runs'])
+        finally:
+            if created and not options['keep']:
+                self._delete_dataset(company, options['batch_size'])
+
+    def _time(self, name, run, runs):
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - started)
+        self.stdout.write(f"  {name:<12} {statistics.median(times) * 1000:10.1f} ms median "
+                          f"({min(times) * 1000:.1f}-{max(times) * 1000:.1f})")
+
+    def _python_report(self, company):
+        """What clients did before: every record of every truck, totalled in Python."""
+        repository = RepositoryCostFuel()
+        trucks, weeks = {}, {}
+        for truck in Truck.objects.filter(id_company=company):
+            for cost_fuel in repository.get_by_truck(truck.id_truck).select_related('order'):
+                for bucket in (
+                    trucks.setdefault(truck.id_truck, [0, 0.0, 0.0, 0.0]),
+                    weeks.setdefault(cost_fuel.order.date.isocalendar()[:2], [0, 0.0, 0.0, 0.0]),
+                ):
+                    bucket[0] += 1
+                    bucket[1] += cost_fuel.cost_fuel
+                    bucket[2] += cost_fuel.fuel_qty
+                    bucket[3] += cost_fuel.distance
+        return trucks, weeks
+
+    def _create_dataset(self, total_entries, total_trucks, total_orders, batch_size):
+        tag = uuid.uuid4().hex[:8]
+        company = Company.objects.create(
+            license_number=f"BENCH-{tag}", name=f"Fuel benchmark {tag}", address="-", zip_code="00000"
+        )
+        job = Job.objects.create(name=f"Benchmark {tag}", id_company=company)
+        client = Person.objects.create(first_name="Benchmark", last_name="Client", id_company=company)
+        trucks = Truck.objects.bulk_create([
+            Truck(number_truck=f"B{tag}-{number:03d}", type="box", name=f"Truck {number}", id_company=company)
+            for number in range(total_trucks)
+        ])
+        truck_ids = [truck.id_truck for truck in Truck.objects.filter(id_company=company)]
+
+        rng = random.Random(17)
+        started = time.perf_counter()
+        start_date = datetime.date(2023, 1, 1)
+        orders = [
+            Order(date=start_date + datetime.timedelta(days=number % 730), id_company=company, person=client, job=job)
+            for number in range(total_orders)
+        ]
+        # bulk_create skips the Order / CostFuel signals (rollups, caches)
+        for offset in range(0, total_orders, batch_size):
+            Order.objects.bulk_create(orders[offset:offset + batch_size])
+        order_keys = [order.key for order in orders]
+
+        batch = []
+        for number in range(1, total_entries + 1):
+            gallons = rng.uniform(20, 120)
+            price = rng.uniform(3.2, 5.1)
+            batch.append(CostFuel(
+                order_id=rng.choice(order_keys),
+                truck_id=rng.choice(truck_ids),
+                cost_gl=price,
+                fuel_qty=gallons,
+                cost_fuel=gallons * price,
+                distance=gallons * rng.uniform(5, 9),
+            ))
+            if len(batch) >= batch_size:
+                CostFuel.objects.bulk_create(batch)
+                batch = []
+                if number % (batch_size * 20) == 0:
+                    self.stdout.write(f"  {number} fuel entries inserted")
+        if batch:
+            CostFuel.objects.bulk_create(batch)
+        self.stdout.write(f"Inserted {total_entries} fuel entries for {len(trucks)} trucks and {total_orders} orders "
+                          f"in {time.perf_counter() - started:.1f} s")
+        return company
+
+    def _delete_dataset(self, company, batch_size):
+        # Raw deletes: the fuel entries would otherwise be collected and signalled one by one
+        fuel = CostFuel.objects.filter(order__id_company=company)
+        while True:
+            ids = list(fuel.values_list('id_fuel', flat=True)[:batch_size])
+            if not ids:
+                break
+            CostFuel.objects.filter(id_fuel__in=ids)._raw_delete(connection.alias)
+        orders = Order.objects.filter(id_company=company)
+        while True:
+            keys = list(orders.values_list('key', flat=True)[:batch_size])
+            if not keys:
+                break
+            Order.objects.filter(key__in=keys).delete()
+        company.delete()
+        self.stdout.write("Synthetic dataset deleted")
@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import resource
+import statistics
+import tempfile
+import time
+from io import BytesIO
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageOps
+from api.utils.image_processor import ImageProcessor
+from api.utils.s3utils import IMAGE_DERIVATIVE_SIZES
+
+
+def _rss_kb(field):
+    """VmRSS / VmHWM of this process in KB (Linux), None elsewhere."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """Resets VmHWM to the current RSS (Linux >= 4.0). Returns False if unsupported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _legacy_compress(path):
+    # Reference: the previous implementation (full decode, BytesIO + getvalue copies)
+    with open(path, 'rb') as source:
+        image = Image.open(source)
+        image = image.convert('RGB') if image.mode not in ('RGB', 'L') else image
+        image = ImageOps.contain(image, (1200, 1200), method=Image.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', optimize=True, quality=60)
+        len(buffer.getvalue())  # size logged
+        content = buffer.getvalue()  # ContentFile
+        return len(content)
+
+
+def _compress(path):
+    with open(path, 'rb') as source:
+        compressed = ImageProcessor.compress_image(source)
+        size = compressed.size
+        compressed.close()
+        return size
+
+
+def _derivatives(path):
+    with open(path, 'rb') as source:
+        derivatives = ImageProcessor.generate_derivatives(source, sizes=IMAGE_DERIVATIVE_SIZES)
+        size = sum(content.size for content in derivatives.values())
+        for content in derivatives.values():
+            content.close()
+        return size
+
+
+OPERATIONS = {
+    'legacy': _legacy_compress,
+    'compress': _compress,
+    'derivatives': _derivatives,
+}
+
+
+def _measure(operation, path, queue):
+    # Runs in a forked child so each measurement starts from the same memory state
+    baseline = _rss_kb('VmRSS')
+    exact = _reset_peak_rss() and baseline is not None
+    started = time.perf_counter()
+    output_size = OPERATIONS[operation](path)
+    elapsed = time.perf_counter() - started
+    if exact:
+        peak = _rss_kb('VmHWM') - baseline
+    else:
+        # Process-wide high-water mark (includes the parent's memory at fork)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, peak, output_size, exact))
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark of ImageProcessor on 12 MP phone photos: wall time and peak RSS "
+        "of compress_image and generate_derivatives against the previous full-decode path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--input', action='append', default=[],
+                            help="JPEG to benchmark (repeatable). Defaults to a synthetic 4000x3000 photo")
+        parser.add_argument('--runs', type=int, default=5, help="Runs per operation and image")
+        parser.add_argument('--operation', action='append', choices=list(OPERATIONS), default=[],
+                            help="Operations to run (repeatable, default all)")
+
+    def handle(self, *args, **options):
+        paths = options['input']
+        if not paths:
+            paths = [self._synthetic_photo()]
+        operations = options['operation'] or list(OPERATIONS)
+        context = multiprocessing.get_context('fork')
+
+        try:
+            for path in paths:
+                with Image.open(path) as image:
+                    self.stdout.write(f"{path}: {image.size[0]}x{image.size[1]} {image.format}, "
+                                      f"{os.path.getsize(path) / 1024:.0f} KB")
+                for operation in operations:
+                    results = []
+                    for _ in range(options['runs']):
+                        queue = context.Queue()
+                        process = context.Process(target=_measure, args=(operation, path, queue))
+                        process.start()
+                        results.append(queue.get())
+                        process.join()
+
+                    times = [elapsed for elapsed, _, _, _ in results]
+                    peaks = [peak for _, peak, _, _ in results]
+                    _, _, output_size, exact = results[-1]
+                    peak_label = "peak RSS +" if exact else "max RSS "
+                    self.stdout.write(
+                        f"  {operation:<12} {statistics.median(times) * 1000:8.1f} ms median "
+                        f"({min(times) * 1000:.1f}-{max(times) * 1000:.1f})  "
+                        f"{peak_label}{max(peaks) / 1024:.1f} MB  output {output_size / 1024:.0f} KB"
+                    )
+        finally:
+            if not options['input']:
+                os.unlink(paths[0])
+
+    def _synthetic_photo(self):
+        """A 12 MP (4000x3000) JPEG with noisy, photo-like content (several MB at quality 92)."""
+        size = (4000, 3000)
+        gradient = Image.linear_gradient('L').resize(size)
+        image = Image.merge('RGB', (
+            Image.effect_noise(size, 40),
+            gradient,
+            Image.effect_noise(size, 20),
+        ))
+        handle, path = tempfile.mkstemp(suffix='.jpg')
+        with os.fdopen(handle, 'wb') as output:
+            image.save(output, format='JPEG', quality=92)
+        return path
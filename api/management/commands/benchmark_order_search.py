@@ -0,0 +1,130 @@
+import datetime
+import random
+import statistics
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from api.company.models.Company import Company
+from api.job.models.Job import Job
+from api.order.models.Order import Order
+from api.order.repositories.RepositoryOrder import RepositoryOrder
+from api.person.models.Person import Person
+from api.utils.location import parse_location
+
+FIRST_NAMES = ['James', 'María', 'Robert', 'Sofía', 'Michael', 'José', 'Linda', 'David', 'Ángela', 'William',
+               'Elizabeth', 'Carlos', 'Jennifer', 'Thomas', 'Lucía', 'Daniel', 'Patricia', 'Andrés', 'Susan', 'Mark']
+LAST_NAMES = ['Smith', 'García', 'Johnson', 'Martínez', 'Brown', 'Rodríguez', 'Davis', 'López', 'Wilson', 'Hernández',
+              'Anderson', 'González', 'Taylor', 'Pérez', 'Moore', 'Sánchez', 'Jackson', 'Ramírez', 'White', 'Torres']
+LOCATIONS = ['USA, Texas, Austin', 'USA, Texas, Houston', 'USA, California, Los Angeles', 'USA, Florida, Miami',
+             'USA, New York, Brooklyn', 'USA, Illinois, Chicago', 'USA, Arizona, Phoenix', 'USA, Georgia, Atlanta']
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the order listing search (list_all_status ?search=) on a synthetic company: "
+        "the legacy icontains filters joined to Person against search_mode=fast on Order.search_document."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000, help="Synthetic orders to create")
+        parser.add_argument('--clients', type=int, default=5_000, help="Synthetic clients (Person) the orders belong to")
+        parser.add_argument('--batch-size', type=int, default=5_000, help="Rows per bulk insert")
+        parser.add_argument('--runs', type=int, default=5, help="Runs per query and mode")
+        parser.add_argument('--search', action='append', default=[],
+                            help="Search term (repeatable). Defaults to a key_ref, a name, a city and a miss")
+        parser.add_argument('--company', type=int, default=None,
+                            help="Benchmark an existing company instead of creating synthetic data")
+        parser.add_argument('--keep', action='store_true', help="Keep the synthetic company and its orders")
+
+    def handle(self, *args, **options):
+        if options['company']:
+            company = Company.objects.get(pk=options['company'])
+            created = False
+        else:
+            company = self._create_dataset(options['orders'], options['clients'], options['batch_size'])
+            created = True
+
+        try:
+            terms = options['search'] or ['0004217', 'martinez', 'Los Angeles', 'zzqx']
+            repository = RepositoryOrder()
+            self.stdout.write(f"{connection.vendor}: company {company.pk}, "
+                              f"{Order.objects.filter(id_company=company).count()} orders")
+            for term in terms:
+                for mode in (None, 'fast'):
+                    times = []
+                    for _ in range(options['runs']):
+                        started = time.perf_counter()
+                        # What the paginated endpoint runs: COUNT(*) plus the first page
+                        orders = repository.get_all_orders_any_status(company.pk, search_filter=term, search_mode=mode)
+                        count = orders.count()
+                        list(orders[:10])
+                        times.append(time.perf_counter() - started)
+                    self.stdout.write(
+                        f"  {term!r:<16} {mode or 'legacy':<7} {statistics.median(times) * 1000:9.1f} ms median "
+                        f"({min(times) * 1000:.1f}-{max(times) * 1000:.1f})  {count} matches"
+                    )
+        finally:
+            if created and not options['keep']:
+                self._delete_dataset(company, options['batch_size'])
+
+    def _create_dataset(self, total_orders, total_clients, batch_size):
+        tag = uuid.uuid4().hex[:8]
+        company = Company.objects.create(
+            license_number=f"BENCH-{tag}", name=f"Search benchmark {tag}", address="-", zip_code="00000"
+        )
+        job = Job.objects.create(name="Benchmark", id_company=company)
+
+        rng = random.Random(17)
+        # Person overrides pk as a read-only property, so it cannot go through bulk_create
+        with transaction.atomic():
+            clients = []
+            for _ in range(total_clients):
+                person = Person.objects.create(
+                    first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES), id_company=company
+                )
+                clients.append((person.id_person, person.first_name, person.last_name))
+
+        started = time.perf_counter()
+        start_date = datetime.date(2018, 1, 1)
+        batch = []
+        for number in range(1, total_orders + 1):
+            client_id, first_name, last_name = rng.choice(clients)
+            key_ref = f"WH-{number:07d}"
+            location = rng.choice(LOCATIONS)
+            country, state, city = parse_location(location)
+            # bulk_create skips Order.save, so the derived columns are filled here
+            batch.append(Order(
+                key_ref=key_ref,
+                date=start_date + datetime.timedelta(days=number % 2500),
+                status=rng.choice(('pending', 'finished', 'inactive')),
+                state_usa=location,
+                country=country,
+                state=state,
+                city=city,
+                id_company=company,
+                person_id=client_id,
+                job=job,
+                search_document=Order.build_search_document(key_ref, first_name, last_name, location),
+            ))
+            if len(batch) >= batch_size:
+                Order.objects.bulk_create(batch)
+                batch = []
+                if number % (batch_size * 20) == 0:
+                    self.stdout.write(f"  {number} orders inserted")
+        if batch:
+            Order.objects.bulk_create(batch)
+        self.stdout.write(f"Inserted {total_orders} orders for {total_clients} clients "
+                          f"in {time.perf_counter() - started:.1f} s")
+        return company
+
+    def _delete_dataset(self, company, batch_size):
+        # Deleting the company at once would collect a million orders in memory
+        orders = Order.objects.filter(id_company=company)
+        while True:
+            keys = list(orders.values_list('key', flat=True)[:batch_size])
+            if not keys:
+                break
+            Order.objects.filter(key__in=keys).delete()
+        company.delete()
+        self.stdout.write("Synthetic dataset deleted")
@@ -0,0 +1,50 @@
+import gzip
+import json
+from django.core.management.base import BaseCommand, CommandError
+from api.geo.services.ServicesGeo import ServicesGeo
+
+
+def _open(path, mode):
+    return gzip.open(path, mode + 't', encoding='utf-8') if path.endswith('.gz') else open(path, mode, encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads the countries / states / cities served by OrderLocationController into the database, "
+        "from the CountriesNow API or from a JSON (optionally .gz) dump, replacing the previous dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=None,
+                            help="Load this dump instead of calling the API ([{name, iso2, iso3, states: [{name, state_code, cities}]}])")
+        parser.add_argument('--output', default=None,
+                            help="Also write the downloaded dataset to this file (.json or .json.gz), to load it elsewhere with --file")
+        parser.add_argument('--country', action='append', default=[],
+                            help="Only download this country (repeatable)")
+        parser.add_argument('--skip-cities', action='store_true',
+                            help="Do not download cities (one API request per state)")
+
+    def handle(self, *args, **options):
+        if options['file']:
+            try:
+                with _open(options['file'], 'r') as source:
+                    countries = json.load(source)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['file']}: {e}")
+        else:
+            countries = ServicesGeo.fetch_remote_dataset(
+                only_countries=options['country'],
+                with_cities=not options['skip_cities'],
+                log=self.stdout.write,
+            )
+            if not countries:
+                raise CommandError("The API returned no countries; the current dataset was kept")
+            if options['output']:
+                with _open(options['output'], 'w') as output:
+                    json.dump(countries, output, ensure_ascii=False)
+                self.stdout.write(f"Dataset written to {options['output']}")
+
+        total_countries, total_states, total_cities = ServicesGeo().load_dataset(countries)
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {total_countries} countries, {total_states} states and {total_cities} cities"
+        ))
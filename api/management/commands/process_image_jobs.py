@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from api.imageJob.services.ServicesImageJob import ServicesImageJob
+
+class Command(BaseCommand):
+    help = "Compresses the uploaded images queued in ImageJob. Use --loop to run as a standalone worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Jobs processed per batch")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new jobs")
+        parser.add_argument('--sleep', type=float, default=5.0, help="Seconds between polls when idle (with --loop)")
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help="Seconds after which a job stuck in processing is queued again")
+
+    def handle(self, *args, **options):
+        service = ServicesImageJob()
+        while True:
+            requeued = service.requeue_stale(options['stale_after'])
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale image jobs")
+
+            processed = service.run_pending(limit=options['batch_size'])
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} image jobs"))
+
+            if not options['loop']:
+                break
+            if not processed:
+                time.sleep(options['sleep'])
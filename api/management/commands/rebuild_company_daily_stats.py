@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from api.order.repositories.RepositoryCompanyDailyStats import RepositoryCompanyDailyStats
+
+class Command(BaseCommand):
+    help = "Recomputes the per-company daily order totals (CompanyDailyStats) from Order, CostFuel and WorkCost."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, default=None, help="Only rebuild the days of this company id")
+        parser.add_argument('--batch-size', type=int, default=366, help="Days recomputed per batch")
+
+    def handle(self, *args, **options):
+        total = RepositoryCompanyDailyStats().rebuild(
+            company_id=options['company'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} company daily stats"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from api.order.repositories.RepositoryOrderCostRollup import RepositoryOrderCostRollup
+
+class Command(BaseCommand):
+    help = "Recomputes the per-order cost rollup table (OrderCostRollup) from CostFuel, WorkCost and Assign."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, default=None, help="Only rebuild the orders of this company id")
+        parser.add_argument('--batch-size', type=int, default=500, help="Orders recomputed per batch")
+        parser.add_argument('--missing', action='store_true',
+                            help="Only backfill the orders that have no rollup yet")
+
+    def handle(self, *args, **options):
+        total = RepositoryOrderCostRollup().rebuild(
+            company_id=options['company'],
+            batch_size=options['batch_size'],
+            missing_only=options['missing'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} order cost rollups"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from api.order.repositories.RepositoryOrder import RepositoryOrder
+
+class Command(BaseCommand):
+    help = "Recomputes Order.search_document (fast search mode of the order listings) from key_ref, client and location."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, default=None, help="Only rebuild the orders of this company id")
+        parser.add_argument('--batch-size', type=int, default=500, help="Orders written per batch")
+
+    def handle(self, *args, **options):
+        total = RepositoryOrder.rebuild_search_documents(
+            company_id=options['company'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated {total} order search documents"))
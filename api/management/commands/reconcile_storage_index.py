@@ -0,0 +1,35 @@
+import time
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from api.utils.storage_index import reconcile_field
+
+class Command(BaseCommand):
+    help = ("Refreshes the storage existence index (api.utils.storage_index) by listing the storage "
+            "directories of the given file fields in bulk. Use --loop to run as a background reconciler.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--field', action='append', dest='fields', default=None,
+                            help="model.field to reconcile, e.g. user.photo (repeatable, default: user.photo)")
+        parser.add_argument('--clear-missing', action='store_true',
+                            help="Set references to files that no longer exist to NULL")
+        parser.add_argument('--loop', action='store_true', help="Keep reconciling periodically")
+        parser.add_argument('--interval', type=float, default=3600.0, help="Seconds between runs (with --loop)")
+
+    def handle(self, *args, **options):
+        targets = []
+        for spec in options['fields'] or ['user.photo']:
+            try:
+                model_name, field_name = spec.split('.')
+                targets.append((apps.get_model('api', model_name), field_name))
+            except (ValueError, LookupError):
+                raise CommandError(f"Invalid field '{spec}', expected model.field (e.g. user.photo)")
+
+        while True:
+            for model, field_name in targets:
+                present, missing = reconcile_field(model, field_name, clear_missing=options['clear_missing'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"{model._meta.model_name}.{field_name}: {present} present, {missing} missing"
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from api.emailOutbox.services.ServicesEmailOutbox import ServicesEmailOutbox
+
+class Command(BaseCommand):
+    help = "Sends the emails queued in EmailOutbox. Use --loop to run as a standalone worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help="Emails sent per batch (one connection each)")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for due emails")
+        parser.add_argument('--sleep', type=float, default=5.0, help="Seconds between polls when idle (with --loop)")
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help="Seconds after which an email stuck in sending is queued again")
+        parser.add_argument('--requeue-dead', action='store_true',
+                            help="Give the dead-lettered emails a new set of attempts before sending")
+
+    def handle(self, *args, **options):
+        service = ServicesEmailOutbox()
+        if options['requeue_dead']:
+            self.stdout.write(f"Requeued {service.requeue_dead()} dead emails")
+
+        while True:
+            requeued = service.requeue_stale(options['stale_after'])
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale emails")
+
+            sent, failed = service.send_due(limit=options['batch_size'])
+            if sent:
+                self.stdout.write(self.style.SUCCESS(f"Sent {sent} emails"))
+            if failed:
+                self.stdout.write(self.style.WARNING(f"{failed} emails failed and will be retried or dead-lettered"))
+
+            if not options['loop']:
+                break
+            if not sent:
+                time.sleep(options['sleep'])
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCostRollup',
+            fields=[
+                ('order', models.OneToOneField(db_column='id_order', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cost_rollup', serialize=False, to='api.order')),
+                ('expense', models.FloatField(default=0)),
+                ('fuel_cost', models.FloatField(default=0)),
+                ('work_cost', models.FloatField(default=0)),
+                ('driver_salaries', models.FloatField(default=0)),
+                ('other_salaries', models.FloatField(default=0)),
+                ('total_cost', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'api_order_cost_rollup',
+            },
+        ),
+    ]
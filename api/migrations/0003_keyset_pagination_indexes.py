@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_order_cost_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assign',
+            index=models.Index(fields=['assigned_at', 'id'], name='assign_assigned_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['id_company', 'date', 'key'], name='order_company_date_key_idx'),
+        ),
+    ]
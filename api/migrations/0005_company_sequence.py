@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_image_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanySequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+                ('id_company', models.ForeignKey(db_column='id_company', on_delete=django.db.models.deletion.CASCADE, related_name='sequences', to='api.company')),
+            ],
+            options={
+                'db_table': 'api_company_sequence',
+                'constraints': [models.UniqueConstraint(fields=('id_company', 'name'), name='company_sequence_unique')],
+            },
+        ),
+    ]
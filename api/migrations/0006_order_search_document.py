@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+from api.utils.search import normalize_search_text
+
+
+def backfill_search_document(apps, schema_editor, batch_size=500):
+    # Same document as Order.build_search_document, written in batches
+    Order = apps.get_model('api', 'Order')
+    rows = Order.objects.order_by('key').values_list(
+        'key', 'key_ref', 'state_usa', 'person__first_name', 'person__last_name'
+    )
+    batch = []
+    for key, key_ref, state_usa, first_name, last_name in rows.iterator(chunk_size=batch_size):
+        document = normalize_search_text(key_ref, first_name, last_name, state_usa)[:512]
+        if document:
+            batch.append(Order(key=key, search_document=document))
+        if len(batch) >= batch_size:
+            Order.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Order.objects.bulk_update(batch, ['search_document'])
+
+
+def add_fulltext_index(apps, schema_editor):
+    # FULLTEXT with the ngram parser (substring matches, also for CJK) only exists on MySQL
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            "ALTER TABLE api_order ADD FULLTEXT INDEX order_search_ft (search_document) WITH PARSER ngram"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("ALTER TABLE api_order DROP INDEX order_search_ft")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_company_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='search_document',
+            field=models.CharField(blank=True, default='', editable=False, max_length=512),
+        ),
+        # `manage.py rebuild_order_search` recomputes the documents later on if needed
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
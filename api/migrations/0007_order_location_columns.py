@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+from api.utils.location import parse_location
+
+
+def backfill_location_columns(apps, schema_editor):
+    # One UPDATE per distinct location string instead of one per order
+    Order = apps.get_model('api', 'Order')
+    locations = list(
+        Order.objects.exclude(state_usa__isnull=True).exclude(state_usa='')
+        .values_list('state_usa', flat=True).distinct()
+    )
+    for location in locations:
+        country, state, city = parse_location(location)
+        Order.objects.filter(state_usa=location).update(country=country, state=state, city=city)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_order_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='city',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='country',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='state',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.RunPython(backfill_location_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['id_company', 'country', 'state', 'city'], name='order_company_location_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_order_location_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeoCountry',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('iso2', models.CharField(blank=True, default='', max_length=2)),
+                ('iso3', models.CharField(blank=True, default='', max_length=3)),
+                ('loaded_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'api_geo_country',
+            },
+        ),
+        migrations.CreateModel(
+            name='GeoState',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('state_code', models.CharField(blank=True, default='', max_length=20)),
+                ('country', models.ForeignKey(db_column='id_country', on_delete=django.db.models.deletion.CASCADE, related_name='states', to='api.geocountry')),
+            ],
+            options={
+                'db_table': 'api_geo_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='GeoCity',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('state', models.ForeignKey(db_column='id_state', on_delete=django.db.models.deletion.CASCADE, related_name='cities', to='api.geostate')),
+            ],
+            options={
+                'db_table': 'api_geo_city',
+            },
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_daily_stats(apps, schema_editor):
+    # Same totals as RepositoryCompanyDailyStats.refresh, for every company at once
+    Order = apps.get_model('api', 'Order')
+    CostFuel = apps.get_model('api', 'CostFuel')
+    WorkCost = apps.get_model('api', 'WorkCost')
+    CompanyDailyStats = apps.get_model('api', 'CompanyDailyStats')
+
+    stats = {}
+    rows = (
+        Order.objects.exclude(date__isnull=True)
+        .values('id_company_id', 'date', 'status')
+        .annotate(count=Count('key'), income=Sum('income'), expense=Sum('expense'))
+        .order_by()
+    )
+    for row in rows.iterator():
+        key = (row['id_company_id'], row['date'])
+        day = stats.setdefault(key, CompanyDailyStats(
+            id_company_id=key[0], day=key[1], status_counts={}, order_count=0,
+            income=0, expense=0, fuel_cost=0, work_cost=0,
+        ))
+        status = (row['status'] or 'unknown').lower()
+        day.status_counts[status] = day.status_counts.get(status, 0) + row['count']
+        day.order_count += row['count']
+        day.income += float(row['income'] or 0)
+        day.expense += float(row['expense'] or 0)
+
+    fuel = (
+        CostFuel.objects.exclude(order__date__isnull=True)
+        .values('order__id_company_id', 'order__date').annotate(total=Sum('cost_fuel')).order_by()
+    )
+    for row in fuel.iterator():
+        day = stats.get((row['order__id_company_id'], row['order__date']))
+        if day:
+            day.fuel_cost = float(row['total'] or 0)
+
+    work = (
+        WorkCost.objects.exclude(id_order__date__isnull=True)
+        .values('id_order__id_company_id', 'id_order__date').annotate(total=Sum('cost')).order_by()
+    )
+    for row in work.iterator():
+        day = stats.get((row['id_order__id_company_id'], row['id_order__date']))
+        if day:
+            day.work_cost = float(row['total'] or 0)
+
+    CompanyDailyStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_geo_dataset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyDailyStats',
+            fields=[
+                ('pk', models.CompositePrimaryKey('id_company', 'day', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('status_counts', models.JSONField(default=dict)),
+                ('income', models.FloatField(default=0)),
+                ('expense', models.FloatField(default=0)),
+                ('fuel_cost', models.FloatField(default=0)),
+                ('work_cost', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id_company', models.ForeignKey(db_column='id_company', on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='api.company')),
+            ],
+            options={
+                'db_table': 'api_company_daily_stats',
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyDataVersion',
+            fields=[
+                ('pk', models.CompositePrimaryKey('id_company', 'resource', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('id_company', models.PositiveIntegerField()),
+                ('resource', models.CharField(max_length=30)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'api_company_data_version',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:05
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Creates the table of the DatabaseCache configured in settings.CACHES
+    # (no-op when the shared cache is Redis or the table exists)
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_company_data_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -16,3 +16,10 @@ from api.assign.models.Assign import Assign, AssignAudit
 from api.workCost.models.WorkCost import WorkCost
 from api.costFuel.models.CostFuel import CostFuel
 from api.son.models.Son import Son
+from api.order.models.OrderCostRollup import OrderCostRollup
+from api.order.models.CompanyDailyStats import CompanyDailyStats
+from api.imageJob.models.ImageJob import ImageJob
+from api.sequence.models.CompanySequence import CompanySequence
+from api.geo.models.GeoLocation import GeoCountry, GeoState, GeoCity
+from api.emailOutbox.models.EmailOutbox import EmailOutbox
+from api.dataVersion.models.CompanyDataVersion import CompanyDataVersion
@@ -10,10 +10,12 @@ from api.operator.serializers.SerializerOperator import SerializerOperator
 from api.operator.serializers.SerializerUpdateOperator import SerializerOperatorUpdate
 from api.operator.services.ServiceOperator import ServiceOperator
 from api.person.models.Person import Person
+from api.utils.s3utils import delete_derivatives
 
 
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.exceptions import NotFound
+from api.common.etag import versioned_etag
 
 class CustomPagination(PageNumberPagination):
     page_size = 10
@@ -90,6 +92,7 @@ class ControllerOperator(viewsets.ViewSet):
         description="List operators with pagination.",
         responses={200: SerializerOperator(many=True)},
     )
+    @versioned_etag('operators', 'persons')
     def list(self, request):
         try:
             company_id = request.company_id  # Obtener el company_id del request
@@ -121,6 +124,7 @@ class ControllerOperator(viewsets.ViewSet):
         OpenApiParameter(name='page_size', type=int, location=OpenApiParameter.QUERY, description='Items per page'),
     ]
     )
+    @versioned_etag('operators', 'persons')
     def list_freelance_operators(self, request):
         try:
             company_id = request.company_id
@@ -168,6 +172,7 @@ class ControllerOperator(viewsets.ViewSet):
             OpenApiParameter(name='page_size', type=int, location=OpenApiParameter.QUERY, description='Items per page'),
         ]
     )
+    @versioned_etag('operators', 'persons')
     def list_active_and_freelance_operators(self, request):
         try:
             company_id = request.company_id
@@ -373,10 +378,13 @@ class ControllerOperator(viewsets.ViewSet):
         
         # Delete existing files only if they're being replaced
         if 'photo' in files and operator.photo:
+            delete_derivatives(operator.photo)
             operator.photo.delete(save=False)
         if 'license_front' in files and operator.license_front:
+            delete_derivatives(operator.license_front)
             operator.license_front.delete(save=False)
         if 'license_back' in files and operator.license_back:
+            delete_derivatives(operator.license_back)
             operator.license_back.delete(save=False)
 
         # Only include the files that were actually uploaded
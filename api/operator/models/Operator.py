@@ -1,8 +1,12 @@
 from django.db import models
 from django.db.models.query import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from api.person.models import Person
 from api.utils.s3utils import upload_operator_photo, upload_operator_license_front, upload_operator_license_back
-from api.utils.image_processor import ImageProcessor
+from api.imageJob.services.ServicesImageJob import ServicesImageJob
+from api.user.identity_cache import invalidate_identity
+from api.utils.file_tracking import FileFieldTrackerMixin
 import logging
 from storages.backends.s3boto3 import S3Boto3Storage
 
@@ -22,7 +26,7 @@ class OperatorManager(models.Manager):
         """Retorna solo operadores activos."""
         return self.get_queryset().active()
 
-class Operator(models.Model):
+class Operator(FileFieldTrackerMixin, models.Model):
     STATUS_CHOICES = (
         ('active', 'Active'),
         ('inactive', 'Inactive'),
@@ -89,53 +93,35 @@ class Operator(models.Model):
         self.status = 'inactive'
         self.save()
 
+    # generate_derivatives options of each image field, applied by the background image worker
+    IMAGE_COMPRESSION = {
+        'photo': {},
+        'license_front': {},
+        'license_back': {},
+    }
+
+    TRACKED_FILE_FIELDS = tuple(IMAGE_COMPRESSION)
+
+    def _changed_image_fields(self, update_fields=None):
+        """Image fields being saved that received a new file since the operator was loaded."""
+        return [name for name in self.changed_file_fields(update_fields) if getattr(self, name)]
+
     def save(self, *args, **kwargs):
-        # Track if each field has been modified to only compress changed images
-        is_new = self._state.adding
-        
-        # Configure image processor with appropriate prefixes for better organization
-        processor = ImageProcessor()
-        
-        if is_new:
-            # For new instances, compress all provided images
-            if self.photo:
-                logger.debug(f"Compressing new operator photo")
-                self.photo = processor.compress_image(self.photo, prefix="operator_photo")
-            if self.license_front:
-                logger.debug(f"Compressing new operator license front")
-                self.license_front = processor.compress_image(self.license_front, prefix="license_front")
-            if self.license_back:
-                logger.debug(f"Compressing new operator license back")
-                self.license_back = processor.compress_image(self.license_back, prefix="license_back")
-        else:
-            # For updates, only compress images that are being updated
-            try:
-                old_instance = Operator.all_objects.get(pk=self.pk)
-                
-                # Check if photo has changed - compare by name to avoid path access
-                if self.photo and (not old_instance.photo or self.photo.name != old_instance.photo.name):
-                    logger.debug(f"Compressing updated operator photo")
-                    self.photo = processor.compress_image(self.photo, prefix="operator_photo")
-                    
-                # Check if license_front has changed
-                if self.license_front and (not old_instance.license_front or self.license_front.name != old_instance.license_front.name):
-                    logger.debug(f"Compressing updated operator license front")
-                    self.license_front = processor.compress_image(self.license_front, prefix="license_front")
-                    
-                # Check if license_back has changed
-                if self.license_back and (not old_instance.license_back or self.license_back.name != old_instance.license_back.name):
-                    logger.debug(f"Compressing updated operator license back")
-                    self.license_back = processor.compress_image(self.license_back, prefix="license_back")
-                    
-            except Operator.DoesNotExist:
-                # Fallback if old instance can't be found
-                logger.warning(f"Could not find existing Operator with ID {self.pk} for comparison")
-                if self.photo:
-                    self.photo = processor.compress_image(self.photo, prefix="operator_photo")
-                if self.license_front:
-                    self.license_front = processor.compress_image(self.license_front, prefix="license_front")
-                if self.license_back:
-                    self.license_back = processor.compress_image(self.license_back, prefix="license_back")
+        # Uploads are stored as-is; compression runs in the background image worker
+        changed = self._changed_image_fields(kwargs.get('update_fields'))
 
         super().save(*args, **kwargs)
-    
\ No newline at end of file
+
+        if changed:
+            logger.debug(f"Scheduling compression of operator {self.pk} images: {changed}")
+            ServicesImageJob().schedule(self, {name: self.IMAGE_COMPRESSION[name] for name in changed})
+
+
+@receiver(post_save, sender=Operator)
+@receiver(post_delete, sender=Operator)
+def operator_invalidate_identity(sender, instance, **kwargs):
+    """Drops the cached authentication entity of the operator's person"""
+    company_id = (
+        Person.all_objects.filter(pk=instance.person_id).values_list('id_company_id', flat=True).first()
+    )
+    invalidate_identity(instance.person_id, company_id)
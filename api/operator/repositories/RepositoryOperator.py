@@ -1,6 +1,7 @@
 from typing import List
 from api.assign.models.Assign import Assign
 from api.operator.models.Operator import Operator
+from api.dataVersion.models.CompanyDataVersion import bump_data_version
 from api.operator.repositories.IRepositoryOperator import IRepositoryOperator
 
 class RepositoryOperator(IRepositoryOperator):
@@ -61,11 +62,20 @@ class RepositoryOperator(IRepositoryOperator):
 
     def update_name_t_shift(self, operator_id: int, new_name_t_shift: str):
         # Actualizar solo operadores activos
-        Operator.objects.active().filter(id_operator=operator_id).update(name_t_shift=new_name_t_shift)
+        if Operator.objects.active().filter(id_operator=operator_id).update(name_t_shift=new_name_t_shift):
+            self._bump_data_version(operator_id)
 
     def update_size_t_shift(self, operator_id: int, new_size_t_shift: str):
         # Actualizar solo operadores activos
-        Operator.objects.active().filter(id_operator=operator_id).update(size_t_shift=new_size_t_shift)
+        if Operator.objects.active().filter(id_operator=operator_id).update(size_t_shift=new_size_t_shift):
+            self._bump_data_version(operator_id)
+
+    def _bump_data_version(self, operator_id: int):
+        # update() no envía post_save: versión de los listados de operadores (ETag)
+        company_id = (
+            Operator.objects.filter(id_operator=operator_id).values_list('person__id_company_id', flat=True).first()
+        )
+        bump_data_version(company_id, 'operators')
     
     def soft_delete(self, operator_id: int):
         # Realizar soft delete cambiando status a 'inactive'
@@ -74,4 +84,21 @@ class RepositoryOperator(IRepositoryOperator):
             operator.soft_delete()
             return True
         except Operator.DoesNotExist:
-            return False
\ No newline at end of file
+            return False
+
+    def get_last_freelance_number(self, company_id: int) -> int:
+        """
+        Highest number already used in the FRL-XXXX codes of a company (0 if none).
+        Only used to start the company's 'freelance' sequence.
+        """
+        last_number = 0
+        codes = Operator.all_objects.filter(
+            person__id_company=company_id,
+            code__startswith='FRL-'
+        ).values_list('code', flat=True)
+        for code in codes.iterator():
+            try:
+                last_number = max(last_number, int(code.split('-')[1]))
+            except (IndexError, ValueError):
+                continue
+        return last_number
@@ -6,6 +6,7 @@ from api.son.models.Son import Son
 from django.db import transaction
 from django.db import models
 from api.company.models.Company import Company
+from api.utils.s3utils import image_url_map
 
 class SonSerializer(serializers.ModelSerializer):
     class Meta:
@@ -72,6 +73,10 @@ class SerializerOperator(serializers.ModelSerializer):
         allow_null=True,  # Add this to handle null values
         help_text="List of children of the operator"
     )
+    # Size-keyed URLs ({"64": ..., "256": ..., "1200": ...}) for list thumbnails
+    photo_urls         = serializers.SerializerMethodField()
+    license_front_urls = serializers.SerializerMethodField()
+    license_back_urls  = serializers.SerializerMethodField()
 
     class Meta:
         model = Operator
@@ -80,6 +85,7 @@ class SerializerOperator(serializers.ModelSerializer):
             'number_licence', 'code', 'n_children', 'size_t_shift',
             'name_t_shift', 'salary',
             'photo', 'license_front', 'license_back', 
+            'photo_urls', 'license_front_urls', 'license_back_urls',
             'status',
             # Person fields
             'first_name', 'last_name', 'birth_date', 'type_id',
@@ -90,6 +96,15 @@ class SerializerOperator(serializers.ModelSerializer):
         ]
         read_only_fields = ['id_company']
 
+    def get_photo_urls(self, obj):
+        return image_url_map(obj.photo, self.context.get('request'))
+
+    def get_license_front_urls(self, obj):
+        return image_url_map(obj.license_front, self.context.get('request'))
+
+    def get_license_back_urls(self, obj):
+        return image_url_map(obj.license_back, self.context.get('request'))
+
     def create(self, validated_data):
         request = self.context.get('request')
         if not request or not hasattr(request, 'company_id'):
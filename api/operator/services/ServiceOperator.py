@@ -6,6 +6,7 @@ from api.operator.services.IServicesOperator import IServiceOperator
 from api.order.models.Order import Order
 from api.truck.models.Truck import Truck  
 from api.person.models import Person
+from api.sequence.services.ServicesSequence import ServicesSequence
 
 class ServiceOperator(IServiceOperator):
     def __init__(self, repository=None):
@@ -66,24 +67,12 @@ class ServiceOperator(IServiceOperator):
     def generate_freelance_code(self, company_id: int) -> str:
         """
         Genera un código único para un freelancer en el formato FRL-0001, FRL-0002, etc.
+        Usa un contador atómico por compañía, seguro ante peticiones concurrentes.
         """
-        # Obtener el último código de freelancer para esta compañía
-        last_freelance = Operator.objects.filter(
-            person__id_company=company_id,
-            code__startswith='FRL-'
-        ).order_by('-code').first()
-        
-        if not last_freelance or not last_freelance.code:
-            return "FRL-0001"
-            
-        try:
-            # Extraer el número del último código y sumar 1
-            last_number = int(last_freelance.code.split('-')[1])
-            next_number = last_number + 1
-            return f"FRL-{next_number:04d}"
-        except (IndexError, ValueError):
-            # En caso de error en el formato, empezar desde 1
-            return "FRL-0001"
+        return ServicesSequence().next_code(
+            company_id, 'freelance', 'FRL-',
+            initial=lambda: self.repository.get_last_freelance_number(company_id)
+        )
             
     def create_freelance_operator(self, validated_data, person_data, company_id):
         """
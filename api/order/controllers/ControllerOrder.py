@@ -1,5 +1,9 @@
+import calendar
 import traceback
 import logging
+import csv
+import itertools
+import json
 
 from rest_framework import status, viewsets
 from rest_framework.response import Response
@@ -14,25 +18,36 @@ from api.order.models.Order import Order
 from api.job.models.Job import Job
 from api.order.serializers.StatesSerializer import StatesUSASerializer
 from api.order.models.Order import StatesUSA
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 from rest_framework.decorators import action, parser_classes
 from api.truck.models.Truck import Truck
 from api.workCost.services.ServicesWorkCost import ServicesWorkCost
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.exceptions import ValidationError, PermissionDenied
+from rest_framework.exceptions import ValidationError, PermissionDenied, NotFound
 from rest_framework.parsers import MultiPartParser, FormParser
 from api.order.serializers.SerializerOrderEvidence import SerializerOrderEvidence
 from django.shortcuts import get_object_or_404
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import permission_classes, authentication_classes
-from api.utils.s3utils import upload_evidence_file
-from api.utils.image_processor import ImageProcessor
-from datetime import datetime, timedelta
+from api.common.pagination import KeysetPagination, ORDER_KEYSET, is_keyset_requested
+from api.utils.s3utils import delete_derivatives
+from datetime import datetime, timedelta, MINYEAR, MAXYEAR
+from api.common.etag import versioned_etag
 
 # Configuración de logging
 logger = logging.getLogger(__name__)
 
+# Data the order listings are built from (api.common.etag): orders, client names, job and factory names
+ORDER_LIST_RESOURCES = ('orders', 'persons', 'jobs', 'customer_factories')
+
+
+class _EchoBuffer:
+    """File-like object for csv.writer that returns each line instead of buffering it"""
+    def write(self, value):
+        return value
+
 class ControllerOrder(viewsets.ViewSet):
     lookup_field = 'key'
     parser_classes = (JSONParser, MultiPartParser, FormParser)
@@ -53,6 +68,16 @@ class ControllerOrder(viewsets.ViewSet):
         self.order_service = ServicesOrder()  
         self.workcost_service = ServicesWorkCost()
 
+    def get_paginator(self, request):
+        """
+        Page-number pagination by default. With ?pagination=cursor the listing
+        switches to keyset pagination on (date, key), which avoids OFFSET scans
+        and the COUNT(*) on deep pages.
+        """
+        if is_keyset_requested(request):
+            return KeysetPagination(ORDER_KEYSET)
+        return PageNumberPagination()
+
     def handle_error(self, exc):
         """Manejador centralizado de errores"""
         if isinstance(exc, ValidationError):
@@ -110,6 +135,7 @@ class ControllerOrder(viewsets.ViewSet):
     description="Returns a list of all orders.",
     responses={200: OrderSerializer(many=True)}
     )
+    @versioned_etag(*ORDER_LIST_RESOURCES)
     def list_all_status(self, request):
         try:
             company_id = request.company_id
@@ -119,6 +145,8 @@ class ControllerOrder(viewsets.ViewSet):
             status_filter = request.GET.get('status', None)
             search_filter = request.GET.get('search', None)
             location_filter = request.GET.get('location', None)  # Nuevo filtro de ubicación
+            # search_mode=fast busca en Order.search_document (key_ref, cliente y ubicación) con índice
+            search_mode = request.GET.get('search_mode', None)
             
             # print(f"fecha recibida: {date_filter}")
             # print(f"ubicacion recibida: {location_filter}")
@@ -129,10 +157,11 @@ class ControllerOrder(viewsets.ViewSet):
                 date_filter=date_filter,
                 status_filter=status_filter,
                 search_filter=search_filter,
-                location_filter=location_filter  # Pasar el nuevo filtro
+                location_filter=location_filter,  # Pasar el nuevo filtro
+                search_mode=search_mode
             )
 
-            paginator = PageNumberPagination()
+            paginator = self.get_paginator(request)
             paginated = paginator.paginate_queryset(orders, request)
             serialized = OrderSerializer(paginated, many=True, context={'request': request})
 
@@ -144,6 +173,15 @@ class ControllerOrder(viewsets.ViewSet):
                 "data": paginator.get_paginated_response(serialized.data).data
             }, status=status.HTTP_200_OK)
 
+        except NotFound as e:
+            # Page or cursor out of range / tampered
+            return Response({
+                "status": "error",
+                "messDev": str(e),
+                "messUser": "The requested page does not exist",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as e:
             return Response({
                 "status": "error",
@@ -157,12 +195,13 @@ class ControllerOrder(viewsets.ViewSet):
         description="Returns a list of all orders.",
         responses={200: OrderSerializer(many=True)}
     )
+    @versioned_etag(*ORDER_LIST_RESOURCES)
     def list_all(self, request):
         try:
             company_id = request.company_id
             orders = self.order_service.get_all_pending_orders(company_id)
 
-            paginator = PageNumberPagination()
+            paginator = self.get_paginator(request)
             paginated = paginator.paginate_queryset(orders, request)
             serialized = OrderSerializer(paginated, many=True, context={'request': request})
 
@@ -174,6 +213,15 @@ class ControllerOrder(viewsets.ViewSet):
                 "data": paginator.get_paginated_response(serialized.data).data
             }, status=status.HTTP_200_OK)
 
+        except NotFound as e:
+            # Page or cursor out of range / tampered
+            return Response({
+                "status": "error",
+                "messDev": str(e),
+                "messUser": "The requested page does not exist",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as e:
             return Response({
                 "status": "error",
@@ -201,23 +249,27 @@ class ControllerOrder(viewsets.ViewSet):
             orders = self.order_service.get_all_pending_orders(company_id)
 
             # Paginate the queryset
-            paginator = PageNumberPagination()
+            paginator = self.get_paginator(request)
             paginated_orders = paginator.paginate_queryset(orders, request)
+            order_keys = [order.key for order in paginated_orders]
+            summaries = self.order_service.calculate_summaries(order_keys)
+
+            # Operators of the whole page in one query, grouped by order
+            assignments_by_order = {}
+            for assignment in Assign.objects.filter(order_id__in=order_keys).select_related('operator__person'):
+                assignments_by_order.setdefault(assignment.order_id, []).append(assignment)
+
+            # Serialize the page at once with a single serializer context
+            serialized_orders = OrderSerializer(paginated_orders, many=True, context={'request': request}).data
             
             result = []
             
-            for order in paginated_orders:
+            for order, order_data in zip(paginated_orders, serialized_orders):
                 # Get operators assigned to this order
-                assigned_operators = Assign.objects.filter(order__key=order.key).select_related(
-                    'operator', 
-                    'operator__person'
-                )
+                assigned_operators = assignments_by_order.get(order.key, [])
                 
-                # Serialize order data
-                order_data = OrderSerializer(order, context={'request': request}).data
-                
-                # Calculate the summary for this order using the existing service method
-                summary_data = self.order_service.calculate_summary(order.key)
+                # Summary for this order, computed in batch for the whole page
+                summary_data = summaries.get(order.key)
                 
                 # Serialize assigned operators
                 operators_data = []
@@ -245,6 +297,15 @@ class ControllerOrder(viewsets.ViewSet):
             
             return paginator.get_paginated_response(result)
             
+        except NotFound as e:
+            # Page or cursor out of range / tampered
+            return Response({
+                "status": "error",
+                "messDev": str(e),
+                "messUser": "The requested page does not exist",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as e:
             return Response({
                 "status": "error",
@@ -265,15 +326,18 @@ class ControllerOrder(viewsets.ViewSet):
             orders = self.order_service.get_all_orders_report(company_id)
 
             # Paginación
-            paginator = PageNumberPagination()
+            paginator = self.get_paginator(request)
             paginated_orders = paginator.paginate_queryset(orders, request)
 
             # Serialización
             serialized_orders = OrderSerializer(paginated_orders, many=True, context={'request': request})
             orders_data = serialized_orders.data
 
-            # Instanciar servicio de CostFuel
-            cost_fuel_service = ServicesCostFuel()
+            # Fuel entries of the whole page in one query, grouped by order
+            fuel_by_order = {}
+            fuel_entries_page = ServicesCostFuel().get_by_orders([order.key for order in paginated_orders])
+            for fe in fuel_entries_page:
+                fuel_by_order.setdefault(str(fe.order_id), []).append(fe)
 
             for order_data in orders_data:
                 # Eliminar campos innecesarios
@@ -282,7 +346,7 @@ class ControllerOrder(viewsets.ViewSet):
 
                 # Buscar fuel entries de la orden
                 key = order_data.get('key')
-                fuel_entries = cost_fuel_service.get_by_order(key)
+                fuel_entries = fuel_by_order.get(str(key), [])
 
                 # Formatear la lista de costos de combustible
                 fuel_list = []
@@ -316,6 +380,15 @@ class ControllerOrder(viewsets.ViewSet):
                 "data": paginator.get_paginated_response(orders_data).data
             }, status=status.HTTP_200_OK)
 
+        except NotFound as e:
+            # Page or cursor out of range / tampered
+            return Response({
+                "status": "error",
+                "messDev": str(e),
+                "messUser": "The requested page does not exist",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as e:
             return Response({
                 "status": "error",
@@ -355,21 +428,11 @@ class ControllerOrder(viewsets.ViewSet):
             
             # Eliminar archivo antiguo
             if order.evidence:
+                delete_derivatives(order.evidence)
                 order.evidence.delete(save=False)
             
-            # Procesar la imagen manualmente
-            processor = ImageProcessor()
-            compressed_image = processor.compress_image(
-                evidence_file, 
-                quality=75,
-                prefix="evidence"
-            )
-            
-            # Generar la ruta usando tu función
-            file_path = upload_evidence_file(order, evidence_file.name)
-            
-            # Asignar el archivo procesado con la ruta correcta
-            order.evidence.save(file_path, compressed_image, save=False)
+            # Se guarda tal cual; Order.save() encola la compresión en segundo plano
+            order.evidence = evidence_file
         
         # Actualizar estado
         order.status = status_param
@@ -506,8 +569,11 @@ class ControllerOrder(viewsets.ViewSet):
             orders = self.order_service.get_all_orders_report(company_id)
             
             # Paginate the queryset
-            paginator = PageNumberPagination()
+            paginator = self.get_paginator(request)
             paginated_orders = paginator.paginate_queryset(orders, request)
+            summaries = self.order_service.calculate_summaries(
+                [order.key for order in paginated_orders]
+            )
 
             # Prepare the response data
             orders_summary = []
@@ -533,8 +599,8 @@ class ControllerOrder(viewsets.ViewSet):
                     "income": order.income
                 }
 
-                # Calculate the summary for the order using the service
-                order_data["summary"] = self.order_service.calculate_summary(order.key)
+                # Summary for the order, computed in batch for the whole page
+                order_data["summary"] = summaries.get(order.key)
 
                 # Append the order data to the response list
                 orders_summary.append(order_data)
@@ -542,6 +608,15 @@ class ControllerOrder(viewsets.ViewSet):
             # Return the paginated response
             return paginator.get_paginated_response(orders_summary)
 
+        except NotFound as e:
+            # Page or cursor out of range / tampered
+            return Response({
+                "status": "error",
+                "messDev": str(e),
+                "messUser": "The requested page does not exist",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as e:
             return Response({
                 "status": "error",
@@ -657,6 +732,7 @@ class ControllerOrder(viewsets.ViewSet):
         description="List just the orders that are pending.",
         responses={200: OrderSerializer(many=True), 400: {"error": "Unexpected error"}}
     )
+    @versioned_etag(*ORDER_LIST_RESOURCES)
     def list_pending_orders(self, request):
         try:
             company_id = request.company_id
@@ -715,6 +791,7 @@ class ControllerOrder(viewsets.ViewSet):
 
         # Delete old file if exists
         if order.evidence:
+            delete_derivatives(order.evidence)
             order.evidence.delete(save=False)
 
         # Update with new file
@@ -799,6 +876,7 @@ class ControllerOrder(viewsets.ViewSet):
         description="Returns a paginated list of all workhouse orders (identified by job name 'workhouse' or key_ref starting with 'WH-'). Supports filtering by ISO week and year.",
         responses={200: OrderSerializer(many=True)}
     )
+    @versioned_etag(*ORDER_LIST_RESOURCES)
     def list_workhouse_orders(self, request):
         """
         List all workhouse orders, optionally filtered by ISO week and year.
@@ -844,7 +922,7 @@ class ControllerOrder(viewsets.ViewSet):
                 workhouse_orders = workhouse_orders.filter(date__range=(start_date, end_date))
 
             # Paginate the queryset
-            paginator = PageNumberPagination()
+            paginator = self.get_paginator(request)
             paginator.page_size = int(page_size)
             paginated_orders = paginator.paginate_queryset(workhouse_orders, request)
 
@@ -859,6 +937,15 @@ class ControllerOrder(viewsets.ViewSet):
                 "data": paginator.get_paginated_response(serialized_orders.data).data
             }, status=status.HTTP_200_OK)
 
+        except NotFound as e:
+            # Page or cursor out of range / tampered
+            return Response({
+                "status": "error",
+                "messDev": str(e),
+                "messUser": "The requested page does not exist",
+                "data": None
+            }, status=status.HTTP_404_NOT_FOUND)
+
         except Exception as e:
             logger.error(f"Error fetching workhouse orders: {str(e)}")
             return Response({
@@ -873,27 +960,20 @@ class ControllerOrder(viewsets.ViewSet):
     description="Returns a list of unique state_usa locations for the current company.",
     responses={200: "List of unique locations"}
     )
+    @versioned_etag('orders')
     def get_registered_locations(self, request):
         """
-        Get unique registered locations (state_usa) for the current company.
+        Get unique registered locations ("Country, State, City") for the current company.
         
         Returns:
-        - 200 OK: A list of unique state_usa values for the company.
+        - 200 OK: A list of unique locations for the company.
         - 400 Bad Request: If an error occurs.
         """
         try:
             company_id = request.company_id
             
-            # Get unique state_usa values for the company, excluding null/empty values
-            unique_locations = Order.objects.filter(
-                id_company=company_id,
-                state_usa__isnull=False
-            ).exclude(
-                state_usa__exact=''
-            ).values_list('state_usa', flat=True).distinct().order_by('state_usa')
-            
-            # Convert to list and return
-            locations_list = list(unique_locations)
+            # Ubicaciones únicas de la compañía desde las columnas country/state/city
+            locations_list = self.order_service.get_registered_locations(company_id)
             
             return Response({
                 "status": "success",
@@ -955,9 +1035,12 @@ class ControllerOrder(viewsets.ViewSet):
                 orders = orders.filter(date__range=(start_date, end_date))
 
             # Paginate the queryset
-            paginator = PageNumberPagination()
+            paginator = self.get_paginator(request)
             paginator.page_size = int(page_size)
             paginated_orders = paginator.paginate_queryset(orders, request)
+            summaries = self.order_service.calculate_summaries(
+                [order.key for order in paginated_orders]
+            )
 
             # Prepare the response data
             orders_summary = []
@@ -982,8 +1065,8 @@ class ControllerOrder(viewsets.ViewSet):
                     "income": order.income
                 }
 
-                # Calculate the summary for the order using the service
-                order_data["summary"] = self.order_service.calculate_summary(order.key)
+                # Summary for the order, computed in batch for the whole page
+                order_data["summary"] = summaries.get(order.key)
                 orders_summary.append(order_data)
 
             # Return the paginated response
@@ -997,6 +1080,114 @@ class ControllerOrder(viewsets.ViewSet):
                 "data": None
             }, status=status.HTTP_400_BAD_REQUEST)
         
+    EXPORT_COLUMNS = [
+        "key", "key_ref", "date", "client", "state", "status", "payStatus",
+        "customer_name", "customer_factory_id", "income",
+        "expense", "rentingCost", "fuelCost", "workCost", "driverSalaries", "otherSalaries", "totalCost",
+    ]
+    EXPORT_CHUNK_SIZE = 500
+    EXPORT_ERROR_MESSAGE = "Export interrupted: the file is incomplete"
+
+    def export_orders(self, request):
+        """
+        Streams every order of the company with its cost summary as CSV (default)
+        or NDJSON (?file_format=ndjson), in one response and constant memory.
+
+        Query params (same filters as list_all_status): date, status, search,
+        location, search_mode, plus an optional year.
+        """
+        try:
+            company_id = request.company_id
+            file_format = request.query_params.get('file_format', 'csv').lower()
+            if file_format not in ('csv', 'ndjson'):
+                return Response({
+                    "status": "error",
+                    "messDev": f"Invalid file_format '{file_format}'. Use csv or ndjson.",
+                    "messUser": "Invalid export format",
+                    "data": None
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            year = request.query_params.get('year')
+            year = int(year) if year else None
+
+            rows = (
+                self._export_row(order, summary)
+                for order, summary in self.order_service.iter_orders_with_summaries(
+                    company_id=company_id,
+                    date_filter=request.query_params.get('date'),
+                    status_filter=request.query_params.get('status'),
+                    search_filter=request.query_params.get('search'),
+                    location_filter=request.query_params.get('location'),
+                    search_mode=request.query_params.get('search_mode'),
+                    year=year,
+                    chunk_size=self.EXPORT_CHUNK_SIZE
+                )
+            )
+
+            if file_format == 'csv':
+                writer = csv.DictWriter(_EchoBuffer(), fieldnames=self.EXPORT_COLUMNS)
+                content = itertools.chain(
+                    [writer.writeheader()],
+                    (writer.writerow(row) for row in rows)
+                )
+                error_line = writer.writerow({"key": "ERROR", "key_ref": self.EXPORT_ERROR_MESSAGE})
+                content_type = 'text/csv'
+            else:
+                content = (json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows)
+                error_line = json.dumps({"error": self.EXPORT_ERROR_MESSAGE}) + "\n"
+                content_type = 'application/x-ndjson'
+
+            response = StreamingHttpResponse(
+                self._stream_with_error_line(content, error_line, company_id), content_type=content_type
+            )
+            filename = f"orders_{company_id}{'_' + str(year) if year else ''}.{file_format}"
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+
+        except Exception as e:
+            return Response({
+                "status": "error",
+                "messDev": f"Error exporting orders: {str(e)}",
+                "messUser": "Error exporting orders",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+    @staticmethod
+    def _stream_with_error_line(content, error_line, company_id):
+        """
+        The 200 status is already sent when a row fails mid-stream, so the error
+        is logged and the body ends with error_line instead of being silently cut.
+        """
+        try:
+            yield from content
+        except Exception:
+            logger.exception(f"Order export of company {company_id} failed while streaming")
+            yield error_line
+
+    @staticmethod
+    def _export_row(order, summary):
+        summary = summary or {}
+        customer_factory = order.customer_factory
+        return {
+            "key": str(order.key),
+            "key_ref": order.key_ref,
+            "date": order.date.isoformat() if order.date else None,
+            "client": f"{order.person.first_name} {order.person.last_name}",
+            "state": order.state_usa,
+            "status": order.status,
+            "payStatus": order.payStatus,
+            "customer_name": customer_factory.name if customer_factory else None,
+            "customer_factory_id": customer_factory.id_factory if customer_factory else None,
+            "income": float(order.income) if order.income is not None else None,
+            "expense": summary.get("expense"),
+            "rentingCost": summary.get("rentingCost"),
+            "fuelCost": summary.get("fuelCost"),
+            "workCost": summary.get("workCost"),
+            "driverSalaries": summary.get("driverSalaries"),
+            "otherSalaries": summary.get("otherSalaries"),
+            "totalCost": summary.get("totalCost"),
+        }
+
     def payByKey_ref(self, request):
         key_ref = request.data.get('key_ref')
         expense = request.data.get('expense')
@@ -1033,15 +1224,66 @@ class ControllerOrder(viewsets.ViewSet):
         try:
             year = int(year)
             month = int(month)
+            # datetime.date rejects years outside MINYEAR..MAXYEAR
+            if not 1 <= month <= 12 or not MINYEAR <= year <= MAXYEAR:
+                raise ValueError
         except ValueError:
             return Response(
-                {"messUser": "invalid_year_or_month", "messDev": "Year and month must be integers.", "data": None},
+                {"messUser": "invalid_year_or_month",
+                 "messDev": f"Year and month must be integers (year {MINYEAR}-{MAXYEAR}, month 1-12).", "data": None},
                 status=status.HTTP_400_BAD_REQUEST
             )
         counts = self.order_service.count_orders_per_day_in_month(company_id, year, month)
         # Formatea la respuesta para solo mostrar día y count
         data = [{"date": c["day"].strftime("%Y-%m-%d"), "count": c["count"]} for c in counts]
         return Response({"messUser": "orders_count_per_day", "messDev": "Order counts per day retrieved successfully.", "data": data}, status=status.HTTP_200_OK)
+
+    DAILY_STATS_MAX_MONTHS = 24
+
+    def count_orders_per_day_range(self, request):
+        """
+        Daily order totals for a range of whole months, e.g. the calendar's
+        previous, current and next month in one request.
+        Query params: start=YYYY-MM, end=YYYY-MM (inclusive, defaults to start).
+        """
+        company_id = request.company_id
+        try:
+            start = datetime.strptime(request.query_params.get('start', ''), '%Y-%m').date()
+            end = datetime.strptime(request.query_params.get('end') or request.query_params.get('start'), '%Y-%m').date()
+        except (TypeError, ValueError):
+            return Response(
+                {"messUser": "invalid_month_range", "messDev": "start and end must be months as YYYY-MM.", "data": None},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        months = (end.year - start.year) * 12 + end.month - start.month + 1
+        if months < 1 or months > self.DAILY_STATS_MAX_MONTHS:
+            return Response(
+                {"messUser": "invalid_month_range",
+                 "messDev": f"end must be between start and {self.DAILY_STATS_MAX_MONTHS} months after it.", "data": None},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        end = end.replace(day=calendar.monthrange(end.year, end.month)[1])
+
+        try:
+            days = self.order_service.get_daily_stats(company_id, start, end)
+        except ValidationError as e:
+            return Response(
+                {"messUser": "invalid_month_range", "messDev": str(e), "data": None},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        data = [
+            {
+                "date": stats.day.strftime("%Y-%m-%d"),
+                "count": stats.order_count,
+                "status_counts": stats.status_counts,
+                "income": stats.income,
+                "expense": stats.expense,
+                "fuel_cost": stats.fuel_cost,
+                "work_cost": stats.work_cost,
+            }
+            for stats in days
+        ]
+        return Response({"messUser": "orders_count_per_day", "messDev": f"Daily order totals from {start} to {end}.", "data": data}, status=status.HTTP_200_OK)
     
     
     def list_by_location(self, request):
@@ -1,9 +1,8 @@
-import requests
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
-from django.core.cache import cache
+from api.geo.services.ServicesGeo import ServicesGeo
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,10 +11,8 @@ class OrderLocationController(APIView):
     authentication_classes = []  # null 
     permission_classes = [AllowAny]  # no token
     
-    # URLs de la API CountryNow
-    COUNTRIES_URL = "https://countriesnow.space/api/v0.1/countries"
-    STATES_URL = "https://countriesnow.space/api/v0.1/countries/states"
-    CITIES_URL = "https://countriesnow.space/api/v0.1/countries/state/cities"
+    # Países, estados y ciudades servidos desde el índice en memoria de ServicesGeo
+    geo_service = ServicesGeo()
     
     def get(self, request, *args, **kwargs):
         """
@@ -67,150 +64,41 @@ class OrderLocationController(APIView):
                 "data": None
             }, status=500)
     
+    def _not_loaded(self):
+        # The dataset is loaded with `manage.py load_geo_dataset`; requests never call the external API
+        return Response({
+            "status": "error",
+            "messDev": "Geo dataset not loaded. Run `manage.py load_geo_dataset`.",
+            "messUser": "Servicio de ubicaciones no disponible",
+            "data": None
+        }, status=503)
+
     def _get_countries(self):
         """Obtiene la lista de países"""
-        cache_key = "countries_list"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response({
-                "status": "success",
-                "data": cached_data,
-                "message": "Countries retrieved successfully"
-            })
-        
-        try:
-            response = requests.get(self.COUNTRIES_URL, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get('error'):
-                raise Exception(data.get('msg', 'API Error'))
-            
-            countries = [
-                {
-                    'code': country.get('iso2', ''),
-                    'name': country.get('country', ''),
-                    'iso3': country.get('iso3', '')
-                }
-                for country in data.get('data', [])
-            ]
-            
-            # Ordenar por nombre
-            countries.sort(key=lambda x: x['name'])
-            
-            # Cache por 24 horas
-            cache.set(cache_key, countries, 86400)
-            
-            return Response({
-                "status": "success",
-                "data": countries,
-                "message": "Countries retrieved successfully"
-            })
-            
-        except requests.RequestException as e:
-            logger.error(f"Request error getting countries: {str(e)}")
-            return Response({
-                "status": "error",
-                "messDev": f"API request failed: {str(e)}",
-                "messUser": "Error al conectar con el servicio de países",
-                "data": None
-            }, status=503)
+        if not self.geo_service.is_loaded():
+            return self._not_loaded()
+        return Response({
+            "status": "success",
+            "data": self.geo_service.get_countries(),
+            "message": "Countries retrieved successfully"
+        })
     
     def _get_states(self, country):
         """Obtiene los estados de un país específico"""
-        cache_key = f"states_{country.lower()}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response({
-                "status": "success",
-                "data": cached_data,
-                "message": f"States for {country} retrieved successfully"
-            })
-        
-        try:
-            payload = {"country": country}
-            response = requests.post(self.STATES_URL, json=payload, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get('error'):
-                raise Exception(data.get('msg', 'API Error'))
-            
-            states_data = data.get('data', {})
-            states = [
-                {
-                    'name': state.get('name', ''),
-                    'state_code': state.get('state_code', '')
-                }
-                for state in states_data.get('states', [])
-            ]
-            
-            # Ordenar por nombre
-            states.sort(key=lambda x: x['name'])
-            
-            # Cache por 12 horas
-            cache.set(cache_key, states, 43200)
-            
-            return Response({
-                "status": "success",
-                "data": states,
-                "message": f"States for {country} retrieved successfully"
-            })
-            
-        except requests.RequestException as e:
-            logger.error(f"Request error getting states for {country}: {str(e)}")
-            return Response({
-                "status": "error",
-                "messDev": f"API request failed: {str(e)}",
-                "messUser": f"Error al obtener estados de {country}",
-                "data": None
-            }, status=503)
+        if not self.geo_service.is_loaded():
+            return self._not_loaded()
+        return Response({
+            "status": "success",
+            "data": self.geo_service.get_states(country),
+            "message": f"States for {country} retrieved successfully"
+        })
     
     def _get_cities(self, country, state):
         """Obtiene las ciudades de un estado específico"""
-        cache_key = f"cities_{country.lower()}_{state.lower()}"
-        cached_data = cache.get(cache_key)
-        
-        if cached_data:
-            return Response({
-                "status": "success",
-                "data": cached_data,
-                "message": f"Cities for {state}, {country} retrieved successfully"
-            })
-        
-        try:
-            payload = {"country": country, "state": state}
-            response = requests.post(self.CITIES_URL, json=payload, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get('error'):
-                raise Exception(data.get('msg', 'API Error'))
-            
-            cities = [
-                {"name": city}
-                for city in data.get('data', [])
-            ]
-            
-            # Ordenar por nombre
-            cities.sort(key=lambda x: x['name'])
-            
-            # Cache por 6 horas
-            cache.set(cache_key, cities, 21600)
-            
-            return Response({
-                "status": "success",
-                "data": cities,
-                "message": f"Cities for {state}, {country} retrieved successfully"
-            })
-            
-        except requests.RequestException as e:
-            logger.error(f"Request error getting cities for {state}, {country}: {str(e)}")
-            return Response({
-                "status": "error",
-                "messDev": f"API request failed: {str(e)}",
-                "messUser": f"Error al obtener ciudades de {state}, {country}",
-                "data": None
-            }, status=503)
\ No newline at end of file
+        if not self.geo_service.is_loaded():
+            return self._not_loaded()
+        return Response({
+            "status": "success",
+            "data": self.geo_service.get_cities(country, state),
+            "message": f"Cities for {state}, {country} retrieved successfully"
+        })
@@ -0,0 +1,101 @@
+from functools import partial
+from django.db import models, transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from api.company.models.Company import Company
+from api.order.models.Order import Order
+from api.costFuel.models.CostFuel import CostFuel
+from api.workCost.models.WorkCost import WorkCost
+
+class CompanyDailyStats(models.Model):
+    """
+    Per-company, per-day order totals behind the calendar endpoints.
+
+    One row per (company, order date) with orders; the composite primary key
+    makes a month or a range of months a single primary-key range scan.
+    Kept up to date by the signal handlers below whenever an Order, CostFuel
+    or WorkCost changes: only the affected days are recomputed. Can be
+    rebuilt with `manage.py rebuild_company_daily_stats`.
+    """
+    pk = models.CompositePrimaryKey('id_company', 'day')
+    id_company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        db_column='id_company'
+    )
+    day = models.DateField()
+    order_count = models.PositiveIntegerField(default=0)
+    status_counts = models.JSONField(default=dict)  # {status (lowercase): orders}
+    income = models.FloatField(default=0)
+    expense = models.FloatField(default=0)
+    fuel_cost = models.FloatField(default=0)
+    work_cost = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'api_company_daily_stats'
+        app_label = 'api'
+
+    def __str__(self):
+        return f"Company {self.id_company_id} {self.day}: {self.order_count} orders"
+
+
+# Order fields the daily totals depend on
+DAILY_STATS_ORDER_FIELDS = {'date', 'status', 'income', 'expense', 'id_company', 'id_company_id'}
+
+
+def _refresh_now(company_days):
+    # Imported here to avoid a circular import between models and repositories
+    from api.order.repositories.RepositoryCompanyDailyStats import RepositoryCompanyDailyStats
+    RepositoryCompanyDailyStats().refresh(company_days)
+
+
+def schedule_daily_stats_refresh(company_days):
+    """Schedules a refresh of the given (company_id, day) pairs once the current transaction commits."""
+    company_days = {(company_id, day) for company_id, day in company_days if company_id and day}
+    if company_days:
+        transaction.on_commit(partial(_refresh_now, company_days))
+
+
+def _order_days(*order_keys):
+    """(company_id, date) of the given orders, resolved now: a cascaded delete may remove them."""
+    order_keys = [key for key in order_keys if key]
+    if not order_keys:
+        return []
+    return Order.objects.filter(key__in=order_keys).values_list('id_company_id', 'date')
+
+
+@receiver(pre_save, sender=Order)
+def order_daily_stats_pre_save(sender, instance, update_fields=None, **kwargs):
+    """Remembers the stored company and date, in case the order moves to another day."""
+    instance._daily_stats_previous_day = None
+    if instance._state.adding or (update_fields is not None and not {'date', 'id_company', 'id_company_id'} & set(update_fields)):
+        return
+    instance._daily_stats_previous_day = (
+        Order.objects.filter(pk=instance.pk).values_list('id_company_id', 'date').first()
+    )
+
+@receiver(post_save, sender=Order)
+def order_daily_stats_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not DAILY_STATS_ORDER_FIELDS & set(update_fields):
+        return
+    previous = getattr(instance, '_daily_stats_previous_day', None)
+    schedule_daily_stats_refresh([(instance.id_company_id, instance.date), *([previous] if previous else [])])
+
+@receiver(post_delete, sender=Order)
+def order_daily_stats_deleted(sender, instance, **kwargs):
+    schedule_daily_stats_refresh([(instance.id_company_id, instance.date)])
+
+
+# The previous order of a CostFuel / WorkCost is remembered by the rollup
+# pre_save handlers (api.order.models.OrderCostRollup) as _rollup_previous_order
+@receiver(post_save, sender=CostFuel)
+@receiver(post_delete, sender=CostFuel)
+def cost_fuel_daily_stats_changed(sender, instance, **kwargs):
+    schedule_daily_stats_refresh(_order_days(instance.order_id, getattr(instance, '_rollup_previous_order', None)))
+
+@receiver(post_save, sender=WorkCost)
+@receiver(post_delete, sender=WorkCost)
+def work_cost_daily_stats_changed(sender, instance, **kwargs):
+    schedule_daily_stats_refresh(_order_days(instance.id_order_id, getattr(instance, '_rollup_previous_order', None)))
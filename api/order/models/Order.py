@@ -1,5 +1,7 @@
 import uuid
 from django.db import models
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
 import logging
 
 from api.operator.models import Operator
@@ -8,8 +10,11 @@ from api.job.models.Job import Job
 from api.tool.models.Tool import Tool
 from api.company.models.Company import Company
 from api.utils.s3utils import upload_evidence_file, upload_dispatch_file
-from api.utils.image_processor import ImageProcessor
+from api.imageJob.services.ServicesImageJob import ServicesImageJob
 from api.customerFactory.models.CustomerFactory import CustomerFactory
+from api.utils.search import normalize_search_text
+from api.utils.location import parse_location
+from api.utils.file_tracking import FileFieldTrackerMixin
 from storages.backends.s3boto3 import S3Boto3Storage
 
 logger = logging.getLogger(__name__)
@@ -67,7 +72,7 @@ class StatesUSA(models.TextChoices):
     WISCONSIN = "WI", "Wisconsin"
     WYOMING = "WY", "Wyoming"
     
-class Order(models.Model):
+class Order(FileFieldTrackerMixin, models.Model):
     key = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     key_ref = models.CharField(max_length=50, null=True, blank=True)
     date = models.DateField(null=True, blank=True)
@@ -88,6 +93,11 @@ class Order(models.Model):
         blank=True,
         verbose_name="location (Country, State, City)"
     )
+    # state_usa parsed on save (api.utils.location.parse_location); location
+    # filters and the registered locations run on these with equality lookups
+    country = models.CharField(max_length=100, null=True, blank=True, editable=False)
+    state = models.CharField(max_length=100, null=True, blank=True, editable=False)
+    city = models.CharField(max_length=100, null=True, blank=True, editable=False)
 
     id_company = models.ForeignKey(
         Company,
@@ -127,56 +137,97 @@ class Order(models.Model):
         blank=True
     )
 
+    # Normalized key_ref + client name + location, kept in sync on save (and on
+    # Person save below). Backs the fast search mode of the order listings; on
+    # MySQL it carries the FULLTEXT ngram index order_search_ft (migration 0006).
+    search_document = models.CharField(max_length=512, blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the company listings on (date, key)
+            models.Index(fields=['id_company', 'date', 'key'], name='order_company_date_key_idx'),
+            # Location filters and the registered locations of a company
+            models.Index(fields=['id_company', 'country', 'state', 'city'], name='order_company_location_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.key} - {self.person.id_person if self.person else 'No Person Assigned'}"
 
+    # generate_derivatives options of each image field, applied by the background image worker.
+    # Evidence keeps a higher quality, as the photos may be legally important.
+    IMAGE_COMPRESSION = {
+        'evidence': {'quality': 75},
+        'dispatch_ticket': {},
+    }
+
+    TRACKED_FILE_FIELDS = tuple(IMAGE_COMPRESSION)
+
+    def _changed_image_fields(self, update_fields=None):
+        """Image fields being saved that received a new file since the order was loaded."""
+        return [name for name in self.changed_file_fields(update_fields) if getattr(self, name)]
+
+    # Fields that feed search_document
+    SEARCH_FIELDS = ('key_ref', 'state_usa', 'person', 'person_id')
+
+    @staticmethod
+    def build_search_document(key_ref, first_name, last_name, state_usa):
+        return normalize_search_text(key_ref, first_name, last_name, state_usa)[:512]
+
+    def _refresh_search_document(self):
+        if Order.person.is_cached(self):
+            names = (self.person.first_name, self.person.last_name) if self.person else (None, None)
+        else:
+            names = Person.all_objects.filter(pk=self.person_id).values_list('first_name', 'last_name').first() or (None, None)
+        self.search_document = self.build_search_document(self.key_ref, *names, self.state_usa)
+
+    LOCATION_FIELDS = ('country', 'state', 'city')
+
     def save(self, *args, **kwargs):
         logger.debug(f"Saving order {self.key}")
-        
-        # Get update_fields if exists
+
         update_fields = kwargs.get('update_fields')
-        logger.debug(f"Update fields specified: {update_fields}")
-
-        # Check if it is a new or existing object
-        is_new = not self.pk
-        logger.debug(f"Is new object: {is_new}")
-        
-        # Initialize image processor with optimized settings for orders
-        processor = ImageProcessor()
-        
-        # Process images based on update context
-        if is_new or not update_fields:
-            logger.debug("Processing all images for new object or full save")
-            if self.evidence:
-                logger.debug(f"Compressing evidence: {getattr(self.evidence, 'name', 'new file')}")
-                # Use higher quality for evidence photos as they may be legally important
-                self.evidence = processor.compress_image(
-                    self.evidence, 
-                    quality=75,  # Higher quality for evidence
-                    prefix="evidence"
-                )
-            if self.dispatch_ticket:
-                logger.debug(f"Compressing dispatch_ticket: {getattr(self.dispatch_ticket, 'name', 'new file')}")
-                self.dispatch_ticket = processor.compress_image(
-                    self.dispatch_ticket,
-                    prefix="dispatch"
-                )
-        elif update_fields:
-            if 'evidence' in update_fields and self.evidence:
-                logger.debug(f"Compressing evidence in partial update: {getattr(self.evidence, 'name', 'new file')}")
-                self.evidence = processor.compress_image(
-                    self.evidence,
-                    quality=75,  # Higher quality for evidence
-                    prefix="evidence"
-                )
-            if 'dispatch_ticket' in update_fields and self.dispatch_ticket:
-                logger.debug(f"Compressing dispatch_ticket in partial update: {getattr(self.dispatch_ticket, 'name', 'new file')}")
-                self.dispatch_ticket = processor.compress_image(
-                    self.dispatch_ticket,
-                    prefix="dispatch"
-                )
-        
-        logger.debug("Calling parent save method")
+        if update_fields is None or 'state_usa' in update_fields:
+            self.country, self.state, self.city = parse_location(self.state_usa)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], *self.LOCATION_FIELDS}
+        if update_fields is None:
+            self._refresh_search_document()
+        elif set(update_fields) & set(self.SEARCH_FIELDS):
+            self._refresh_search_document()
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'search_document'}
+
+        # Uploads are stored as-is; compression runs in the background image worker
+        changed = self._changed_image_fields(update_fields)
+
         super(Order, self).save(*args, **kwargs)
-        logger.debug(f"Order {self.key} saved successfully")
\ No newline at end of file
+        logger.debug(f"Order {self.key} saved successfully")
+
+        if changed:
+            logger.debug(f"Scheduling compression of order {self.key} images: {changed}")
+            ServicesImageJob().schedule(self, {name: self.IMAGE_COMPRESSION[name] for name in changed})
+
+
+@receiver(pre_save, sender=Person)
+def person_pre_save(sender, instance, update_fields=None, **kwargs):
+    """Remembers the stored name so post_save only rewrites the orders on a real change."""
+    instance._search_previous_name = (instance.first_name, instance.last_name)
+    if instance._state.adding or (update_fields is not None and not {'first_name', 'last_name'} & set(update_fields)):
+        return
+    instance._search_previous_name = (
+        Person.all_objects.filter(pk=instance.pk).values_list('first_name', 'last_name').first()
+    )
+
+@receiver(post_save, sender=Person)
+def person_name_changed(sender, instance, created, **kwargs):
+    """Rewrites search_document of the client's orders when their name changes."""
+    name = (instance.first_name, instance.last_name)
+    if created or getattr(instance, '_search_previous_name', name) == name:
+        return
+    changed = []
+    orders = Order.objects.filter(person_id=instance.pk).only('key', 'key_ref', 'state_usa', 'search_document')
+    for order in orders.iterator(chunk_size=500):
+        document = Order.build_search_document(order.key_ref, *name, order.state_usa)
+        if document != order.search_document:
+            order.search_document = document
+            changed.append(order)
+    Order.objects.bulk_update(changed, ['search_document'], batch_size=500)
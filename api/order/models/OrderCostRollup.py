@@ -0,0 +1,138 @@
+from functools import partial
+from django.db import models, transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from api.order.models.Order import Order
+from api.costFuel.models.CostFuel import CostFuel
+from api.workCost.models.WorkCost import WorkCost
+from api.assign.models.Assign import Assign
+from api.operator.models.Operator import Operator
+
+class OrderCostRollup(models.Model):
+    """
+    Denormalized cost totals of an order.
+
+    Created with the order and kept up to date by the signal handlers below
+    whenever a CostFuel, WorkCost, Assign or Operator.salary changes, so cost
+    summaries and financial reports read one row per order instead of
+    aggregating the cost tables. Can be rebuilt with
+    `manage.py rebuild_order_cost_rollup` (--missing backfills only the
+    orders that have none).
+    """
+    order = models.OneToOneField(
+        Order,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='cost_rollup',
+        db_column='id_order'
+    )
+    expense = models.FloatField(default=0)
+    fuel_cost = models.FloatField(default=0)
+    work_cost = models.FloatField(default=0)
+    driver_salaries = models.FloatField(default=0)
+    other_salaries = models.FloatField(default=0)
+    total_cost = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'api_order_cost_rollup'
+        app_label = 'api'
+
+    def __str__(self):
+        return f"Cost rollup {self.order_id} - total: {self.total_cost}"
+
+
+def _refresh_now(order_keys):
+    # Imported here to avoid a circular import between models and repositories
+    from api.order.repositories.RepositoryOrderCostRollup import RepositoryOrderCostRollup
+    RepositoryOrderCostRollup().refresh(order_keys)
+
+
+def schedule_rollup_refresh(order_keys):
+    """
+    Schedules a refresh of the given orders once the current transaction commits.
+    Deferring it also keeps cascaded deletes from recreating the rollup of an
+    order that is being deleted.
+    """
+    order_keys = {key for key in order_keys if key}
+    if order_keys:
+        transaction.on_commit(partial(_refresh_now, order_keys))
+
+
+def _remember_previous_order(sender, instance, field):
+    """Stores the order the row pointed to before this save, in case it moves."""
+    instance._rollup_previous_order = None
+    if instance.pk and not instance._state.adding:
+        instance._rollup_previous_order = (
+            sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+        )
+
+
+@receiver(pre_save, sender=CostFuel)
+def cost_fuel_pre_save(sender, instance, **kwargs):
+    _remember_previous_order(sender, instance, 'order_id')
+
+@receiver(post_save, sender=CostFuel)
+@receiver(post_delete, sender=CostFuel)
+def cost_fuel_changed(sender, instance, **kwargs):
+    schedule_rollup_refresh([instance.order_id, getattr(instance, '_rollup_previous_order', None)])
+
+
+@receiver(pre_save, sender=WorkCost)
+def work_cost_pre_save(sender, instance, **kwargs):
+    _remember_previous_order(sender, instance, 'id_order_id')
+
+@receiver(post_save, sender=WorkCost)
+@receiver(post_delete, sender=WorkCost)
+def work_cost_changed(sender, instance, **kwargs):
+    schedule_rollup_refresh([instance.id_order_id, getattr(instance, '_rollup_previous_order', None)])
+
+
+@receiver(pre_save, sender=Assign)
+def assign_pre_save(sender, instance, **kwargs):
+    _remember_previous_order(sender, instance, 'order_id')
+
+@receiver(post_save, sender=Assign)
+@receiver(post_delete, sender=Assign)
+def assign_changed(sender, instance, **kwargs):
+    schedule_rollup_refresh([instance.order_id, getattr(instance, '_rollup_previous_order', None)])
+
+
+@receiver(pre_save, sender=Operator)
+def operator_pre_save(sender, instance, update_fields=None, **kwargs):
+    """Remembers the stored salary so post_save only refreshes on a real change."""
+    instance._rollup_previous_salary = instance.salary
+    if instance._state.adding or (update_fields is not None and 'salary' not in update_fields):
+        return
+    instance._rollup_previous_salary = (
+        Operator.all_objects.filter(pk=instance.pk).values_list('salary', flat=True).first()
+    )
+
+@receiver(post_save, sender=Operator)
+def operator_salary_changed(sender, instance, created, **kwargs):
+    if created or getattr(instance, '_rollup_previous_salary', instance.salary) == instance.salary:
+        return
+    schedule_rollup_refresh(
+        Assign.objects.filter(operator_id=instance.pk).values_list('order_id', flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=Order)
+def order_expense_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Creates the rollup of a new order and keeps the denormalized expense (and therefore the total) in sync."""
+    if created:
+        schedule_rollup_refresh([instance.pk])
+        return
+    if update_fields is not None and 'expense' not in update_fields:
+        return
+    expense = float(instance.expense or 0)
+    OrderCostRollup.objects.filter(order_id=instance.pk).exclude(expense=expense).update(
+        expense=expense,
+        total_cost=(
+            expense +
+            models.F('fuel_cost') +
+            models.F('work_cost') +
+            models.F('driver_salaries') +
+            models.F('other_salaries')
+        )
+    )
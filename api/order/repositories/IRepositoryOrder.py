@@ -41,4 +41,10 @@ class IRepositoryOrder:
         Returns:
         - QuerySet of filtered orders
         """
+        raise NotImplementedError
+
+    def get_registered_locations(self, company_id):
+        """
+        Distinct "Country, State, City" locations of the company's orders.
+        """
         raise NotImplementedError
\ No newline at end of file
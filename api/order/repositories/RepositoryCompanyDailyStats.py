@@ -0,0 +1,115 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count, Sum
+from api.order.models.Order import Order
+from api.order.models.CompanyDailyStats import CompanyDailyStats
+from api.costFuel.models.CostFuel import CostFuel
+from api.workCost.models.WorkCost import WorkCost
+
+STATS_FIELDS = ['order_count', 'status_counts', 'income', 'expense', 'fuel_cost', 'work_cost']
+
+class RepositoryCompanyDailyStats:
+    """
+    Persistence of the per-company daily order totals (CompanyDailyStats).
+    """
+
+    def get_range(self, company_id, start, end):
+        """Stored days of the company between start and end (inclusive), a primary-key range scan."""
+        return CompanyDailyStats.objects.filter(
+            id_company_id=company_id, day__gte=start, day__lte=end
+        ).order_by('day')
+
+    def refresh(self, company_days):
+        """
+        Recomputes the given (company_id, day) pairs from Order, CostFuel and
+        WorkCost with one grouped query per table and company, upserts the
+        days with orders and deletes the ones left without.
+
+        Returns the number of days written.
+        """
+        days_by_company = defaultdict(set)
+        for company_id, day in company_days:
+            days_by_company[company_id].add(day)
+
+        written = 0
+        for company_id, days in days_by_company.items():
+            stats = self._compute(company_id, days)
+            with transaction.atomic():
+                if stats:
+                    CompanyDailyStats.objects.bulk_create(
+                        stats,
+                        update_conflicts=True,
+                        unique_fields=['id_company', 'day'],
+                        update_fields=STATS_FIELDS + ['updated_at'],
+                    )
+                empty = days - {row.day for row in stats}
+                if empty:
+                    CompanyDailyStats.objects.filter(id_company_id=company_id, day__in=empty).delete()
+            written += len(stats)
+        return written
+
+    def _compute(self, company_id, days):
+        stats = {}
+        rows = (
+            Order.objects
+            .filter(id_company_id=company_id, date__in=days)
+            .values('date', 'status')
+            .annotate(count=Count('key'), income=Sum('income'), expense=Sum('expense'))
+            .order_by()
+        )
+        for row in rows:
+            day = stats.setdefault(row['date'], CompanyDailyStats(
+                id_company_id=company_id, day=row['date'], status_counts={}
+            ))
+            status = (row['status'] or 'unknown').lower()
+            day.status_counts[status] = day.status_counts.get(status, 0) + row['count']
+            day.order_count += row['count']
+            day.income += float(row['income'] or 0)
+            day.expense += float(row['expense'] or 0)
+
+        fuel = (
+            CostFuel.objects
+            .filter(order__id_company_id=company_id, order__date__in=days)
+            .values('order__date')
+            .annotate(total=Sum('cost_fuel'))
+            .order_by()
+        )
+        for row in fuel:
+            if row['order__date'] in stats:
+                stats[row['order__date']].fuel_cost = float(row['total'] or 0)
+
+        work = (
+            WorkCost.objects
+            .filter(id_order__id_company_id=company_id, id_order__date__in=days)
+            .values('id_order__date')
+            .annotate(total=Sum('cost'))
+            .order_by()
+        )
+        for row in work:
+            if row['id_order__date'] in stats:
+                stats[row['id_order__date']].work_cost = float(row['total'] or 0)
+        return list(stats.values())
+
+    def rebuild(self, company_id=None, batch_size=366):
+        """
+        Recomputes every stored day (optionally only for one company) from
+        scratch, in batches of days. Returns the number of days written.
+        """
+        stale = CompanyDailyStats.objects.all()
+        orders = Order.objects.exclude(date__isnull=True)
+        if company_id:
+            stale = stale.filter(id_company_id=company_id)
+            orders = orders.filter(id_company_id=company_id)
+        stale.delete()
+
+        total = 0
+        batch = []
+        pairs = orders.values_list('id_company_id', 'date').distinct().order_by('id_company_id', 'date')
+        for pair in pairs.iterator(chunk_size=batch_size):
+            batch.append(pair)
+            if len(batch) >= batch_size:
+                total += self.refresh(batch)
+                batch = []
+        if batch:
+            total += self.refresh(batch)
+        return total
@@ -6,9 +6,32 @@ from api.order.models.Order import StatesUSA
 from django.db.models import Max 
 import datetime
 from django.db.models import Q
-from django.db.models.functions import TruncDay
 from django.db.models import Count
+from django.db import connection
+from django.db.models import F
+from api.utils.location import format_location, location_q, parse_location
+from api.utils.search import FULLTEXT_MIN_TERM_LENGTH, FullTextMatch, fulltext_phrase, normalize_search_text
+# Columns read by OrderSerializer and the order summary listings. Listing
+# querysets load only these, with person/job/customer_factory joined in.
+ORDER_LIST_FIELDS = (
+    'key', 'key_ref', 'date', 'distance', 'expense', 'income', 'weight',
+    'status', 'payStatus', 'evidence', 'dispatch_ticket', 'state_usa', 'id_company',
+    'person__id_person', 'person__email', 'person__first_name', 'person__last_name',
+    'person__phone', 'person__address',
+    'job__id', 'job__name',
+    'customer_factory__id_factory', 'customer_factory__name',
+)
+
 class RepositoryOrder(IRepositoryOrder):
+    @staticmethod
+    def list_optimized(queryset):
+        """
+        Shared query plan for every order listing: joins the relations
+        OrderSerializer reads and restricts the selected columns, so a page
+        of orders is fetched with a single query.
+        """
+        return queryset.select_related('person', 'job', 'customer_factory').only(*ORDER_LIST_FIELDS)
+
     @staticmethod
     def create_order(data):
         return Order.objects.create(**data)
@@ -63,9 +86,9 @@ class RepositoryOrder(IRepositoryOrder):
         return order
     
     # @staticmethod
-    def get_all_orders_any_status(self, company_id, date_filter=None, status_filter=None, search_filter=None, location_filter=None):
+    def get_all_orders_any_status(self, company_id, date_filter=None, status_filter=None, search_filter=None, location_filter=None, search_mode=None):
         # Consulta base
-        queryset = Order.objects.filter(id_company_id=company_id)
+        queryset = self.list_optimized(Order.objects.filter(id_company_id=company_id))
         
         if date_filter:
             try:
@@ -81,27 +104,72 @@ class RepositoryOrder(IRepositoryOrder):
             # Normalizar el status para comparación case-insensitive
             queryset = queryset.filter(status__iexact=status_filter)
         
-        if search_filter:
+        if search_filter and search_mode == 'fast':
+            queryset = self.filter_search_document(queryset, search_filter)
+        elif search_filter:
             search_q = Q(key_ref__icontains=search_filter) | \
                     Q(person__first_name__icontains=search_filter) | \
                     Q(person__last_name__icontains=search_filter)
             queryset = queryset.filter(search_q)
         
         if location_filter:
-            # Filtrar por ubicación (state_usa)
-            queryset = queryset.filter(state_usa__icontains=location_filter)
+            # Filtrar por ubicación: "Country[, State[, City]]" contra las columnas estructuradas
+            queryset = queryset.filter(location_q(*parse_location(location_filter)))
         
         # Ordenar por fecha descendente para mostrar más recientes primero
         return queryset.order_by('-date', '-key')
     
+    @staticmethod
+    def filter_search_document(queryset, search_filter):
+        """
+        Fast search: matches the term against Order.search_document (key_ref,
+        client name and location). On MySQL it uses the FULLTEXT ngram index;
+        other backends, and terms shorter than the ngram size, fall back to a
+        substring search on that single column, with no join to Person.
+        """
+        term = normalize_search_text(search_filter)
+        if not term:
+            return queryset
+        if connection.vendor == 'mysql' and len(term) >= FULLTEXT_MIN_TERM_LENGTH:
+            return queryset.filter(FullTextMatch(F('search_document'), fulltext_phrase(term)))
+        return queryset.filter(search_document__contains=term)
+
+    @staticmethod
+    def rebuild_search_documents(company_id=None, batch_size=500):
+        """
+        Recomputes Order.search_document (optionally only for one company) in
+        batches, writing only the rows that changed. Returns how many were updated.
+        """
+        orders = Order.objects.select_related('person').only(
+            'key', 'key_ref', 'state_usa', 'search_document', 'person__first_name', 'person__last_name'
+        ).order_by('key')
+        if company_id:
+            orders = orders.filter(id_company_id=company_id)
+
+        total = 0
+        changed = []
+        for order in orders.iterator(chunk_size=batch_size):
+            document = Order.build_search_document(
+                order.key_ref, order.person.first_name, order.person.last_name, order.state_usa
+            )
+            if document != order.search_document:
+                order.search_document = document
+                changed.append(order)
+            if len(changed) >= batch_size:
+                total += Order.objects.bulk_update(changed, ['search_document'])
+                changed = []
+        if changed:
+            total += Order.objects.bulk_update(changed, ['search_document'])
+        return total
+
     def get_all_orders(self, company_id):
-        return Order.objects.filter(id_company_id=company_id)
+        return self.list_optimized(Order.objects.filter(id_company_id=company_id))
     
     def get_all_pending_orders(self, company_id):
-        return Order.objects.filter(id_company_id=company_id, status='pending')
+        return self.list_optimized(Order.objects.filter(id_company_id=company_id, status='pending'))
     
     def get_all_orders_report(self, company_id):
-        return Order.objects.filter(id_company_id=company_id)
+        return self.list_optimized(Order.objects.filter(id_company_id=company_id))
     
     @staticmethod
     def get_states():
@@ -120,32 +188,24 @@ class RepositoryOrder(IRepositoryOrder):
         except Order.DoesNotExist:
             return f"Order does not exist."
         
-    def get_next_workhouse_number(self, company_id):
+    def get_last_workhouse_number(self, company_id):
         """
-        Generates the next workhouse order number for a company.
-        Returns an integer that will be formatted as WH-XXXX
+        Highest number already used in the WH-XXXX key_refs of a company (0 if none).
+        Only used to start the company's 'workhouse' sequence, so the scan runs
+        once per company. Compares numbers, not strings (WH-10000 > WH-9999).
         """
-        from django.db.models import Max
         import re
-        
-        # Get the last workhouse order number
-        last_order = Order.objects.filter(
+
+        last_number = 0
+        key_refs = Order.objects.filter(
             id_company_id=company_id,
             key_ref__startswith='WH-'
-        ).aggregate(Max('key_ref'))['key_ref__max']
-        
-        if last_order:
-            try:
-                # Extract number from WH-XXXX format
-                match = re.search(r'WH-(\d+)', last_order)
-                if match:
-                    return int(match.group(1)) + 1
-                else:
-                    return 1
-            except (ValueError, AttributeError):
-                return 1
-        
-        return 1
+        ).values_list('key_ref', flat=True)
+        for key_ref in key_refs.iterator():
+            match = re.match(r'WH-(\d+)', key_ref)
+            if match:
+                last_number = max(last_number, int(match.group(1)))
+        return last_number
 
     def create_workhouse_order(self, validated_data):
         return Order.objects.create(**validated_data)
@@ -166,11 +226,11 @@ class RepositoryOrder(IRepositoryOrder):
         """
         from django.db.models import Q
         
-        return Order.objects.filter(
+        return self.list_optimized(Order.objects.filter(
             id_company_id=company_id
         ).filter(
             Q(job__name='workhouse') | Q(key_ref__startswith='WH-')
-        ).distinct().order_by('-date')
+        )).distinct().order_by('-date')
         
     def update_payments_by_key_ref(self, key_ref, expense, income):
         orders = Order.objects.filter(key_ref=key_ref)
@@ -199,28 +259,23 @@ class RepositoryOrder(IRepositoryOrder):
         """
         return Order.objects.filter(key_ref=key_ref).order_by('-date')
     
-    def count_orders_per_day_in_month(self, company_id, year, month):
+    def filter_by_location(self, company_id, country=None, state=None, city=None):
         """
-        Returns a list of dicts with 'date' and 'count' for each day with orders in the given month.
+        Filtra órdenes por país, estado y ciudad (igualdad sobre las columnas country/state/city).
         """
-        return (
-            Order.objects
-            .filter(id_company_id=company_id, date__year=year, date__month=month)
-            .annotate(day=TruncDay('date'))
-            .values('day')
-            .annotate(count=Count('key'))
-            .order_by('day')
+        return self.list_optimized(
+            Order.objects.filter(location_q(country, state, city), id_company_id=company_id)
         )
-        
-    def filter_by_location(self, company_id, country=None, state=None, city=None):
+
+    def get_registered_locations(self, company_id):
         """
-        Filtra órdenes por país, estado y ciudad usando el campo state_usa.
+        Distinct "Country, State, City" locations of the company's orders,
+        read from the (id_company, country, state, city) index.
         """
-        qs = Order.objects.filter(id_company_id=company_id)
-        if country:
-            qs = qs.filter(state_usa__istartswith=country)
-        if state:
-            qs = qs.filter(state_usa__icontains=f", {state}")
-        if city:
-            qs = qs.filter(state_usa__icontains=f", {city}")
-        return qs
\ No newline at end of file
+        rows = (
+            Order.objects.filter(id_company_id=company_id, country__isnull=False)
+            .values_list('country', 'state', 'city')
+            .distinct()
+            .order_by('country', 'state', 'city')
+        )
+        return [format_location(*row) for row in rows]
\ No newline at end of file
@@ -0,0 +1,106 @@
+from api.order.models.Order import Order
+from api.order.models.OrderCostRollup import OrderCostRollup
+from api.costFuel.repositories.RepositoryCostFuel import RepositoryCostFuel
+from api.workCost.repositories.RepositoryWorkCost import RepositoryWorkCost
+from api.assign.repositories.RepositoryAssign import RepositoryAssign
+
+ROLLUP_FIELDS = ['expense', 'fuel_cost', 'work_cost', 'driver_salaries', 'other_salaries', 'total_cost']
+
+class RepositoryOrderCostRollup:
+    """
+    Persistence of the denormalized per-order cost totals (OrderCostRollup).
+    """
+
+    def get_by_orders(self, order_keys):
+        """
+        Returns the stored rollups of the given orders, together with the order
+        fields the cost summary needs, keyed by order key. One query.
+        """
+        rows = OrderCostRollup.objects.filter(order_id__in=order_keys).values(
+            'order_id', 'order__income', 'order__customer_factory_id', *ROLLUP_FIELDS
+        )
+        return {row['order_id']: row for row in rows}
+
+    def compute(self, order_keys):
+        """
+        Computes the rollups of the given orders from CostFuel, WorkCost and
+        Assign with one grouped query per table, without storing them.
+
+        Returns {order_key: row} in the shape of get_by_orders.
+        """
+        orders = list(
+            Order.objects.filter(key__in=list(order_keys))
+            .values_list('key', 'expense', 'income', 'customer_factory_id')
+        )
+        if not orders:
+            return {}
+
+        keys = [key for key, *_ in orders]
+        fuel_totals = RepositoryCostFuel().get_totals_by_orders(keys)
+        work_totals = RepositoryWorkCost().get_totals_by_orders(keys)
+        salaries = RepositoryAssign().get_salaries_by_orders(keys)
+
+        rows = {}
+        for key, expense, income, customer_factory_id in orders:
+            expense = float(expense or 0)
+            fuel_cost = fuel_totals.get(key, 0.0)
+            work_cost = work_totals.get(key, 0.0)
+            driver_salaries, other_salaries = salaries.get(key, (0.0, 0.0))
+            rows[key] = {
+                'order_id': key,
+                'order__income': income,
+                'order__customer_factory_id': customer_factory_id,
+                'expense': expense,
+                'fuel_cost': fuel_cost,
+                'work_cost': work_cost,
+                'driver_salaries': driver_salaries,
+                'other_salaries': other_salaries,
+                'total_cost': expense + fuel_cost + work_cost + driver_salaries + other_salaries,
+            }
+        return rows
+
+    def refresh(self, order_keys):
+        """
+        Recomputes the rollups of the given orders (see compute) and upserts
+        them in one statement.
+
+        Returns the number of rollups written.
+        """
+        rows = self.compute(order_keys)
+        if not rows:
+            return 0
+
+        OrderCostRollup.objects.bulk_create(
+            [
+                OrderCostRollup(order_id=key, **{field: row[field] for field in ROLLUP_FIELDS})
+                for key, row in rows.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['order'],
+            update_fields=ROLLUP_FIELDS + ['updated_at'],
+        )
+        return len(rows)
+
+    def rebuild(self, company_id=None, batch_size=500, missing_only=False):
+        """
+        Recomputes every rollup (optionally only for one company, or only the
+        orders that have none yet) in batches.
+
+        Returns the number of rollups written.
+        """
+        orders = Order.objects.order_by('key')
+        if company_id:
+            orders = orders.filter(id_company_id=company_id)
+        if missing_only:
+            orders = orders.filter(cost_rollup__isnull=True)
+
+        total = 0
+        batch = []
+        for key in orders.values_list('key', flat=True).iterator(chunk_size=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                total += self.refresh(batch)
+                batch = []
+        if batch:
+            total += self.refresh(batch)
+        return total
@@ -5,6 +5,7 @@ from api.person.serializers.PersonCreateFromOrderSerializer import PersonCreateF
 from api.job.models import Job
 from api.company.models.Company import Company
 from django.conf import settings
+from api.utils.s3utils import delete_derivatives, image_url_map
 from django.core.files.base import ContentFile
 from django.shortcuts import get_object_or_404
 import base64
@@ -31,12 +32,16 @@ class OrderSerializer(serializers.ModelSerializer):
         use_url=True,    # when serializing returns URL instead of binary
     )
     dispatch_ticket_url = serializers.SerializerMethodField()
+    # Size-keyed URLs ({"64": ..., "256": ..., "1200": ...}) for list thumbnails
+    evidence_urls = serializers.SerializerMethodField()
+    dispatch_ticket_urls = serializers.SerializerMethodField()
     
     class Meta:
         model = Order
         fields = [
             "key", "key_ref", "date", "distance", "expense", "income",
             "weight", "status", "payStatus", "evidence", "dispatch_ticket", "dispatch_ticket_url",
+            "evidence_urls", "dispatch_ticket_urls",
             "state_usa", "person", "job","job_name", "customer_factory", "customer_factory_name", "payStatus"
         ]
 
@@ -55,6 +60,12 @@ class OrderSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         return request.build_absolute_uri(obj.evidence.url) if request else obj.evidence.url
     
+    def get_evidence_urls(self, obj):
+        return image_url_map(obj.evidence, self.context.get('request'))
+
+    def get_dispatch_ticket_urls(self, obj):
+        return image_url_map(obj.dispatch_ticket, self.context.get('request'))
+
     def validate_dispatch_ticket(self, value):
         """
         Additional validation to ensure images are not too large
@@ -108,6 +119,7 @@ class OrderSerializer(serializers.ModelSerializer):
         if 'dispatch_ticket' in validated_data:
             # If there is a previous image, remove it from the file system
             if instance.dispatch_ticket:
+                delete_derivatives(instance.dispatch_ticket)
                 instance.dispatch_ticket.delete(save=False)
 
         if person_data:
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from api.order.models.Order import Order
 from django.conf import settings
+from api.utils.s3utils import delete_derivatives
 
 class SerializerOrderEvidence(serializers.ModelSerializer):
     class Meta:
@@ -25,6 +26,7 @@ class SerializerOrderEvidence(serializers.ModelSerializer):
         if 'evidence' in validated_data:
             # Delete old file if it exists
             if instance.evidence:
+                delete_derivatives(instance.evidence)
                 instance.evidence.delete(save=False)
             
             # Set new file
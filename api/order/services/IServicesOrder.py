@@ -13,6 +13,12 @@ class IServicesOrder:
         Retrieves all orders.
         """
         pass
+    def iter_orders_with_summaries(self, company_id, date_filter=None, status_filter=None, search_filter=None,
+                                   location_filter=None, year=None, chunk_size=500, search_mode=None):
+        """
+        Yields (order, summary) pairs for the orders of a company, in chunks.
+        """
+        pass
     def delete_order_with_status(self, order_key):
         """
         Deletes an order if its status is "Finished".
@@ -23,4 +29,9 @@ class IServicesOrder:
         Returns:
         - A message indicating the result of the operation.
         """
-        pass
\ No newline at end of file
+        pass
+    def get_registered_locations(self, company_id):
+        """
+        Distinct locations ("Country, State, City") registered in the company's orders.
+        """
+        pass
@@ -1,5 +1,7 @@
 from api.order.models.Order import Order
 from api.order.repositories.RepositoryOrder import RepositoryOrder
+from api.order.repositories.RepositoryOrderCostRollup import RepositoryOrderCostRollup
+from api.order.repositories.RepositoryCompanyDailyStats import RepositoryCompanyDailyStats
 from api.order.services.IServicesOrder import IServicesOrder
 from api.person.models.Person import Person  
 from api.order.models.Order import Order  
@@ -13,18 +15,25 @@ from api.truck.serializers.SerializerTruck import SerializerTruck
 from api.assign.models.Assign import Assign
 from api.customerFactory.models.CustomerFactory import CustomerFactory
 from django.shortcuts import get_object_or_404
+import calendar
+import datetime
 import os
+import uuid
 from django.core.files.storage import default_storage
 from django.conf import settings
 from api.company.models.Company import Company
+from api.sequence.services.ServicesSequence import ServicesSequence
 from api.order.serializers.OrderSerializer import OrderSerializer
 import logging
 
 class ServicesOrder(IServicesOrder):
     def __init__(self):
         self.repository = RepositoryOrder()
+        self.rollup_repository = RepositoryOrderCostRollup()
+        self.daily_stats_repository = RepositoryCompanyDailyStats()
     
-    def get_all_orders_any_status(self, company_id, date_filter=None, status_filter=None, search_filter=None, location_filter=None):
+    def get_all_orders_any_status(self, company_id, date_filter=None, status_filter=None, search_filter=None, location_filter=None,
+                                  search_mode=None):
         if not company_id:
             raise ValidationError("Company context missing")
     
@@ -33,7 +42,8 @@ class ServicesOrder(IServicesOrder):
             date_filter=date_filter,
             status_filter=status_filter,
             search_filter=search_filter,
-            location_filter=location_filter
+            location_filter=location_filter,
+            search_mode=search_mode
         )
     
     def get_all_orders(self, company_id):
@@ -90,68 +100,87 @@ class ServicesOrder(IServicesOrder):
         Returns:
         - A dictionary containing the breakdown of costs and the total.
         """
-        cost_fuel_service = ServicesCostFuel()
-        workcost_service = ServicesWorkCost()
-        assign_service = ServicesAssign()
+        summaries = self.calculate_summaries([order_key])
+        if not summaries:
+            raise ValueError("Order not found")
+        return next(iter(summaries.values()))
+
+    def calculate_summaries(self, order_keys):
+        """
+        Calculates the cost summary for several orders at once.
+
+        Totals are read from the OrderCostRollup table in a single query.
+        Orders without a rollup (written without signals, or not backfilled
+        with `manage.py rebuild_order_cost_rollup --missing`) are computed
+        with one grouped query per cost table, without storing them: reads
+        never write.
+
+        Args:
+        - order_keys: Iterable of order keys (e.g. the orders of a page).
+
+        Returns:
+        - A dictionary {order_key: summary} with the same shape returned by
+          calculate_summary. Unknown keys are left out.
+        """
         try:
-            # Retrieve the order by its primary key
-            order = Order.objects.get(key=order_key)
-            if order.customer_factory:
-                customer_factory = order.customer_factory.id_factory
-            else:
-                customer_factory = None 
-
-            # Expense
-            expense = float(order.expense or 0)
-
-            # Renting cost
-            renting_cost = float(order.income or 0)
-
-            # Calculate fuel cost
-            fuel_cost_list = cost_fuel_service.get_by_order(order_key)
-            total_fuel_cost = sum(float(getattr(fuel_cost, 'cost_fuel', 0)) for fuel_cost in fuel_cost_list)
-
-            # Calculate work cost
-            work_cost_list = workcost_service.get_workCost_by_KeyOrder(order_key)
-            total_work_cost = sum(float(getattr(work_cost, 'cost', 0)) for work_cost in work_cost_list)
-
-            # Get assigned operators and calculate salaries
-            assigned_operators = assign_service.get_assigned_operators(order_key)
-            driver_salaries = 0.0
-            other_salaries = 0.0
-
-            for assignment in assigned_operators:
-                operator = assignment.operator
-                role = assignment.rol  # Get the role from the Assign model
-                salary = float(operator.salary or 0)
-                if role == 'driver':
-                    driver_salaries += salary
-                else:
-                    other_salaries += salary
-
-            # Calculate the total cost
-            total_cost = (
-                expense +
-                total_fuel_cost +
-                total_work_cost +
-                driver_salaries +
-                other_salaries
-            )
-
-            # Return the summary as a dictionary
-            return {
-                "expense": expense,
-                "rentingCost": renting_cost,
-                "fuelCost": total_fuel_cost,
-                "workCost": total_work_cost,
-                "driverSalaries": driver_salaries,
-                "otherSalaries": other_salaries,
-                "customer_factory": customer_factory,
-                "totalCost": total_cost,
+            order_keys = [key if isinstance(key, uuid.UUID) else uuid.UUID(str(key)) for key in order_keys]
+        except ValueError:
+            raise ValueError("Invalid order key")
+        if not order_keys:
+            return {}
+
+        rollups = self.rollup_repository.get_by_orders(order_keys)
+        missing = [key for key in order_keys if key not in rollups]
+        if missing:
+            rollups.update(self.rollup_repository.compute(missing))
+
+        return {
+            key: {
+                "expense": rollup['expense'],
+                "rentingCost": float(rollup['order__income'] or 0),
+                "fuelCost": rollup['fuel_cost'],
+                "workCost": rollup['work_cost'],
+                "driverSalaries": rollup['driver_salaries'],
+                "otherSalaries": rollup['other_salaries'],
+                "customer_factory": rollup['order__customer_factory_id'],
+                "totalCost": rollup['total_cost'],
             }
+            for key, rollup in rollups.items()
+        }
 
-        except Order.DoesNotExist:
-            raise ValueError("Order not found")
+    def iter_orders_with_summaries(self, company_id, date_filter=None, status_filter=None, search_filter=None,
+                                   location_filter=None, year=None, chunk_size=500, search_mode=None):
+        """
+        Yields (order, summary) pairs for every order matching the listing filters.
+
+        Orders are read with .iterator(chunk_size) and the cost summaries are
+        computed in batch for each chunk, so memory stays bounded by the chunk
+        size regardless of how many orders are exported.
+        """
+        orders = self.get_all_orders_any_status(
+            company_id=company_id,
+            date_filter=date_filter,
+            status_filter=status_filter,
+            search_filter=search_filter,
+            location_filter=location_filter,
+            search_mode=search_mode
+        )
+        if year:
+            orders = orders.filter(date__year=year)
+
+        chunk = []
+        for order in orders.iterator(chunk_size=chunk_size):
+            chunk.append(order)
+            if len(chunk) >= chunk_size:
+                yield from self._with_summaries(chunk)
+                chunk = []
+        if chunk:
+            yield from self._with_summaries(chunk)
+
+    def _with_summaries(self, orders):
+        summaries = self.calculate_summaries([order.key for order in orders])
+        for order in orders:
+            yield order, summaries.get(order.key)
             
     def delete_order_with_status(self, order_key):
         """
@@ -275,8 +304,11 @@ class ServicesOrder(IServicesOrder):
         Returns:
             str: Formatted key reference (e.g., 'WH-0001')
         """
-        next_number = self.repository.get_next_workhouse_number(company_id)
-        return f'WH-{next_number:04d}'  # Formato: WH-0001, WH-0002, etc.
+        # Formato: WH-0001, WH-0002, etc. (atomic per-company counter)
+        return ServicesSequence().next_code(
+            company_id, 'workhouse', 'WH-',
+            initial=lambda: self.repository.get_last_workhouse_number(company_id)
+        )
 
     def _prepare_workhouse_order_data(self, data, company, person, job):
         """
@@ -400,7 +432,23 @@ class ServicesOrder(IServicesOrder):
         return self.repository.update_payments_by_key_ref(key_ref, expense, income)
 
     def count_orders_per_day_in_month(self, company_id, year, month):
-        return self.repository.count_orders_per_day_in_month(company_id, year, month)
+        """[{'day': date, 'count': n}] of the days of the month with orders, from CompanyDailyStats."""
+        start = datetime.date(year, month, 1)
+        end = datetime.date(year, month, calendar.monthrange(year, month)[1])
+        return [
+            {'day': stats.day, 'count': stats.order_count}
+            for stats in self.daily_stats_repository.get_range(company_id, start, end).only('day', 'order_count')
+        ]
+
+    def get_daily_stats(self, company_id, start, end):
+        """
+        Stored daily totals (CompanyDailyStats) of the company between two dates, inclusive.
+        """
+        if not company_id:
+            raise ValidationError("Company context missing")
+        if start > end:
+            raise ValidationError("start must not be after end")
+        return self.daily_stats_repository.get_range(company_id, start, end)
     
     def filter_by_location(self, company_id, country=None, state=None, city=None):
         """
@@ -418,4 +466,12 @@ class ServicesOrder(IServicesOrder):
         if not company_id:
             raise ValidationError("Company context missing")
         
-        return self.repository.filter_by_location(company_id, country, state, city)
\ No newline at end of file
+        return self.repository.filter_by_location(company_id, country, state, city)
+
+    def get_registered_locations(self, company_id):
+        """
+        Distinct locations ("Country, State, City") registered in the company's orders.
+        """
+        if not company_id:
+            raise ValidationError("Company context missing")
+        return self.repository.get_registered_locations(company_id)
\ No newline at end of file
@@ -1,11 +1,13 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
-from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse, OpenApiParameter
 
 from api.payment.models.Payment import Payment
 from api.payment.serializers.PaymentSerializer import PaymentSerializer
 from api.payment.services.ServicesPayment import ServicesPayment
+from api.common.pagination import KeysetPagination, PAYMENT_KEYSET
+from api.utils.query_params import parse_date_param
 
 class ControllerPayment(ViewSet):
     """
@@ -16,22 +18,60 @@ class ControllerPayment(ViewSet):
         self.payment_service = ServicesPayment()
 
     @extend_schema(
-        summary="List all payments",
-        description="Get a list of all payments registered in the system.",
+        summary="List the company's payments",
+        description=(
+            "Payments assigned to the current company's orders, newest first, with keyset pagination "
+            "(page_size, cursor). Optional filters: status, date_from and date_to (YYYY-MM-DD). "
+            "`aggregates` totals value and bonus over the whole filtered set, not only the page."
+        ),
+        parameters=[
+            OpenApiParameter(name='status', type=str, location=OpenApiParameter.QUERY, description="Payment status"),
+            OpenApiParameter(name='date_from', type=str, location=OpenApiParameter.QUERY, description="First payment date (YYYY-MM-DD)"),
+            OpenApiParameter(name='date_to', type=str, location=OpenApiParameter.QUERY, description="Last payment date (YYYY-MM-DD)"),
+            OpenApiParameter(name='page_size', type=int, location=OpenApiParameter.QUERY, description="Payments per page (max 100)"),
+            OpenApiParameter(name='cursor', type=str, location=OpenApiParameter.QUERY, description="Cursor from the next / previous link"),
+        ],
         responses={
             200: OpenApiResponse(
                 response=PaymentSerializer(many=True),
-                description="Payment list retrieved successfully"
+                description="Payment page and totals retrieved successfully"
             )
         }
     )
     def list(self, request):
         """
-        List all payments.
+        List the company's payments, one keyset page at a time.
         """
-        payments = self.payment_service.list_payments()
-        serializer = PaymentSerializer(payments, many=True)
-        return Response(serializer.data)
+        company_id = request.company_id
+        try:
+            date_from = parse_date_param(request.query_params, "date_from")
+            date_to = parse_date_param(request.query_params, "date_to")
+        except ValueError as e:
+            return Response({
+                "status": "error",
+                "messDev": str(e),
+                "messUser": "Invalid date",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        payments = self.payment_service.list_company_payments(
+            company_id,
+            status=request.query_params.get("status"),
+            date_from=date_from,
+            date_to=date_to,
+        )
+        aggregates = self.payment_service.get_payment_totals(payments)
+
+        paginator = KeysetPagination(PAYMENT_KEYSET)
+        page = paginator.paginate_queryset(payments, request, view=self)
+        return Response({
+            "status": "success",
+            "messDev": "Payments listed successfully",
+            "messUser": "Payments listed successfully",
+            "current_company_id": company_id,
+            "aggregates": aggregates,
+            "data": paginator.get_paginated_response(PaymentSerializer(page, many=True).data).data
+        })
 
     @extend_schema(
         summary="Get a specific payment",
@@ -50,6 +50,10 @@ class Payment(models.Model):
     class Meta:
         db_table = 'api_payment'
         app_label = 'api'
+        indexes = [
+            # Keyset pagination of the company payment listing on (date_payment, id_pay)
+            models.Index(fields=['date_payment', 'id_pay'], name='payment_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"Payment #{self.id_pay} - ${self.value}"
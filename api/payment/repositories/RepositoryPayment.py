@@ -1,5 +1,7 @@
 from typing import List, Optional
+from django.db.models import Count, Exists, OuterRef, QuerySet, Sum
 from api.payment.models.Payment import Payment
+from api.assign.models.Assign import Assign
 
 class RepositoryPayment:
     def create(self, payment_data: dict) -> Payment:
@@ -23,6 +25,28 @@ class RepositoryPayment:
         """
         return list(Payment.objects.all())
 
+    def list_by_company(self, company_id, status=None, date_from=None, date_to=None) -> QuerySet:
+        """
+        Pagos de la compañía: los que están asignados a alguna orden suya
+        (Assign → Order → company), con filtros opcionales de estado y fecha.
+        """
+        payments = Payment.objects.filter(
+            Exists(Assign.objects.filter(payment=OuterRef('pk'), order__id_company_id=company_id))
+        )
+        if status:
+            payments = payments.filter(status=status)
+        if date_from:
+            payments = payments.filter(date_payment__date__gte=date_from)
+        if date_to:
+            payments = payments.filter(date_payment__date__lte=date_to)
+        return payments
+
+    def get_totals(self, payments: QuerySet) -> dict:
+        """Cantidad y sumas de value y bonus de los pagos dados, en una sola consulta."""
+        return payments.order_by().aggregate(
+            count=Count('id_pay'), total_value=Sum('value'), total_bonus=Sum('bonus')
+        )
+
     def update(self, payment_id: int, payment_data: dict) -> Optional[Payment]:
         """
         Actualiza un pago existente.
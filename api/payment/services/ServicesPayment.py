@@ -47,6 +47,22 @@ class ServicesPayment:
         """
         return self.repository.list()
 
+    def list_company_payments(self, company_id, status=None, date_from=None, date_to=None):
+        """
+        Payments of a company (through its assignments' orders), filtered.
+        Returns a queryset so the caller can paginate it.
+        """
+        return self.repository.list_by_company(company_id, status=status, date_from=date_from, date_to=date_to)
+
+    def get_payment_totals(self, payments) -> dict:
+        """Count and summed value / bonus of the given payments (the whole filtered window, not a page)."""
+        totals = self.repository.get_totals(payments)
+        return {
+            'count': totals['count'],
+            'total_value': totals['total_value'] or 0,
+            'total_bonus': totals['total_bonus'] or 0,
+        }
+
     def update_payment(self, payment_id: int, payment_data: dict) -> Optional[Payment]:
         """
         Updates a payment with business validations.
@@ -1,6 +1,9 @@
 from django.db import models
 from django.db.models.query import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from api.company.models.Company import Company
+from api.user.identity_cache import invalidate_identity
 
 class PersonQuerySet(QuerySet):
     def active(self):
@@ -69,4 +72,10 @@ class Person(models.Model):
     @property
     def company_id(self):
         return self.id_company.id
- 
\ No newline at end of file
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def person_invalidate_identity(sender, instance, **kwargs):
+    """Drops the cached authentication entity of this person"""
+    invalidate_identity(instance.id_person, instance.id_company_id)
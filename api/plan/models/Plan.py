@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+from api.subscription.subscription_cache import invalidate_subscription_state
 
 class Plan(models.Model):
     id_plan = models.AutoField(primary_key=True)
@@ -8,3 +11,14 @@ class Plan(models.Model):
 
     def __str__(self):
         return self.name
+
+
+@receiver(post_save, sender=Plan)
+@receiver(pre_delete, sender=Plan)
+def plan_invalidate_subscription_state(sender, instance, **kwargs):
+    """Drops the cached subscription state of every company subscribed to this plan"""
+    # Imported here because Company depends on this module through Subscription
+    from api.company.models.Company import Company
+    invalidate_subscription_state(
+        Company.objects.filter(subscription__id_plan_id=instance.pk).values_list('id', flat=True)
+    )
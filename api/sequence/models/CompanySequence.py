@@ -0,0 +1,22 @@
+from django.db import models
+from api.company.models.Company import Company
+
+
+class CompanySequence(models.Model):
+    """
+    Last number handed out by a per-company counter (e.g. WH- order refs,
+    FRL- freelancer codes). Incremented atomically by
+    api.sequence.services.ServicesSequence, one row per (company, name).
+    """
+    id_company = models.ForeignKey(Company, on_delete=models.CASCADE, db_column='id_company', related_name='sequences')
+    name = models.CharField(max_length=30)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'api_company_sequence'
+        constraints = [
+            models.UniqueConstraint(fields=['id_company', 'name'], name='company_sequence_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} of company {self.id_company_id}: {self.last_value}"
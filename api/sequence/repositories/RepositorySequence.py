@@ -0,0 +1,27 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from api.sequence.models.CompanySequence import CompanySequence
+
+class RepositorySequence:
+    """
+    Persistence of the per-company counters (CompanySequence).
+    """
+
+    def increment(self, company_id, name):
+        """
+        Adds one to the counter with a single UPDATE ... SET last_value = last_value + 1
+        and returns the new value, or None if the counter does not exist yet.
+        The row stays locked until the surrounding transaction ends.
+        """
+        counter = CompanySequence.objects.filter(id_company_id=company_id, name=name)
+        if not counter.update(last_value=F('last_value') + 1):
+            return None
+        return counter.values_list('last_value', flat=True).get()
+
+    def create(self, company_id, name, last_value):
+        """Creates the counter; does nothing if a concurrent request created it first."""
+        try:
+            with transaction.atomic():
+                CompanySequence.objects.create(id_company_id=company_id, name=name, last_value=last_value)
+        except IntegrityError:
+            pass
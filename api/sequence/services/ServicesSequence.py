@@ -0,0 +1,37 @@
+from django.db import transaction
+from api.sequence.repositories.RepositorySequence import RepositorySequence
+
+class ServicesSequence:
+    """
+    Gap-tolerant, per-company number sequences.
+
+    next_value() is one atomic UPDATE on a single row, so it costs the same
+    whatever the number of existing codes and two parallel requests never get
+    the same number. A number taken by a request that later fails is not
+    reused (same as a database sequence).
+
+    Counters are created on first use, starting after the highest number
+    already in use, computed once by the `initial` callable.
+    """
+
+    def __init__(self):
+        self.repository = RepositorySequence()
+
+    def next_value(self, company_id, name, initial=None):
+        """
+        Args:
+        - company_id: Company that owns the sequence.
+        - name: Sequence name, e.g. 'workhouse'.
+        - initial: Callable returning the last number already in use, only
+          called when the counter does not exist yet.
+        """
+        with transaction.atomic():
+            value = self.repository.increment(company_id, name)
+            if value is None:
+                self.repository.create(company_id, name, initial() if initial else 0)
+                value = self.repository.increment(company_id, name)
+            return value
+
+    def next_code(self, company_id, name, prefix, initial=None, width=4):
+        """Next value formatted as a code, e.g. next_code(1, 'workhouse', 'WH-') -> 'WH-0001'."""
+        return f"{prefix}{self.next_value(company_id, name, initial):0{width}d}"
@@ -1,80 +1,54 @@
 # api/subscription/middleware.py
-from django.utils import timezone
-from django.http import JsonResponse
-from api.company.models.Company import Company
-from api.subscription.models import Subscription
+import logging
 import jwt
-from django.conf import settings
+from django.http import JsonResponse
+from api.user.authentication import decode_request_token
+from api.subscription.subscription_cache import get_subscription_state, is_subscription_valid
+
+logger = logging.getLogger(__name__)
 
 SAFE_METHODS = ("GET","HEAD", "OPTIONS")
 EXEMPT_PATHS = ["/login/", "/register/", "/api/schema/", "/api/docs/", "/user/forgot-password/",           # <–– aquí
     "/user/reset-password-confirm/", "/orders-states/","/registerWithCompany/" ]
 
 class SubscriptionMiddleware:
+    """
+    Blocks write requests of companies without an active subscription.
+
+    The subscription state is read from a per-company cache (see
+    api.subscription.subscription_cache), so a cached request performs no
+    database query, and the JWT decoded here is reused by JWTAuthentication.
+    """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-
-        # Initial log with request details
-        print(f"\n🔔 [{timezone.now()}] Incoming {request.method} request to {request.path}")
+        logger.debug(f"Incoming {request.method} request to {request.path}")
 
         if self._should_exempt_request(request):
-            print("🟡 Exempt request - skipping validation")
+            logger.debug("Exempt request - skipping subscription validation")
             return self.get_response(request)
 
         company_id = self._get_company_id(request)
         if not company_id:
-            print("🔴 No company ID found in request")
+            logger.debug("No company ID found in request")
             return JsonResponse({"detail": "Unauthorized. Valid authentication required."}, status=401)
 
-        try:
-            # Get company with related subscription and plan
-            company = Company.objects.select_related(
-                'subscription',
-                'subscription__id_plan'
-            ).get(pk=company_id)
-            
-            # Log company details
-            print(f"\n🏢 COMPANY DETAILS")
-            print(f"ID: {company.id}")
-            print(f"Name: {company.name}")
-            print(f"License: {company.license_number}")
-            print(f"Created: {company.created_at.date()}")
-
-            subscription = company.subscription
-            if subscription:
-                # Log subscription details
-                print(f"\n📅 SUBSCRIPTION STATUS")
-                print(f"ID: {subscription.id_subscription}")
-                print(f"Status: {subscription.status.upper()}")
-                print(f"Period: {subscription.start_date} to {subscription.end_date}")
-                
-                # Log plan details
-                if subscription.id_plan:
-                    plan = subscription.id_plan
-                    print(f"\n📋 ASSOCIATED PLAN")
-                    print(f"ID: {plan.id_plan}")
-                    print(f"Name: {plan.name}")
-                    print(f"Price: ${plan.price}")
-                    # print(f"Features: {', '.join(plan.features)}")
-                else:
-                    print("\n⚠️ No associated plan found")
-            else:
-                print("\n⚠️ No active subscription found")
-
-        except Company.DoesNotExist:
-            print(f"🔴 Company ID {company_id} not found in database")
+        state = get_subscription_state(company_id)
+        if not state.company_exists:
+            logger.debug(f"Company ID {company_id} not found in database")
             return JsonResponse({"detail": "Company not found"}, status=401)
 
         # Validate subscription
-        is_valid = self._validate_subscription(company)
-        validation_result = "🟢 Valid subscription" if is_valid else "🔴 Invalid subscription"
-        print(f"\n{validation_result} - {'Allowing' if is_valid else 'Blocking'} {request.method} request")
+        is_valid = is_subscription_valid(state)
+        logger.debug(
+            f"Company {company_id} subscription status={state.status} "
+            f"period={state.start_date}..{state.end_date} valid={is_valid}"
+        )
 
         if not is_valid:
             return JsonResponse(
-                {"detail": "Inactive subscription - write operations blocked"}, 
+                {"detail": "Inactive subscription - write operations blocked"},
                 status=403
             )
 
@@ -82,7 +56,7 @@ class SubscriptionMiddleware:
 
     def _should_exempt_request(self, request):
         return (
-            request.method in SAFE_METHODS or 
+            request.method in SAFE_METHODS or
             any(request.path.startswith(p) for p in EXEMPT_PATHS)
         )
 
@@ -90,43 +64,20 @@ class SubscriptionMiddleware:
         """Get company ID in priority order"""
         # 1. Check request context (set by authentication)
         if hasattr(request, 'company_id') and request.company_id:
-            print(f"🔑 Company ID from request context: {request.company_id}")
             return request.company_id
-        
+
         # 2. Fallback to user/person object
         if hasattr(request, 'user') and hasattr(request.user, 'company_id') and request.user.company_id:
-            print(f"👤 Company ID from user object: {request.user.company_id}")
             return request.user.company_id
-        
-        # 3. Last resort: Check auth header directly
-        auth_header = request.headers.get('Authorization', '')
-        if auth_header and ' ' in auth_header:
-            token = auth_header.split()[-1]
-            if token:
-                try:
-                    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-                    company_id = payload.get('company_id')
-                    if company_id:
-                        print(f"🔍 Company ID from token payload: {company_id}")
-                        return company_id
-                    else:
-                        print("⚠️ Token does not contain company_id")
-                except jwt.PyJWTError:
-                    print("⚠️ Failed to decode token for company ID")
-        else:
-            print("⚠️ No Authorization header found or invalid format")
-        
-        return None
-
-    def _validate_subscription(self, company):
-        today = timezone.now().date()
-        
+
+        # 3. Last resort: decode the auth header (memoized for JWTAuthentication)
         try:
-            subscription = company.subscription
-            return (
-                subscription and
-                subscription.status.lower() == "active" and
-                subscription.start_date <= today <= subscription.end_date
-            )
-        except Subscription.DoesNotExist:
-            return False
\ No newline at end of file
+            payload = decode_request_token(request)
+        except jwt.PyJWTError:
+            logger.debug("Failed to decode token for company ID")
+            return None
+
+        if payload is None:
+            logger.debug("No Authorization header found")
+            return None
+        return payload.get('company_id')
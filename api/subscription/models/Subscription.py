@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
 from api.plan.models.Plan import Plan
+from api.subscription.subscription_cache import invalidate_subscription_state
 
 class Subscription(models.Model):
     id_subscription = models.AutoField(primary_key=True)
@@ -11,3 +14,14 @@ class Subscription(models.Model):
 
     def __str__(self):
         return f"Subscription {self.id_subscription} "
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(pre_delete, sender=Subscription)
+def subscription_invalidate_state(sender, instance, **kwargs):
+    """Drops the cached subscription state of every company using this subscription"""
+    # Imported here because Company already imports this module
+    from api.company.models.Company import Company
+    invalidate_subscription_state(
+        Company.objects.filter(subscription_id=instance.pk).values_list('id', flat=True)
+    )
@@ -0,0 +1,64 @@
+# api/subscription/subscription_cache.py
+"""
+Per-company cache of the subscription state checked by SubscriptionMiddleware.
+
+Each entry is a compact SubscriptionState record, so a cached write request
+needs no database query. Entries are invalidated by signal handlers on
+Company, Subscription and Plan; settings.CACHES is shared between processes
+(see the api.E001 system check), so a cancelled subscription stops being
+accepted by every worker at once.
+"""
+import logging
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_CACHE_TTL = getattr(settings, 'SUBSCRIPTION_CACHE_TTL', 300)  # seconds
+
+# company_exists is False when the company id is unknown; status/dates are None
+# when the company has no subscription.
+SubscriptionState = namedtuple('SubscriptionState', ['company_exists', 'status', 'start_date', 'end_date'])
+
+COMPANY_NOT_FOUND = SubscriptionState(False, None, None, None)
+
+
+def _cache_key(company_id):
+    return f"subscription:state:{company_id}"
+
+
+def get_subscription_state(company_id):
+    """Returns the SubscriptionState of a company, loading it with one query on a miss."""
+    key = _cache_key(company_id)
+    state = cache.get(key)
+    if state is not None:
+        return state
+
+    # Imported here so the module can be used from the models' signal handlers
+    from api.company.models.Company import Company
+    row = Company.objects.filter(pk=company_id).values_list(
+        'subscription__status', 'subscription__start_date', 'subscription__end_date'
+    ).first()
+    state = SubscriptionState(True, *row) if row else COMPANY_NOT_FOUND
+    cache.set(key, state, SUBSCRIPTION_CACHE_TTL)
+    logger.debug(f"Subscription state for company {company_id} loaded: {state}")
+    return state
+
+
+def is_subscription_valid(state, today=None):
+    today = today or timezone.now().date()
+    return bool(
+        state.company_exists and
+        state.status and
+        state.status.lower() == "active" and
+        state.start_date <= today <= state.end_date
+    )
+
+
+def invalidate_subscription_state(company_ids):
+    company_ids = list(company_ids)
+    if company_ids:
+        logger.debug(f"Invalidating subscription state for companies {company_ids}")
+        cache.delete_many([_cache_key(company_id) for company_id in company_ids])
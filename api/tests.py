@@ -1,3 +1,1357 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+import base64
+import io
+import csv
+import datetime
+import json
+import shutil
+import tempfile
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+from io import StringIO
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.files.storage import FileSystemStorage
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.mail.backends.base import BaseEmailBackend
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from PIL import Image as PILImage
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from api.company.models.Company import Company
+from api.customerFactory.models.CustomerFactory import CustomerFactory
+from api.job.models.Job import Job
+from api.order.models.Order import Order
+from api.order.repositories.RepositoryOrder import RepositoryOrder
+from api.order.repositories.RepositoryCompanyDailyStats import RepositoryCompanyDailyStats
+from api.order.repositories.RepositoryOrderCostRollup import RepositoryOrderCostRollup, ROLLUP_FIELDS
+from api.order.models.OrderCostRollup import OrderCostRollup
+from api.workCost.models.WorkCost import WorkCost
+from api.order.services.ServicesOrder import ServicesOrder
+from api.costFuel.models.CostFuel import CostFuel
+from api.costFuel.services.ServicesCostFuel import ServicesCostFuel
+from api.truck.models.Truck import Truck
+from api.order.serializers.OrderSerializer import OrderSerializer
+from api.person.models.Person import Person
+from api.imageJob.models.ImageJob import ImageJob
+from api.imageJob.services.ServicesImageJob import ServicesImageJob, IMAGE_JOBS_RETRY_SECONDS
+from api.assign.models.Assign import Assign, AssignAudit
+from api.operator.models.Operator import Operator
+from api.payment.models.Payment import Payment
+from api.sequence.services.ServicesSequence import ServicesSequence
+from api.upload.services.ServicesUpload import ServicesUpload
+from api.geo.services import ServicesGeo as geo_services
+from api.order.controllers.ControllerOrderLocations import OrderLocationController
+from api.order.controllers.ControllerOrder import ControllerOrder
+from api.common.pagination import KeysetPagination, ORDER_KEYSET
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APIClient, force_authenticate
+from api.payment.controllers.ControllerPayment import ControllerPayment
+from api.costFuel.controllers.CostFuelController import ControllerCostFuel
+from api.truck.controllers.ControllerTruck import ControllerTruck
+from api.customerFactory.controllers.ControllerCustomerFactory import CustomerFactoryController
+from api.assign.controllers.ControllerAssign import ControllerAssign
+from api.assign.repositories.RepositoryAssign import RepositoryAssign
+from api.operator.controllers.ControllerOperator import ControllerOperator
+from api.operator.serializers.SerializerOperator import SerializerOperator
+from api.utils import storage_index
+from api.utils.image_processor import ImageProcessor
+from api.utils.s3utils import IMAGE_DERIVATIVE_SIZES, delete_derivatives, derivative_path, derivative_paths
+from api.utils.storage_index import reconcile_field
+from api.user.serializers.UserSerializer import UserSerializer
+from api.user.models.User import User
+from api.emailOutbox.models.EmailOutbox import EmailOutbox
+from api.emailOutbox.services.ServicesEmailOutbox import ServicesEmailOutbox, EMAIL_OUTBOX_RETRY_SECONDS
+from api.checks import check_shared_cache
+from api.user import identity_cache
+from api.costFuel import efficiency_cache
+from api.subscription import subscription_cache
+from api.subscription.models.Subscription import Subscription
+from api.plan.models.Plan import Plan
+from api.user.authentication import JWTAuthentication
 
 # Create your tests here.
+
+def create_company(code, name):
+    return Company.objects.create(license_number=f"LIC-{code}", name=name, address="Main St", zip_code="00000")
+
+
+class CompanyTestCase(TestCase):
+    """Company with a job and a client person, the fixture most of the order tests start from."""
+
+    COMPANY = ("TEST", "Test Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = create_company(*cls.COMPANY)
+        cls.job = Job.objects.create(name="moving", id_company=cls.company)
+        cls.person = Person.objects.create(first_name="Client", last_name="Test", id_company=cls.company)
+
+
+class OrderListQueryPlanTests(CompanyTestCase):
+    """The shared order listing queryset must serialize a page without per-row queries."""
+
+    PAGE_SIZE = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        factory = CustomerFactory.objects.create(name="Factory")
+        for i in range(cls.PAGE_SIZE):
+            person = Person.objects.create(
+                first_name=f"Client{i}", last_name="Test", email=f"client{i}@test.com", id_company=cls.company
+            )
+            Order.objects.create(
+                key_ref=f"REF-{i:04d}",
+                date=datetime.date(2025, 1, 1) + datetime.timedelta(days=i),
+                id_company=cls.company,
+                person=person,
+                job=cls.job,
+                customer_factory=factory,
+                state_usa="USA, Texas, Austin",
+            )
+
+    def test_order_page_is_serialized_with_a_single_query(self):
+        orders = RepositoryOrder().get_all_orders_any_status(self.company.id)
+
+        with self.assertNumQueries(1):
+            data = OrderSerializer(orders[:self.PAGE_SIZE], many=True, context={}).data
+
+        self.assertEqual(len(data), self.PAGE_SIZE)
+        self.assertEqual(data[0]["job_name"], "moving")
+        self.assertEqual(data[0]["customer_factory_name"], "Factory")
+        self.assertEqual(data[0]["person"]["first_name"], f"Client{self.PAGE_SIZE - 1}")
+
+
+class OrderSearchDocumentTests(CompanyTestCase):
+    """Order.search_document follows its sources and backs search_mode=fast."""
+
+    COMPANY = ("SEARCH", "Search Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.client_person = Person.objects.create(first_name="José", last_name="Núñez", id_company=cls.company)
+        cls.order = Order.objects.create(
+            key_ref="WH-0042", id_company=cls.company, person=cls.client_person, job=cls.job,
+            state_usa="USA, Texas, Austin",
+        )
+
+    def search(self, term):
+        orders = RepositoryOrder().get_all_orders_any_status(self.company.id, search_filter=term, search_mode="fast")
+        return list(orders.values_list("key", flat=True))
+
+    def test_document_is_normalized(self):
+        self.assertEqual(self.order.search_document, "wh-0042 jose nunez usa, texas, austin")
+        self.assertEqual(self.search("NÚÑEZ"), [self.order.key])
+        self.assertEqual(self.search("wh-0042"), [self.order.key])
+        self.assertEqual(self.search("dallas"), [])
+
+    def test_document_follows_order_and_person_saves(self):
+        self.order.state_usa = "USA, Texas, Dallas"
+        self.order.save(update_fields=["state_usa"])
+        self.assertEqual(self.search("dallas"), [self.order.key])
+
+        self.client_person.last_name = "Pérez"
+        self.client_person.save()
+        self.assertEqual(self.search("perez"), [self.order.key])
+        self.assertEqual(self.search("nunez"), [])
+
+
+class OrderLocationColumnsTests(CompanyTestCase):
+    """state_usa is parsed into country/state/city on save and filtered by equality."""
+
+    COMPANY = ("LOC", "Location Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.orders = [
+            Order.objects.create(id_company=cls.company, person=cls.person, job=cls.job, state_usa=location)
+            for location in ("USA, Texas, Austin", "USA,  Texas , Houston", "USA-Florida-Miami", None)
+        ]
+
+    def test_location_is_parsed_on_save(self):
+        austin, houston, miami, empty = self.orders
+        self.assertEqual((houston.country, houston.state, houston.city), ("USA", "Texas", "Houston"))
+        self.assertEqual((miami.country, miami.state, miami.city), ("USA", "Florida", "Miami"))
+        self.assertEqual((empty.country, empty.state, empty.city), (None, None, None))
+
+        austin.state_usa = "USA, California, Los Angeles"
+        austin.save(update_fields=["state_usa"])
+        austin.refresh_from_db()
+        self.assertEqual((austin.state, austin.city), ("California", "Los Angeles"))
+
+    def test_location_filters(self):
+        repository = RepositoryOrder()
+        self.assertEqual(repository.filter_by_location(self.company.id, "USA", "Texas").count(), 2)
+        self.assertEqual(repository.filter_by_location(self.company.id, city="Miami").count(), 1)
+        self.assertEqual(
+            repository.get_all_orders_any_status(self.company.id, location_filter="USA, Texas, Houston").count(), 1
+        )
+        self.assertEqual(
+            repository.get_registered_locations(self.company.id),
+            ["USA, Florida, Miami", "USA, Texas, Austin", "USA, Texas, Houston"],
+        )
+
+
+class DirectUploadTests(CompanyTestCase):
+    """
+    Presign/finalize flow of api.upload. Presigned POSTs are signed offline by
+    boto3 against a fake bucket; the upload itself lands in a local filesystem
+    storage standing in for S3.
+    """
+
+    COMPANY = ("UP", "Upload Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_company = create_company("OTHER", "Other Co")
+        cls.order = Order.objects.create(
+            key_ref="REF-UP", date=datetime.date(2025, 1, 1), id_company=cls.company, person=cls.person, job=cls.job
+        )
+
+    def setUp(self):
+        self.field = Order._meta.get_field('evidence')
+        original_storage = self.field.storage
+        self.addCleanup(setattr, self.field, 'storage', original_storage)
+        self.field.storage = S3Boto3Storage(
+            bucket_name='test-bucket', access_key='test', secret_key='test',
+            region_name='us-east-1', location='media', default_acl=None,
+        )
+        self.service = ServicesUpload()
+
+    def use_local_storage(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, True)
+        self.field.storage = FileSystemStorage(location=location, base_url='/media/')
+        return self.field.storage
+
+    def presign(self, company=None):
+        return self.service.presign(
+            (company or self.company).id, 'order', str(self.order.key), 'evidence', 'image/png'
+        )
+
+    def test_presign_issues_post_for_company_key(self):
+        upload = self.presign()
+
+        self.assertTrue(upload['key'].startswith(f"media/companies/{self.company.id}/orders/evidence/"))
+        self.assertTrue(upload['key'].endswith('.png'))
+        self.assertEqual(upload['fields']['key'], f"media/{upload['key']}")
+        self.assertEqual(upload['fields']['Content-Type'], 'image/png')
+        self.assertIn('policy', upload['fields'])
+
+    def test_presign_rejects_other_company_and_unknown_field(self):
+        with self.assertRaises(NotFound):
+            self.presign(company=self.other_company)
+        with self.assertRaises(ValidationError):
+            self.service.presign(self.company.id, 'order', str(self.order.key), 'key_ref', 'image/png')
+        with self.assertRaises(ValidationError):
+            self.service.presign(self.company.id, 'order', str(self.order.key), 'evidence', 'text/html')
+
+    def test_finalize_records_key_and_queues_processing(self):
+        upload = self.presign()
+        storage = self.use_local_storage()
+
+        # Not uploaded yet
+        with self.assertRaises(ValidationError):
+            self.service.finalize(self.company.id, upload['upload_token'])
+
+        # The client POSTs the file to the bucket
+        self.assertEqual(storage.save(upload['key'], ContentFile(b'png-bytes')), upload['key'])
+
+        with self.assertRaises(PermissionDenied):
+            self.service.finalize(self.other_company.id, upload['upload_token'])
+
+        instance, field_name = self.service.finalize(self.company.id, upload['upload_token'])
+
+        self.assertEqual(field_name, 'evidence')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.evidence.name, upload['key'])
+        job = ImageJob.objects.get(model_name='order', object_id=str(self.order.key), field_name='evidence')
+        self.assertEqual(job.source_name, upload['key'])
+        self.assertEqual(job.status, ImageJob.STATUS_PENDING)
+
+        # Retrying the finalize is a no-op
+        self.service.finalize(self.company.id, upload['upload_token'])
+        self.assertEqual(ImageJob.objects.filter(field_name='evidence').count(), 1)
+
+    def test_finalize_rejects_tampered_token(self):
+        upload = self.presign()
+        with self.assertRaises(ValidationError):
+            self.service.finalize(self.company.id, upload['upload_token'] + 'x')
+
+
+class AssignBulkAuditTests(CompanyTestCase):
+    """bulk_update_with_audit must audit like Assign.save() with a constant number of queries."""
+
+    COMPANY = ("AUD", "Audit Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.order = Order.objects.create(
+            key_ref="REF-AUD", date=datetime.date(2025, 1, 1), id_company=cls.company, person=cls.person, job=cls.job
+        )
+        cls.operators = []
+        for i in range(30):
+            operator_person = Person.objects.create(
+                first_name=f"Op{i}", last_name="Test", email=f"op{i}@audit.com", id_company=cls.company
+            )
+            cls.operators.append(Operator.objects.create(person=operator_person, code=f"OP{i}", salary=100))
+        cls.payment = Payment.objects.create(
+            value=100, status='paid', date_start=datetime.date(2025, 1, 1), date_end=datetime.date(2025, 1, 7)
+        )
+
+    def create_assigns(self, count):
+        return [
+            Assign.objects.create(operator=operator, order=self.order, rol='helper')
+            for operator in self.operators[:count]
+        ]
+
+    def pay(self, assigns):
+        for assign in assigns:
+            assign.payment = self.payment
+        return Assign.objects.bulk_update_with_audit(assigns, ['payment'])
+
+    def test_query_count_does_not_grow_with_assignments(self):
+        assigns = self.create_assigns(30)
+        with self.assertNumQueries(5):
+            self.assertEqual(self.pay(assigns[:3]), 3)
+        with self.assertNumQueries(5):
+            self.assertEqual(self.pay(assigns[3:]), 27)
+        self.assertEqual(AssignAudit.objects.filter(new_payment=self.payment).count(), 30)
+
+    def test_audit_rows_match_save(self):
+        assign = self.create_assigns(1)[0]
+        self.pay([assign])
+
+        audit = AssignAudit.objects.get(assign=assign)
+        self.assertIsNone(audit.old_payment_id)
+        self.assertEqual(audit.new_payment_id, self.payment.pk)
+        self.assertEqual(audit.old_operator_id, audit.new_operator_id)
+        self.assertEqual(audit.old_rol, 'helper')
+        self.assertEqual(audit.new_assigned_at, audit.old_assigned_at)
+
+        # Unchanged values are not audited
+        self.pay([assign])
+        self.assertEqual(AssignAudit.objects.filter(assign=assign).count(), 1)
+
+        # save() writes the same kind of row
+        assign.rol = 'driver'
+        assign.save()
+        audit = AssignAudit.objects.filter(assign=assign).order_by('-id').first()
+        self.assertEqual((audit.old_rol, audit.new_rol), ('helper', 'driver'))
+        self.assertEqual(audit.old_payment_id, self.payment.pk)
+
+
+class CompanySequenceTests(TestCase):
+    """Per-company counters behind the WH- and FRL- codes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = create_company("SEQ", "Seq Co")
+        cls.other_company = create_company("SEQ2", "Seq Co 2")
+
+    def test_counter_starts_after_initial_and_is_per_company(self):
+        service = ServicesSequence()
+        initial_calls = []
+
+        def initial():
+            initial_calls.append(1)
+            return 9999
+
+        self.assertEqual(service.next_code(self.company.id, 'workhouse', 'WH-', initial), 'WH-10000')
+        self.assertEqual(service.next_code(self.company.id, 'workhouse', 'WH-', initial), 'WH-10001')
+        self.assertEqual(len(initial_calls), 1)
+
+        self.assertEqual(service.next_code(self.other_company.id, 'workhouse', 'WH-'), 'WH-0001')
+        self.assertEqual(service.next_code(self.company.id, 'freelance', 'FRL-'), 'FRL-0001')
+
+    def test_next_value_is_a_single_update(self):
+        service = ServicesSequence()
+        service.next_value(self.company.id, 'workhouse')
+        # SAVEPOINT, UPDATE, SELECT, RELEASE
+        with self.assertNumQueries(4):
+            self.assertEqual(service.next_value(self.company.id, 'workhouse'), 2)
+
+
+class GeoDatasetTests(TestCase):
+    """OrderLocationController answers from the in-process index of the stored dataset."""
+
+    DATASET = [
+        {"name": "United States", "iso2": "US", "iso3": "USA", "states": [
+            {"name": "Texas", "state_code": "TX", "cities": ["Houston", "Austin"]},
+            {"name": "Florida", "state_code": "FL", "cities": ["Miami"]},
+        ]},
+        {"name": "Canada", "iso2": "CA", "iso3": "CAN", "states": []},
+    ]
+
+    def setUp(self):
+        geo_services._index = None
+        self.addCleanup(setattr, geo_services, "_index", None)
+
+    def get(self, **params):
+        request = APIRequestFactory().get("/orders-locations/", params)
+        return OrderLocationController.as_view()(request)
+
+    def test_not_loaded_dataset_is_unavailable(self):
+        self.assertEqual(self.get().status_code, 503)
+
+    def test_lookups_are_served_without_queries(self):
+        self.assertEqual(geo_services.ServicesGeo().load_dataset(self.DATASET), (2, 2, 3))
+
+        with self.assertNumQueries(0):
+            countries = self.get().data["data"]
+            states = self.get(type="states", country="united states").data["data"]
+            cities = self.get(type="cities", country="United States", state="TEXAS").data["data"]
+
+        self.assertEqual([c["code"] for c in countries], ["CA", "US"])
+        self.assertEqual(states, [{"name": "Florida", "state_code": "FL"}, {"name": "Texas", "state_code": "TX"}])
+        self.assertEqual(cities, [{"name": "Austin"}, {"name": "Houston"}])
+
+
+class CompanyDailyStatsTests(CompanyTestCase):
+    """The daily totals follow Order and CostFuel changes like a full rebuild would."""
+
+    COMPANY = ("DAILY", "Daily Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.truck = Truck.objects.create(number_truck="T-1", type="box", name="Truck", id_company=cls.company)
+
+    def create_order(self, day, **fields):
+        return Order.objects.create(
+            date=day, id_company=self.company, person=self.person, job=self.job, income=100, expense=10, **fields
+        )
+
+    def stored(self):
+        return sorted(
+            (stats.day, stats.order_count, stats.status_counts, stats.income, stats.fuel_cost)
+            for stats in RepositoryCompanyDailyStats().get_range(self.company.id, datetime.date.min, datetime.date.max)
+        )
+
+    def test_incremental_updates_match_rebuild(self):
+        jan_1, jan_2 = datetime.date(2025, 1, 1), datetime.date(2025, 1, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.create_order(jan_1)
+            second = self.create_order(jan_1, status="finished")
+            CostFuel.objects.create(order=first, truck=self.truck, cost_fuel=5, cost_gl=1, fuel_qty=1, distance=1)
+        self.assertEqual(self.stored(), [(jan_1, 2, {"pending": 1, "finished": 1}, 200.0, 5.0)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.date = jan_2
+            second.save()
+            first.delete()
+        incremental = self.stored()
+        self.assertEqual(incremental, [(jan_2, 1, {"finished": 1}, 100.0, 0.0)])
+
+        RepositoryCompanyDailyStats().rebuild(company_id=self.company.id)
+        self.assertEqual(self.stored(), incremental)
+        self.assertEqual(
+            ServicesOrder().count_orders_per_day_in_month(self.company.id, 2025, 1), [{"day": jan_2, "count": 1}]
+        )
+
+    def calendar_request(self, action, company_id, params=None, **kwargs):
+        request = APIRequestFactory().get("/orders-count-orders-per-day/", params or {})
+        request.company_id = company_id
+        force_authenticate(request, user=self.person)
+        return ControllerOrder.as_view({"get": action})(request, **kwargs)
+
+    def test_invalid_calendar_parameters_are_rejected(self):
+        for year in (0, 10000):
+            response = self.calendar_request("count_orders_per_day", self.company.id, year=year, month=1)
+            self.assertEqual(response.status_code, 400, year)
+        # The service's ValidationError (no company context) is a 400 too
+        response = self.calendar_request("count_orders_per_day_range", None, {"start": "2025-01"})
+        self.assertEqual(response.status_code, 400)
+        response = self.calendar_request("count_orders_per_day_range", self.company.id, {"start": "2025-01"})
+        self.assertEqual(response.status_code, 200)
+
+
+class ImageFieldTrackingTests(CompanyTestCase):
+    """Saving an order only processes the image fields that received a new file."""
+
+    COMPANY = ("FILES", "Files Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.order = Order.objects.create(
+            date=datetime.date(2025, 1, 1), id_company=cls.company, person=cls.person, job=cls.job,
+            evidence="companies/orders/evidence/stored.png",
+        )
+
+    def test_loaded_files_are_not_reported_as_changed(self):
+        order = Order.objects.get(pk=self.order.pk)
+        jobs = ImageJob.objects.count()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(order.changed_file_fields(), {})
+        order.status = "finished"
+        order.save()
+        self.assertEqual(ImageJob.objects.count(), jobs)
+
+    def test_replaced_file_reports_previous_name(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.evidence = "companies/orders/evidence/new.png"
+
+        self.assertEqual(order.changed_file_fields(update_fields=["status"]), {})
+        self.assertEqual(order.changed_file_fields(), {"evidence": "companies/orders/evidence/stored.png"})
+        order.save()
+        self.assertEqual(order.changed_file_fields(), {})
+        self.assertTrue(ImageJob.objects.filter(
+            object_id=str(order.pk), field_name="evidence", source_name="companies/orders/evidence/new.png"
+        ).exists())
+
+    def test_deferred_field_is_resolved_with_one_query(self):
+        order = Order.objects.only("key").get(pk=self.order.pk)
+        order.evidence = "companies/orders/evidence/stored.png"
+
+        with self.assertNumQueries(1):
+            self.assertEqual(order.changed_file_fields(update_fields=["evidence"]), {})
+
+    def test_failed_job_is_retried_later(self):
+        field = Order._meta.get_field("evidence")
+        self.addCleanup(setattr, field, "storage", field.storage)
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, True)
+        field.storage = FileSystemStorage(location=location)  # the upload is not there
+        job = ImageJob.objects.get(object_id=str(self.order.pk), field_name="evidence")
+        service = ServicesImageJob()
+
+        # The timer is not started here, only checked
+        with mock.patch.object(ServicesImageJob, "_retry_later") as retry_later, \
+                self.assertLogs("api.imageJob.services.ServicesImageJob", "ERROR"):
+            self.assertTrue(service.run_job(job.pk))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (ImageJob.STATUS_PENDING, 1))
+            retry_later.assert_called_once_with(job.pk, IMAGE_JOBS_RETRY_SECONDS)
+
+            ImageJob.objects.filter(pk=job.pk).update(attempts=2)
+            service.run_job(job.pk)
+            job.refresh_from_db()
+            self.assertEqual(job.status, ImageJob.STATUS_FAILED)
+            self.assertEqual(retry_later.call_count, 1)
+
+
+class ImageDerivativeTests(CompanyTestCase):
+    """An image job stores the renditions under derivative_path and the serializers map each size to its key."""
+
+    COMPANY = ("THUMB", "Thumb Co")
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, True)
+        self.storage = FileSystemStorage(location=location, base_url="/media/")
+        for model, name in ((Order, "evidence"), (Operator, "photo")):
+            field = model._meta.get_field(name)
+            self.addCleanup(setattr, field, "storage", field.storage)
+            field.storage = self.storage
+        media = override_settings(MEDIA_ROOT=location)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def upload(self, name, size=(2400, 1200)):
+        buffer = io.BytesIO()
+        PILImage.new("RGB", size, "white").save(buffer, format="PNG")
+        return self.storage.save(name, ContentFile(buffer.getvalue()))
+
+    def process(self, instance, field_name):
+        job = ImageJob.objects.get(object_id=str(instance.pk), field_name=field_name)
+        self.assertTrue(ServicesImageJob().run_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.STATUS_DONE)
+        instance.refresh_from_db()
+        return getattr(instance, field_name)
+
+    def test_job_writes_every_size_and_swaps_the_field(self):
+        raw = self.upload("evidences/raw.png")
+        order = Order.objects.create(date=datetime.date(2025, 1, 1), id_company=self.company, person=self.person,
+                                     job=self.job, evidence=raw)
+        self.assertEqual(
+            OrderSerializer(order).data["evidence_urls"],
+            {str(size): self.storage.url(raw) for size in IMAGE_DERIVATIVE_SIZES},
+        )
+
+        evidence = self.process(order, "evidence")
+        self.assertTrue(evidence.name.endswith("_1200.jpeg"))
+        self.assertFalse(self.storage.exists(raw))
+        paths = derivative_paths(evidence.name)
+        self.assertEqual(paths[1200], evidence.name)
+        for size, dimensions in ((1200, (1200, 600)), (256, (256, 128)), (64, (64, 32))):
+            self.assertEqual(paths[size], derivative_path(evidence.name, size))
+            with self.storage.open(paths[size]) as stored, PILImage.open(stored) as image:
+                self.assertEqual((image.format, image.size), ("JPEG", dimensions))
+        self.assertEqual(
+            OrderSerializer(order).data["evidence_urls"],
+            {str(size): self.storage.url(path) for size, path in paths.items()},
+        )
+
+        delete_derivatives(evidence)
+        self.assertEqual([self.storage.exists(paths[size]) for size in (64, 256, 1200)], [False, False, True])
+
+    def test_operator_photo_urls(self):
+        raw = self.upload("operators/photos/raw.png", size=(300, 600))
+        person = Person.objects.create(first_name="Op", last_name="Photo", id_company=self.company)
+        operator = Operator.objects.create(person=person, code="OP-THUMB", salary=10, photo=raw)
+
+        photo = self.process(operator, "photo")
+        with self.storage.open(derivative_path(photo.name, 256)) as stored, PILImage.open(stored) as image:
+            self.assertEqual(image.size, (128, 256))
+        self.assertEqual(
+            SerializerOperator(operator).data["photo_urls"],
+            {str(size): self.storage.url(derivative_path(photo.name, size)) for size in IMAGE_DERIVATIVE_SIZES},
+        )
+
+
+class ImageProcessorTests(TestCase):
+    """Encoded renditions are spooled temp files that must be released on every path."""
+
+    def test_failed_derivatives_release_their_temp_files(self):
+        buffer = io.BytesIO()
+        PILImage.new("RGB", (400, 300), "white").save(buffer, format="PNG")
+        encode = ImageProcessor._encode
+        encoded = []
+
+        def failing_encode(image, name, format, save_kwargs):
+            if encoded:
+                raise OSError("disk full")
+            encoded.append(encode(image, name, format, save_kwargs))
+            return encoded[-1]
+
+        with mock.patch.object(ImageProcessor, "_encode", side_effect=failing_encode), \
+                self.assertLogs("api.utils.image_processor", "ERROR"):
+            derivatives = ImageProcessor.generate_derivatives(ContentFile(buffer.getvalue(), name="photo.png"))
+        self.assertEqual(derivatives, {})
+        self.assertTrue(encoded[0].closed)
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError("provider unavailable")
+
+
+class UnreachableEmailBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionError("provider unreachable")
+
+
+class EmailOutboxTests(TestCase):
+    """Password reset emails are queued with the request and sent by the outbox worker."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = create_company("MAIL", "Mail Co")
+        cls.person = Person.objects.create(
+            first_name="Ana", last_name="Test", email="ana@example.com", id_company=cls.company
+        )
+        cls.user = User.objects.create_user("ana", "secret", person=cls.person, id_company=cls.company)
+
+    def test_request_queues_email_and_worker_sends_it(self):
+        response = APIClient().post("/user/forgot-password/", {"email": "ANA@example.com"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        queued = EmailOutbox.objects.get()
+        self.assertEqual((queued.kind, queued.to_email, queued.status), ("password_reset", "ana@example.com", "pending"))
+        self.assertIn("/user/reset-password-confirm/?uid=", queued.text_body)
+
+        self.assertEqual(ServicesEmailOutbox().send_due(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["ana@example.com"])
+        self.assertIn("Hello Ana", mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].alternatives[0].mimetype, "text/html")
+        sent = EmailOutbox.objects.get()
+        self.assertEqual(sent.status, EmailOutbox.STATUS_SENT)
+        # The reset link is not kept once delivered
+        self.assertEqual((sent.text_body, sent.html_body), ("", None))
+        self.assertEqual(ServicesEmailOutbox().send_due(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND="api.tests.FailingEmailBackend")
+    def test_failures_back_off_then_dead_letter(self):
+        service = ServicesEmailOutbox()
+        email = service.enqueue("password_reset", "ana@example.com", {"first_name": "Ana", "reset_url": "http://x"})
+
+        self.assertEqual(service.send_due(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (EmailOutbox.STATUS_PENDING, 1))
+        self.assertIn("provider unavailable", email.last_error)
+        # Not due again until the backoff expires
+        self.assertEqual(service.send_due(), (0, 0))
+
+        EmailOutbox.objects.filter(pk=email.pk).update(attempts=4, next_attempt_at=email.created_at)
+        self.assertEqual(service.send_due(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (EmailOutbox.STATUS_DEAD, 5))
+        self.assertEqual(service.requeue_dead(), 1)
+
+    @override_settings(EMAIL_BACKEND="api.tests.UnreachableEmailBackend")
+    def test_unreachable_provider_is_retried_later(self):
+        service = ServicesEmailOutbox()
+        email = service.enqueue("password_reset", "ana@example.com", {"first_name": "Ana", "reset_url": "http://x"})
+
+        with mock.patch.object(ServicesEmailOutbox, "_retry_later") as retry_later, \
+                self.assertLogs("api.emailOutbox.services.ServicesEmailOutbox", "ERROR"):
+            self.assertEqual(service.send_due(), (0, 0))
+        retry_later.assert_called_once_with(EMAIL_OUTBOX_RETRY_SECONDS)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (EmailOutbox.STATUS_PENDING, 0))
+
+
+class CompanyScopedListingTests(TestCase):
+    """Payment and CostFuel listings only show the caller's company, paged, with totals of the whole window."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company, cls.other_company = [create_company(f"LST{i}", f"List Co {i}") for i in range(2)]
+        cls.person = Person.objects.create(first_name="Admin", last_name="Test", id_company=cls.company)
+        cls.user = User.objects.create_user("lister", "secret", person=cls.person, id_company=cls.company)
+        for company in (cls.company, cls.other_company):
+            job = Job.objects.create(name=f"moving {company.id}", id_company=company)
+            truck = Truck.objects.create(number_truck=f"T-{company.id}", type="box", name="Truck", id_company=company)
+            operator = Operator.objects.create(
+                person=Person.objects.create(first_name="Op", last_name="Test", id_company=company), code=f"OP{company.id}", salary=10
+            )
+            for day in range(1, 4):
+                order = Order.objects.create(
+                    date=datetime.date(2025, 1, day), id_company=company, person=cls.person, job=job
+                )
+                payment = Payment.objects.create(
+                    value=100 * day, bonus=day, status="paid",
+                    date_payment=datetime.datetime(2025, 1, day, tzinfo=datetime.timezone.utc),
+                )
+                Assign.objects.create(operator=operator, order=order, truck=truck, payment=payment, rol="driver")
+                CostFuel.objects.create(order=order, truck=truck, cost_fuel=10 * day, cost_gl=1, fuel_qty=day, distance=1)
+
+    def get(self, controller, path, **params):
+        request = APIRequestFactory().get(path, params)
+        request.company_id = self.company.id
+        force_authenticate(request, user=self.user)
+        return controller.as_view({"get": "list"})(request)
+
+    def test_payments_are_scoped_paged_and_totalled(self):
+        first = self.get(ControllerPayment, "/payments/", page_size=2).data
+        self.assertEqual(first["aggregates"], {"count": 3, "total_value": 600, "total_bonus": 6})
+        self.assertEqual([p["value"] for p in first["data"]["results"]], ["300.00", "200.00"])
+
+        cursor = parse_qs(urlparse(first["data"]["next"]).query)["cursor"][0]
+        second = self.get(ControllerPayment, "/payments/", page_size=2, cursor=cursor).data
+        self.assertEqual([p["value"] for p in second["data"]["results"]], ["100.00"])
+        self.assertIsNone(second["data"]["next"])
+
+        window = self.get(ControllerPayment, "/payments/", date_from="2025-01-02").data
+        self.assertEqual(window["aggregates"]["total_value"], 500)
+        self.assertEqual(self.get(ControllerPayment, "/payments/", date_to="2025-13-01").status_code, 400)
+
+    def test_cost_fuels_are_scoped_and_totalled(self):
+        data = self.get(ControllerCostFuel, "/costfuels/", date_to="2025-01-02").data["results"]
+        self.assertEqual(data["aggregates"], {"count": 2, "total_cost_fuel": 30.0, "total_fuel_qty": 3.0})
+        self.assertEqual([c["cost_fuel"] for c in data["data"]], [20.0, 10.0])
+
+        keyset = self.get(ControllerCostFuel, "/costfuels/", pagination="cursor", page_size=1).data
+        self.assertEqual(keyset["results"]["aggregates"]["count"], 3)
+        self.assertEqual(len(keyset["results"]["data"]), 1)
+        self.assertIsNotNone(keyset["next"])
+
+
+# The shared DatabaseCache of settings.CACHES would add its own queries to assertNumQueries
+LOCAL_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class FuelEfficiencyTests(CompanyTestCase):
+    """The fuel efficiency report is aggregated by the database and cached until the fuel data changes."""
+
+    COMPANY = ("FUEL", "Fuel Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.trucks = [
+            Truck.objects.create(number_truck=f"F-{i}", type="box", name="Truck", id_company=cls.company)
+            for i in range(2)
+        ]
+        # ISO week 2025-W01 starts on Monday 2024-12-30
+        cls.orders = [
+            Order.objects.create(date=day, id_company=cls.company, person=cls.person, job=cls.job)
+            for day in (datetime.date(2024, 12, 30), datetime.date(2025, 1, 6))
+        ]
+        for truck, order, cost, gallons, miles in (
+            (cls.trucks[0], cls.orders[0], 40, 10, 80),
+            (cls.trucks[0], cls.orders[1], 60, 12, 120),
+            (cls.trucks[1], cls.orders[1], 50, 10, 0),
+        ):
+            CostFuel.objects.create(order=order, truck=truck, cost_fuel=cost, cost_gl=cost / gallons,
+                                    fuel_qty=gallons, distance=miles)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_report_is_grouped_by_truck_and_iso_week(self):
+        with self.assertNumQueries(3):
+            report = ServicesCostFuel().get_fuel_efficiency(self.company.id)
+
+        self.assertEqual(report["fleet"]["entries"], 3)
+        self.assertAlmostEqual(report["fleet"]["cost_per_mile"], 150 / 200)
+        first, second = report["trucks"]
+        self.assertEqual((first["truck__number_truck"], first["total_distance"]), ("F-0", 200))
+        self.assertAlmostEqual(first["cost_per_gallon"], 100 / 22)
+        self.assertIsNone(second["cost_per_mile"])  # no distance recorded
+        self.assertEqual(
+            [(week["iso_year"], week["iso_week"], week["total_distance"]) for week in report["weeks"]],
+            [(2025, 1, 80), (2025, 2, 120)],
+        )
+
+    def test_report_is_cached_until_fuel_changes(self):
+        service = ServicesCostFuel()
+        service.get_fuel_efficiency(self.company.id, truck_id=self.trucks[0].id_truck)
+        with self.assertNumQueries(0):
+            service.get_fuel_efficiency(self.company.id, truck_id=self.trucks[0].id_truck)
+
+        CostFuel.objects.create(order=self.orders[0], truck=self.trucks[0], cost_fuel=10, cost_gl=5,
+                                fuel_qty=2, distance=20)
+        report = service.get_fuel_efficiency(self.company.id, truck_id=self.trucks[0].id_truck)
+        self.assertEqual(report["fleet"]["entries"], 3)
+
+
+class DataVersionETagTests(TestCase):
+    """Read endpoints answer If-None-Match with 304 until the company's data changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company, cls.other_company = [create_company(f"ETAG{i}", f"ETag Co {i}") for i in range(2)]
+        cls.person = Person.objects.create(first_name="Admin", last_name="Test", id_company=cls.company)
+        cls.user = User.objects.create_user("etag", "secret", person=cls.person, id_company=cls.company)
+
+    def get(self, controller, action, path, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        request = APIRequestFactory().get(path, **headers)
+        request.company_id = self.company.id
+        force_authenticate(request, user=self.user)
+        return controller.as_view({"get": action})(request)
+
+    def create_truck(self, company, number):
+        with self.captureOnCommitCallbacks(execute=True):
+            Truck.objects.create(number_truck=number, type="box", name="Truck", id_company=company)
+
+    def test_unchanged_list_is_not_modified(self):
+        self.create_truck(self.company, "E-1")
+        first = self.get(ControllerTruck, "get_avaliable", "/trucks/available/")
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+
+        # Only the version counters are read
+        with self.assertNumQueries(1):
+            cached = self.get(ControllerTruck, "get_avaliable", "/trucks/available/", etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], etag)
+        self.assertNotEqual(self.get(ControllerTruck, "get_avaliable", "/trucks/available/?page_size=5")["ETag"], etag)
+
+        # Another company's trucks do not change this company's list
+        self.create_truck(self.other_company, "E-2")
+        self.assertEqual(self.get(ControllerTruck, "get_avaliable", "/trucks/available/", etag).status_code, 304)
+
+        self.create_truck(self.company, "E-3")
+        changed = self.get(ControllerTruck, "get_avaliable", "/trucks/available/", etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def test_shared_resources_use_a_global_counter(self):
+        etag = self.get(CustomerFactoryController, "list", "/customer-factories/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomerFactory.objects.create(name="Shared factory")
+        self.assertEqual(self.get(CustomerFactoryController, "list", "/customer-factories/", etag).status_code, 200)
+
+    def test_bulk_assignment_changes_the_assign_list(self):
+        job = Job.objects.create(name="etag-moving", id_company=self.company)
+        order = Order.objects.create(
+            key_ref="REF-ETAG", date=datetime.date(2025, 1, 1), id_company=self.company, person=self.person, job=job
+        )
+        operator_person = Person.objects.create(first_name="Op", last_name="Test", id_company=self.company)
+        operator = Operator.objects.create(person=operator_person, code="OP-ETAG", salary=100)
+        etag = self.get(ControllerAssign, "list_assign_operator", "/assign/operators/")["ETag"]
+
+        # bulk_create sends no post_save: the repository bumps the counter
+        with self.captureOnCommitCallbacks(execute=True):
+            RepositoryAssign().bulk_insert([Assign(operator=operator, order=order, assigned_at=order.date)])
+        self.assertEqual(self.get(ControllerAssign, "list_assign_operator", "/assign/operators/", etag).status_code, 200)
+
+    def test_cleared_photos_change_the_operator_list(self):
+        field = Operator._meta.get_field("photo")
+        self.addCleanup(setattr, field, "storage", field.storage)
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, True)
+        field.storage = FileSystemStorage(location=location)
+        operator_person = Person.objects.create(first_name="Op", last_name="Photo", id_company=self.company)
+        operator = Operator.objects.create(person=operator_person, code="OP-PHOTO", salary=100)
+        Operator.objects.filter(pk=operator.pk).update(photo="operators/photos/gone.png")
+        etag = self.get(ControllerOperator, "list", "/operators/")["ETag"]
+
+        # The reference is cleared with a queryset update, which sends no post_save
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(reconcile_field(Operator, "photo", clear_missing=True), (0, 1))
+        self.assertFalse(Operator.objects.get(pk=operator.pk).photo)
+        self.assertEqual(self.get(ControllerOperator, "list", "/operators/", etag).status_code, 200)
+
+
+class SharedCacheTests(TestCase):
+    """Cache invalidations made by one process must be seen by every other one."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = create_company("CACHE", "Cache Co")
+        cls.person = Person.objects.create(first_name="Admin", last_name="Test", id_company=cls.company)
+        cls.user = User.objects.create_user("cache", "secret", person=cls.person, id_company=cls.company)
+
+    def other_process_cache(self):
+        # A new backend instance shares nothing in memory with `cache`
+        other = caches.create_connection("default")
+        self.addCleanup(other.close)
+        return other
+
+    def test_process_local_cache_is_rejected(self):
+        self.assertEqual(check_shared_cache(None), [])
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ["api.E001"])
+
+    def test_deactivated_identity_is_dropped_for_every_process(self):
+        payload = {"person_id": self.person.id_person, "company_id": self.company.id}
+        self.assertEqual(JWTAuthentication()._get_authenticated_entity(payload), self.user)
+        key = identity_cache._cache_key(self.person.id_person, self.company.id)
+        other = self.other_process_cache()
+        self.assertEqual(other.get(key), self.user)
+
+        self.person.status = "inactive"
+        self.person.save()
+        self.assertIsNone(other.get(key))
+
+    def test_cancelled_subscription_is_dropped_for_every_process(self):
+        plan = Plan.objects.create(name="Basic", price=10, duration_months=1)
+        today = datetime.date.today()
+        subscription = Subscription.objects.create(
+            id_plan=plan, start_date=today, end_date=today + datetime.timedelta(days=30), status="active"
+        )
+        self.company.subscription = subscription
+        self.company.save()
+        self.assertTrue(subscription_cache.is_subscription_valid(
+            subscription_cache.get_subscription_state(self.company.id)
+        ))
+        key = subscription_cache._cache_key(self.company.id)
+        other = self.other_process_cache()
+        self.assertIsNotNone(other.get(key))
+
+        subscription.status = "cancelled"
+        subscription.save()
+        self.assertIsNone(other.get(key))
+        self.assertFalse(subscription_cache.is_subscription_valid(
+            subscription_cache.get_subscription_state(self.company.id)
+        ))
+
+    def test_reconciler_writes_are_seen_by_the_request_path(self):
+        field = User._meta.get_field("photo")
+        self.addCleanup(setattr, field, "storage", field.storage)
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, True)
+        field.storage = FileSystemStorage(location=location, base_url="/media/")
+        kept = field.storage.save("users/photos/kept.png", ContentFile(b"png"))
+        User.objects.filter(pk=self.user.pk).update(photo="users/photos/gone.png")
+
+        call_command("reconcile_storage_index", "--field", "user.photo", stdout=StringIO())
+
+        # The web workers read the index through their own cache connection
+        other = self.other_process_cache()
+        self.assertEqual(other.get(storage_index._cache_key(kept)), storage_index.PRESENT)
+        self.assertEqual(other.get(storage_index._cache_key("users/photos/gone.png")), storage_index.MISSING)
+        self.assertIsNone(UserSerializer(User.objects.get(pk=self.user.pk)).data["photo"])
+
+    def test_fuel_reports_are_invalidated_for_every_process(self):
+        job = Job.objects.create(name="cache moving", id_company=self.company)
+        order = Order.objects.create(date=datetime.date(2025, 1, 1), id_company=self.company, person=self.person, job=job)
+        key = efficiency_cache.report_key(self.company.id, {})
+        efficiency_cache.set_report(key, {"fleet": {}})
+        other = self.other_process_cache()
+        self.assertIsNotNone(other.get(key))
+
+        order.date = datetime.date(2025, 1, 8)
+        order.save()
+        # Every process now builds its report keys from the new generation
+        self.assertEqual(other.get(efficiency_cache._generation_key(self.company.id)), 1)
+        self.assertNotEqual(efficiency_cache.report_key(self.company.id, {}), key)
+
+
+class OrderCostRollupTests(CompanyTestCase):
+    """The signal-maintained cost rollups must match a full recompute after every kind of change."""
+
+    COMPANY = ("ROLL", "Rollup Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.truck = Truck.objects.create(number_truck="R-1", type="box", name="Truck", id_company=cls.company)
+        cls.operators = []
+        for i, salary in enumerate((100, 60)):
+            operator_person = Person.objects.create(first_name=f"Op{i}", last_name="Test", id_company=cls.company)
+            cls.operators.append(Operator.objects.create(person=operator_person, code=f"OP-ROLL{i}", salary=salary))
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.orders = [
+                Order.objects.create(date=datetime.date(2025, 1, 1), id_company=self.company, person=self.person,
+                                     job=self.job, expense=10)
+                for _ in range(2)
+            ]
+
+    def stored(self):
+        return {
+            row.pop("order_id"): row
+            for row in OrderCostRollup.objects.filter(order__in=self.orders).values("order_id", *ROLLUP_FIELDS)
+        }
+
+    def assertMatchesRecompute(self):
+        incremental = self.stored()
+        RepositoryOrderCostRollup().rebuild(company_id=self.company.id)
+        self.assertEqual(incremental, self.stored())
+        return incremental
+
+    def change(self, function, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            function(*args)
+        return self.assertMatchesRecompute()
+
+    def test_new_orders_get_a_rollup(self):
+        rollups = self.assertMatchesRecompute()
+        self.assertEqual(rollups[self.orders[0].pk]["total_cost"], 10)
+
+    def test_cost_rows_moving_between_orders(self):
+        first, second = self.orders
+        fuel = CostFuel.objects.create(order=first, truck=self.truck, cost_fuel=40, cost_gl=4, fuel_qty=10, distance=80)
+        work = WorkCost.objects.create(name="Stairs", cost=25, type="extra", id_order=first)
+        with self.captureOnCommitCallbacks(execute=True):
+            assign = Assign.objects.create(operator=self.operators[0], order=first, rol="driver")
+        self.assertEqual(self.assertMatchesRecompute()[first.pk]["total_cost"], 10 + 40 + 25 + 100)
+
+        for row in (fuel, work, assign):
+            if isinstance(row, WorkCost):
+                row.id_order = second
+            else:
+                row.order = second
+            rollups = self.change(row.save)
+        self.assertEqual(rollups[first.pk]["total_cost"], 10)
+        self.assertEqual(rollups[second.pk]["driver_salaries"], 100)
+
+        rollups = self.change(work.delete)
+        self.assertEqual(rollups[second.pk]["work_cost"], 0)
+
+    def test_operator_salary_and_order_expense(self):
+        order = self.orders[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            Assign.objects.create(operator=self.operators[0], order=order, rol="driver")
+            Assign.objects.create(operator=self.operators[1], order=order, rol="helper")
+
+        operator = self.operators[1]
+        operator.salary = 80
+        rollups = self.change(operator.save)
+        self.assertEqual(rollups[order.pk]["other_salaries"], 80)
+
+        order.expense = 35
+        rollups = self.change(order.save)
+        self.assertEqual((rollups[order.pk]["expense"], rollups[order.pk]["total_cost"]), (35, 35 + 100 + 80))
+
+    def test_bulk_role_change_moves_the_salary(self):
+        order = self.orders[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            assign = Assign.objects.create(operator=self.operators[0], order=order, rol="driver")
+
+        assign.rol = "helper"
+        rollups = self.change(Assign.objects.bulk_update_with_audit, [assign], ["rol"])
+        self.assertEqual((rollups[order.pk]["driver_salaries"], rollups[order.pk]["other_salaries"]), (0, 100))
+
+    def test_summaries_are_read_only(self):
+        # bulk_create sends no post_save: the order has no rollup
+        order = Order.objects.bulk_create([Order(
+            date=datetime.date(2025, 1, 2), id_company=self.company, person=self.person, job=self.job, expense=5
+        )])[0]
+        CostFuel.objects.bulk_create([CostFuel(order=order, truck=self.truck, cost_fuel=15, cost_gl=3,
+                                               fuel_qty=5, distance=10)])
+
+        with CaptureQueriesContext(connection) as queries:
+            summary = ServicesOrder().calculate_summary(order.pk)
+        self.assertEqual((summary["fuelCost"], summary["totalCost"]), (15, 20))
+        self.assertFalse(OrderCostRollup.objects.filter(order=order).exists())
+        self.assertFalse([q for q in queries if not q["sql"].lstrip().upper().startswith("SELECT")])
+
+
+class AssignBulkCreateTests(TestCase):
+    """POST assigns/bulk/ creates a crew in one INSERT, reporting conflicts and foreign references per item."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company, cls.other_company = [create_company(f"BULK{i}", f"Bulk Co {i}") for i in range(2)]
+        cls.person = Person.objects.create(first_name="Admin", last_name="Test", id_company=cls.company)
+        cls.user = User.objects.create_user("bulk", "secret", person=cls.person, id_company=cls.company)
+        cls.orders, cls.trucks, cls.operators = {}, {}, {}
+        for company in (cls.company, cls.other_company):
+            job = Job.objects.create(name=f"bulk moving {company.id}", id_company=company)
+            client = Person.objects.create(first_name="Client", last_name="Test", id_company=company)
+            cls.orders[company.id] = Order.objects.create(
+                date=datetime.date(2025, 3, 3), id_company=company, person=client, job=job
+            )
+            cls.trucks[company.id] = Truck.objects.create(
+                number_truck=f"B-{company.id}", type="box", name="Truck", id_company=company
+            )
+            cls.operators[company.id] = []
+            for i in range(6):
+                operator_person = Person.objects.create(first_name=f"Op{i}", last_name="Test", id_company=company)
+                cls.operators[company.id].append(
+                    Operator.objects.create(person=operator_person, code=f"OP-B{company.id}-{i}", salary=100)
+                )
+
+    def post(self, items):
+        request = APIRequestFactory().post("/assigns/bulk/", items, format="json")
+        request.company_id = self.company.id
+        force_authenticate(request, user=self.user)
+        return ControllerAssign.as_view({"post": "bulk_create"})(request)
+
+    def item(self, operator, order=None, truck=None, rol="helper"):
+        order = order or self.orders[self.company.id]
+        return {
+            "operator": operator.id_operator,
+            "order": str(order.key),
+            "truck": truck.id_truck if truck else None,
+            "rol": rol,
+        }
+
+    def test_creates_every_assignment_with_constant_queries(self):
+        operators = self.operators[self.company.id]
+        truck = self.trucks[self.company.id]
+        with CaptureQueriesContext(connection) as small:
+            response = self.post([self.item(operator, truck=truck) for operator in operators[:2]])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["data"]), 2)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.post([self.item(operator, truck=truck) for operator in operators[2:]])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(small), len(large))
+
+        order = self.orders[self.company.id]
+        assigns = Assign.objects.filter(order=order)
+        self.assertEqual(assigns.count(), 6)
+        self.assertEqual({assign.assigned_at for assign in assigns}, {order.date})
+        self.assertEqual(assigns.filter(truck=truck).count(), 6)
+
+    def test_duplicate_pairs_are_reported_as_conflicts(self):
+        first, second = self.operators[self.company.id][:2]
+        truck = self.trucks[self.company.id]
+        Assign.objects.create(operator=first, order=self.orders[self.company.id], truck=truck)
+
+        # Already assigned, new, and repeated within the batch
+        response = self.post([self.item(first), self.item(second, truck=truck), self.item(second)])
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(len(response.data["data"]["created"]), 1)
+        conflicts = response.data["data"]["conflicts"]
+        self.assertEqual([conflict["index"] for conflict in conflicts], [0, 2])
+        self.assertIn(f"with truck {truck.id_truck}", conflicts[0]["message"])
+        self.assertIn(f"with truck {truck.id_truck}", conflicts[1]["message"])
+        self.assertEqual(Assign.objects.filter(order=self.orders[self.company.id]).count(), 2)
+
+    def test_other_company_references_are_rejected(self):
+        own = self.operators[self.company.id][0]
+        foreign = self.operators[self.other_company.id][0]
+        response = self.post([
+            self.item(own),
+            self.item(foreign),
+            self.item(own, order=self.orders[self.other_company.id]),
+            self.item(own, truck=self.trucks[self.other_company.id]),
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [(error["index"], sorted(error["errors"])) for error in response.data["data"]],
+            [(1, ["operator"]), (2, ["order"]), (3, ["truck"])],
+        )
+        self.assertFalse(Assign.objects.exists())
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class AssignListReportTests(CompanyTestCase):
+    """assigns/list-report/ serializes a page of orders with their crews in a constant number of queries."""
+
+    COMPANY = ("REPORT", "Report Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user("report", "secret", person=cls.person, id_company=cls.company)
+        cls.trucks = [
+            Truck.objects.create(number_truck=f"RP-{i}", type="box", name="Truck", id_company=cls.company)
+            for i in range(2)
+        ]
+        cls.operators = []
+        for i, salary in enumerate((100, 60, 40)):
+            operator_person = Person.objects.create(first_name=f"Op{i}", last_name="Test", id_company=cls.company)
+            cls.operators.append(Operator.objects.create(person=operator_person, code=f"OP-RP{i}", salary=salary))
+        cls.orders = []
+        for day in range(25):
+            order = Order.objects.create(date=datetime.date(2025, 1, 1) + datetime.timedelta(days=day),
+                                         id_company=cls.company, person=cls.person, job=cls.job, expense=10)
+            # Two assignments share the first truck
+            for operator, truck, rol in zip(cls.operators, (cls.trucks[0], cls.trucks[0], cls.trucks[1]),
+                                            ("driver", "helper", "helper")):
+                Assign.objects.create(operator=operator, order=order, truck=truck, rol=rol)
+            cls.orders.append(order)
+
+    def list_report(self, page_size):
+        request = APIRequestFactory().get("/assigns/list-report/", {"year": 2025, "page_size": page_size})
+        request.company_id = self.company.id
+        force_authenticate(request, user=self.user)
+        response = ControllerAssign.as_view({"get": "list"})(request)
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def test_page_is_listed_with_constant_queries(self):
+        with CaptureQueriesContext(connection) as small_page:
+            self.assertEqual(len(self.list_report(5)), 5)
+        with self.assertNumQueries(len(small_page)):
+            results = self.list_report(25)
+
+        self.assertEqual(len(results), 25)
+        newest = results[0]
+        self.assertEqual(newest["key"], str(self.orders[-1].key))
+        self.assertEqual(
+            [(operator["code"], operator["role"]) for operator in newest["operators"]],
+            [("OP-RP0", "driver"), ("OP-RP1", "helper"), ("OP-RP2", "helper")],
+        )
+        self.assertEqual([vehicle["number_truck"] for vehicle in newest["vehicles"]], ["RP-0", "RP-1"])
+        summary = newest["summaryCost"]
+        self.assertEqual(
+            (summary["driverSalaries"], summary["otherSalaries"], summary["totalCost"]), (100, 100, 10 + 100 + 100)
+        )
+
+
+class KeysetPaginationTests(CompanyTestCase):
+    """Cursor pages walk (date DESC NULLS LAST, key DESC) forwards and backwards without gaps."""
+
+    DATES = [
+        datetime.date(2025, 1, 3), datetime.date(2025, 1, 3), datetime.date(2025, 1, 2), None,
+        datetime.date(2025, 1, 1), None, datetime.date(2025, 1, 3),
+    ]
+
+    COMPANY = ("KEYSET", "Keyset Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user("keyset", "secret", person=cls.person, id_company=cls.company)
+        cls.orders = [
+            Order.objects.create(date=day, id_company=cls.company, person=cls.person, job=cls.job)
+            for day in cls.DATES
+        ]
+
+    def paginate(self, url):
+        paginator = KeysetPagination(ORDER_KEYSET)
+        page = paginator.paginate_queryset(
+            Order.objects.filter(id_company=self.company), Request(APIRequestFactory().get(url))
+        )
+        return [order.key for order in page], paginator.get_next_link(), paginator.get_previous_link()
+
+    def test_next_and_previous_links_round_trip(self):
+        expected = [
+            order.key for order in
+            sorted(self.orders, key=lambda order: (order.date is not None, order.date or datetime.date.min, order.key),
+                   reverse=True)
+        ]
+
+        pages, url = [], "/orders/?pagination=cursor&page_size=3"
+        while url:
+            keys, url, previous = self.paginate(url)
+            pages.append((keys, previous))
+        self.assertEqual([key for keys, _ in pages for key in keys], expected)
+        self.assertEqual([len(keys) for keys, _ in pages], [3, 3, 1])
+        self.assertIsNone(pages[0][1])
+
+        # Back from the last page (which starts inside the NULL dates) to the first one
+        backwards, url = [], pages[-1][1]
+        while url:
+            keys, _, url = self.paginate(url)
+            backwards.append(keys)
+        self.assertEqual(backwards, [keys for keys, _ in pages[-2::-1]])
+
+    def test_tampered_cursor_is_not_found(self):
+        bad_position = base64.urlsafe_b64encode(json.dumps({"p": ["yesterday", "x"], "r": 0}).encode()).decode()
+        for cursor in ("garbage", bad_position):
+            request = APIRequestFactory().get("/orders/", {"cursor": cursor})
+            request.company_id = self.company.id
+            force_authenticate(request, user=self.user)
+            response = ControllerOrder.as_view({"get": "list_all"})(request)
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+class OrderExportTests(CompanyTestCase):
+    """orders-export/ streams every order with its cost summary as CSV or NDJSON."""
+
+    COMPANY = ("EXPORT", "Export Co")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.create_user("export", "secret", person=cls.person, id_company=cls.company)
+        truck = Truck.objects.create(number_truck="X-1", type="box", name="Truck", id_company=cls.company)
+        cls.orders = []
+        for i in range(3):
+            order = Order.objects.create(key_ref=f"REF-EXP{i}", date=datetime.date(2025, 2, 1 + i), expense=10,
+                                         income=100, id_company=cls.company, person=cls.person, job=cls.job)
+            CostFuel.objects.create(order=order, truck=truck, cost_fuel=5 * (i + 1), cost_gl=1, fuel_qty=1, distance=1)
+            cls.orders.append(order)
+
+    def export(self, **params):
+        request = APIRequestFactory().get("/orders-export/", params)
+        request.company_id = self.company.id
+        force_authenticate(request, user=self.user)
+        response = ControllerOrder.as_view({"get": "export_orders"})(request)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content).decode()
+
+    def expected_totals(self):
+        return {str(order.key): 10 + 5 * (i + 1) for i, order in enumerate(self.orders)}
+
+    def test_csv_export(self):
+        response, body = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv")
+        reader = csv.DictReader(body.splitlines())
+        self.assertEqual(reader.fieldnames, ControllerOrder.EXPORT_COLUMNS)
+        rows = list(reader)
+        self.assertEqual({row["key"]: float(row["totalCost"]) for row in rows}, self.expected_totals())
+        self.assertEqual({row["client"] for row in rows}, {"Client Test"})
+
+    def test_ndjson_export(self):
+        response, body = self.export(file_format="ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual({row["key"]: row["totalCost"] for row in rows}, self.expected_totals())
+        self.assertEqual(sorted(row["date"] for row in rows), ["2025-02-01", "2025-02-02", "2025-02-03"])
+
+    def test_failure_while_streaming_ends_with_an_error_line(self):
+        export_row = ControllerOrder._export_row
+        calls = []
+
+        def failing_row(order, summary):
+            calls.append(order)
+            if len(calls) == 2:
+                raise RuntimeError("database went away")
+            return export_row(order, summary)
+
+        for file_format in ("csv", "ndjson"):
+            calls.clear()
+            with mock.patch.object(ControllerOrder, "_export_row", side_effect=failing_row), \
+                    self.assertLogs("api.order.controllers.ControllerOrder", "ERROR"):
+                _, body = self.export(file_format=file_format)
+            last_line = body.splitlines()[-1]
+            self.assertIn(ControllerOrder.EXPORT_ERROR_MESSAGE, last_line, file_format)
+            self.assertEqual(len(body.splitlines()), 3 if file_format == "csv" else 2)
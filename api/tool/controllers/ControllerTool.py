@@ -5,6 +5,7 @@ from rest_framework import status, viewsets
 from api.tool.models.Tool import Tool
 from api.tool.services.ServicesTool import ServicesTool
 from api.tool.serializers.SerializerTool import ToolSerializer
+from api.common.etag import versioned_etag
 
 class ControllerTool(viewsets.ViewSet):
 
@@ -12,6 +13,7 @@ class ControllerTool(viewsets.ViewSet):
         super().__init__(**kwargs)
         self.paginator = PageNumberPagination()  # Add a paginator instance
         self.tool_service = ServicesTool()  # Initialize the service
+    @versioned_etag('tools')
     def list(self, request):
         "Get tools associated with the token company"
         company_id = getattr(request, 'company_id', None)
@@ -91,6 +93,7 @@ class ControllerTool(viewsets.ViewSet):
             status=status.HTTP_200_OK
         )
     
+    @versioned_etag('tools')
     def listByJob(self, request, pk=None):
         "ListToolsByJob"
         company_id = getattr(request, 'company_id', None)
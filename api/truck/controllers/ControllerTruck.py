@@ -8,6 +8,7 @@ from api.truck.serializers.SerializerTruck import SerializerTruck
 from api.truck.models.Truck import Truck
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
 from rest_framework.exceptions import ValidationError
+from api.common.etag import versioned_etag
 
 class ControllerTruck(viewsets.ViewSet):
     """
@@ -51,6 +52,7 @@ class ControllerTruck(viewsets.ViewSet):
             }, status=status.HTTP_404_NOT_FOUND)    
         
 
+    @versioned_etag('trucks')
     def get_avaliable(self, request):
         """
         Returns a paginated list of available (active) trucks for the current company.
@@ -0,0 +1,90 @@
+import logging
+from rest_framework import status, viewsets
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema
+from api.upload.serializers.SerializerUpload import SerializerFinalizeUpload, SerializerPresignUpload
+from api.upload.services.ServicesUpload import ServicesUpload
+from api.utils.s3utils import image_url_map
+
+logger = logging.getLogger(__name__)
+
+class ControllerUpload(viewsets.ViewSet):
+    """
+    Direct uploads to S3: the client asks for a presigned POST, sends the file
+    to the bucket and then finalizes the upload with the returned token.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.upload_service = ServicesUpload()
+
+    def error_response(self, exc, mess_user):
+        return Response({
+            "status": "error",
+            "messDev": str(exc.detail),
+            "messUser": mess_user,
+            "data": None
+        }, status=exc.status_code)
+
+    @extend_schema(
+        summary="Presign a direct upload",
+        description=(
+            "Returns a presigned POST (url + form fields) to upload an image straight to S3 "
+            "for order evidence/dispatch_ticket, operator photo/license_front/license_back "
+            "or user photo, and the upload_token to finalize it."
+        ),
+        request=SerializerPresignUpload,
+    )
+    def presign(self, request):
+        serializer = SerializerPresignUpload(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            upload = self.upload_service.presign(
+                request.company_id,
+                data['target'],
+                data['object_id'],
+                data['field'],
+                data['content_type'],
+            )
+        except APIException as e:
+            return self.error_response(e, "Could not prepare the upload")
+
+        return Response({
+            "status": "success",
+            "messDev": "Presigned upload issued",
+            "messUser": "Upload ready",
+            "data": upload
+        }, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Finalize a direct upload",
+        description=(
+            "Records an uploaded file on its order/operator/user and queues its compression. "
+            "The image URLs point to the original file until the job finishes."
+        ),
+        request=SerializerFinalizeUpload,
+    )
+    def finalize(self, request):
+        serializer = SerializerFinalizeUpload(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            instance, field_name = self.upload_service.finalize(
+                request.company_id, serializer.validated_data['upload_token']
+            )
+        except APIException as e:
+            return self.error_response(e, "Could not save the upload")
+
+        field_file = getattr(instance, field_name)
+        return Response({
+            "status": "success",
+            "messDev": f"Upload recorded on {instance._meta.model_name} {instance.pk}.{field_name}",
+            "messUser": "File uploaded successfully",
+            "data": {
+                "object_id": str(instance.pk),
+                "field": field_name,
+                "key": field_file.name,
+                "urls": image_url_map(field_file, request),
+            }
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from api.upload.services.ServicesUpload import CONTENT_TYPE_EXTENSIONS, UPLOAD_TARGETS
+
+
+class SerializerPresignUpload(serializers.Serializer):
+    target = serializers.ChoiceField(choices=list(UPLOAD_TARGETS))
+    object_id = serializers.CharField(max_length=64)
+    field = serializers.CharField(max_length=50)
+    content_type = serializers.ChoiceField(choices=list(CONTENT_TYPE_EXTENSIONS))
+
+
+class SerializerFinalizeUpload(serializers.Serializer):
+    upload_token = serializers.CharField()
@@ -0,0 +1,161 @@
+import logging
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from api.operator.models.Operator import Operator
+from api.order.models.Order import Order
+from api.user.models.User import User
+from api.utils.s3utils import delete_derivatives, get_s3_file_path
+
+logger = logging.getLogger(__name__)
+
+DIRECT_UPLOAD_MAX_SIZE = getattr(settings, 'DIRECT_UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+DIRECT_UPLOAD_EXPIRES = getattr(settings, 'DIRECT_UPLOAD_EXPIRES', 600)
+# Extra time to finalize an upload that started right before the POST expired
+DIRECT_UPLOAD_FINALIZE_GRACE = 300
+
+UPLOAD_TOKEN_SALT = 'api.upload.token'
+
+# target -> (model, company lookup, {field: folder of get_s3_file_path})
+UPLOAD_TARGETS = {
+    'order': (Order, 'id_company_id', {
+        'evidence': 'orders/evidence',
+        'dispatch_ticket': 'orders/dispatch',
+    }),
+    'operator': (Operator, 'person__id_company_id', {
+        'photo': 'operators/photos',
+        'license_front': 'operators/licenses/front',
+        'license_back': 'operators/licenses/back',
+    }),
+    'user': (User, 'id_company_id', {
+        'photo': 'admin/photos',
+    }),
+}
+
+# The extension of the key comes from the declared type, never from the client filename
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+}
+
+
+class ServicesUpload:
+    """
+    Direct-to-S3 uploads.
+
+    presign() issues a presigned POST for a key in the get_s3_file_path layout
+    and a signed upload token binding it to the target object and field; the
+    client sends the file straight to the bucket. finalize() checks the object
+    landed, records the key on the model and lets the model's save() queue
+    the image post-processing (ImageJob). File bytes never go through Django.
+    """
+
+    def get_target(self, company_id, target, object_id, field_name):
+        """Returns (instance, folder) of an upload target owned by the company."""
+        if target not in UPLOAD_TARGETS:
+            raise ValidationError({"target": f"Must be one of: {', '.join(UPLOAD_TARGETS)}"})
+        model, company_lookup, folders = UPLOAD_TARGETS[target]
+        if field_name not in folders:
+            raise ValidationError({"field": f"Must be one of: {', '.join(folders)}"})
+
+        queryset = model.objects.filter(**{company_lookup: company_id})
+        if model is Operator:
+            queryset = queryset.select_related('person')
+        try:
+            instance = queryset.filter(pk=object_id).first()
+        except (ValueError, TypeError, DjangoValidationError):
+            # Malformed id (e.g. not a UUID for orders)
+            instance = None
+        # Objects of other companies are reported as not found
+        if instance is None:
+            raise NotFound(f"{target} {object_id} not found")
+        return instance, folders[field_name]
+
+    def presign(self, company_id, target, object_id, field_name, content_type):
+        if content_type not in CONTENT_TYPE_EXTENSIONS:
+            raise ValidationError({"content_type": f"Must be one of: {', '.join(CONTENT_TYPE_EXTENSIONS)}"})
+        instance, folder = self.get_target(company_id, target, object_id, field_name)
+
+        storage = instance._meta.get_field(field_name).storage
+        if not hasattr(storage, 'bucket_name'):
+            raise ValidationError("Direct uploads require S3 storage (USE_S3)")
+
+        name = get_s3_file_path(instance, f"upload.{CONTENT_TYPE_EXTENSIONS[content_type]}", folder)
+        # Object key as written by the storage (AWS_LOCATION prefix included)
+        key = storage._normalize_name(name)
+
+        fields = {'Content-Type': content_type}
+        conditions = [
+            {'Content-Type': content_type},
+            ['content-length-range', 1, DIRECT_UPLOAD_MAX_SIZE],
+        ]
+        if storage.default_acl:
+            fields['acl'] = storage.default_acl
+            conditions.append({'acl': storage.default_acl})
+
+        post = storage.bucket.meta.client.generate_presigned_post(
+            Bucket=storage.bucket_name,
+            Key=key,
+            Fields=fields,
+            Conditions=conditions,
+            ExpiresIn=DIRECT_UPLOAD_EXPIRES,
+        )
+        token = signing.dumps(
+            {'c': company_id, 't': target, 'o': str(instance.pk), 'f': field_name, 'n': name},
+            salt=UPLOAD_TOKEN_SALT,
+        )
+        logger.debug(f"Presigned upload of {target}.{field_name} {instance.pk}: {key}")
+        return {
+            'url': post['url'],
+            'fields': post['fields'],
+            'key': name,
+            'upload_token': token,
+            'max_size': DIRECT_UPLOAD_MAX_SIZE,
+            'expires_in': DIRECT_UPLOAD_EXPIRES,
+        }
+
+    def finalize(self, company_id, upload_token):
+        """Records an uploaded object on its target. Returns (instance, field_name)."""
+        try:
+            payload = signing.loads(
+                upload_token,
+                salt=UPLOAD_TOKEN_SALT,
+                max_age=DIRECT_UPLOAD_EXPIRES + DIRECT_UPLOAD_FINALIZE_GRACE,
+            )
+        except signing.SignatureExpired:
+            raise ValidationError({"upload_token": "Upload token expired"})
+        except signing.BadSignature:
+            raise ValidationError({"upload_token": "Invalid upload token"})
+
+        if payload['c'] != company_id:
+            raise PermissionDenied("The upload does not belong to your company")
+        instance, _ = self.get_target(company_id, payload['t'], payload['o'], payload['f'])
+        field_name, name = payload['f'], payload['n']
+
+        current = getattr(instance, field_name)
+        if current.name == name:
+            # Already finalized (retried request)
+            return instance, field_name
+
+        storage = instance._meta.get_field(field_name).storage
+        if not storage.exists(name):
+            raise ValidationError({"upload_token": "The file has not been uploaded"})
+        if storage.size(name) > DIRECT_UPLOAD_MAX_SIZE:
+            storage.delete(name)
+            raise ValidationError({"upload_token": "The uploaded file is too large"})
+
+        setattr(instance, field_name, name)
+        # save() queues the compression / thumbnails job of the new file
+        instance.save(update_fields=[field_name])
+
+        if current:
+            try:
+                delete_derivatives(current)
+                current.storage.delete(current.name)
+            except Exception as e:
+                logger.error(f"Error eliminando archivo anterior {current.name}: {str(e)}")
+
+        logger.debug(f"Finalized upload of {payload['t']}.{field_name} {instance.pk}: {name}")
+        return instance, field_name
@@ -7,21 +7,41 @@ from rest_framework.exceptions import AuthenticationFailed
 from api.models import User
 from api.person.models import Person
 from api.operator.models import Operator
+from api.user.identity_cache import get_identity, set_identity
 
-class JWTAuthentication(BaseAuthentication):
-    def authenticate(self, request):
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return None
+def decode_request_token(request):
+    """
+    Decodes the JWT of the Authorization header once per request.
+
+    The payload is memoized on the underlying HttpRequest, so the
+    SubscriptionMiddleware and JWTAuthentication share a single decode.
+    Returns None when there is no Authorization header and lets
+    jwt.PyJWTError propagate for invalid or expired tokens.
+    """
+    http_request = getattr(request, '_request', request)
+    if hasattr(http_request, '_jwt_payload'):
+        return http_request._jwt_payload
+
+    auth_header = request.headers.get("Authorization")
+    if not auth_header:
+        return None
 
-        token = auth_header.split("Bearer ")[-1] if "Bearer " in auth_header else auth_header
+    token = auth_header.split("Bearer ")[-1] if "Bearer " in auth_header else auth_header
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    http_request._jwt_payload = payload
+    return payload
 
+
+class JWTAuthentication(BaseAuthentication):
+    def authenticate(self, request):
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+            payload = decode_request_token(request)
         except jwt.ExpiredSignatureError:
             raise AuthenticationFailed("Token expired")
         except jwt.InvalidTokenError as e:
             raise AuthenticationFailed(f"Invalid token: {str(e)}")
+        if payload is None:
+            return None
 
         # Validate required claims
         required_claims = {'person_id', 'company_id'}
@@ -38,6 +58,14 @@ class JWTAuthentication(BaseAuthentication):
         return (auth_entity, None)
 
     def _get_authenticated_entity(self, payload):
+        entity = get_identity(payload['person_id'], payload['company_id'])
+        if entity is None:
+            entity = self._load_authenticated_entity(payload)
+            if entity is not None:
+                set_identity(payload['person_id'], payload['company_id'], entity)
+        return entity
+
+    def _load_authenticated_entity(self, payload):
         try:
             # Try admin user first
             user = User.objects.select_related('person').get(
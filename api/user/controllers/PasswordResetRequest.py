@@ -9,17 +9,21 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from drf_spectacular.utils import extend_schema, OpenApiExample
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
 
 from api.person.models import Person
 from api.user.models import User
+from api.emailOutbox.services.ServicesEmailOutbox import ServicesEmailOutbox
 
 logger = logging.getLogger(__name__)
 
 class PasswordResetRequest(APIView):
     permission_classes = [AllowAny]
 
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.outbox_service = ServicesEmailOutbox()
+
     @extend_schema(
         summary="Request password reset",
         description="Sends a secure recovery link to the provided email if it exists.",
@@ -67,63 +71,12 @@ class PasswordResetRequest(APIView):
             )
             logger.debug("Generated reset URL: %s", reset_url)
 
-            # 4) Preparar asunto y contenido
-            subject = "GS PRO MASTER MOVING - Password Reset Request"
-            text_content = (
-                f"Hello {person.first_name},\n\n"
-                "We received a password reset request for your GS PRO MASTER MOVING account.\n\n"
-                f"Reset link: {reset_url}\n\n"
-                "This link expires in 1 hour.\n"
-                "If you didn't request this, please ignore this email.\n\n"
-                "The GS PRO MASTER MOVING Team"
-            )
-            html_content = f"""
-            <!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>Password Reset</title></head>
-            <body style="font-family:Arial;background:#f4f4f4;margin:0;padding:0;">
-            <table width="100%" style="max-width:600px;margin:auto;background:#fff;border-radius:8px;box-shadow:0 4px 10px rgba(0,0,0,0.1);">
-              <tr><td style="background:#1e3a8a;padding:30px;text-align:center;">
-                <h1 style="color:#fff;margin:0;">GS PRO MASTER MOVING</h1>
-              </td></tr>
-              <tr><td style="padding:40px 30px;color:#333;">
-                <p>Hello <strong>{person.first_name}</strong>,</p>
-                <p>Click the button below to reset your password:</p>
-                <p style="text-align:center;margin:30px 0;">
-                  <a href="{reset_url}" style="background:#1e3a8a;color:#fff;padding:12px 30px;border-radius:5px;text-decoration:none;font-weight:bold;">
-                    Reset My Password
-                  </a>
-                </p>
-                <p>If the button doesn't work, paste this link in your browser:</p>
-                <p style="background:#f4f4f4;padding:12px;border-radius:4px;word-break:break-all;">
-                  <a href="{reset_url}" style="color:#1e3a8a;">{reset_url}</a>
-                </p>
-                <p>This link expires in <strong>1 hour</strong>.</p>
-              </td></tr>
-              <tr><td style="background:#f8f8f8;padding:25px;text-align:center;color:#666;font-size:12px;">
-                Thank you for choosing GS PRO MASTER MOVING.<br>
-                <a href="https://www.gspromaster.com" style="color:#1e3a8a;">www.gspromaster.com</a> |
-                <a href="mailto:support@gspromaster.com" style="color:#1e3a8a;">support@gspromaster.com</a>
-              </td></tr>
-            </table></body></html>
-            """
-            logger.debug("Prepared email content for %s", email)
-
-            # 5) Enviar con send_mail y capturar errores
-            try:
-                send_mail(
-                    subject=subject,
-                    message=text_content,
-                    html_message=html_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[email],
-                    fail_silently=False,
+            # 4) Encolar el correo en la misma transacción; el worker del outbox lo envía
+            with transaction.atomic():
+                self.outbox_service.enqueue(
+                    'password_reset', email, {"first_name": person.first_name, "reset_url": reset_url}
                 )
-            except Exception as e:
-                print(f"Error enviando correo: {e}")
-                return Response(
-                    {"detail": "Error sending reset email."},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-
+            logger.debug("Queued password reset email for %s", email)
 
             return Response(response_msg, status=status.HTTP_200_OK)
 
@@ -14,7 +14,7 @@ import uuid
 from django.core.files.base import ContentFile
 import base64
 from rest_framework.parsers import JSONParser
-from django.core.files.storage import default_storage
+from api.utils import storage_index
 from rest_framework.exceptions import APIException
 import binascii
 from api.utils.s3utils import upload_user_photo
@@ -70,7 +70,7 @@ class UserDetailUpdate(APIView):
             # Limpieza de foto fantasma
             if user.photo:
                 try:
-                    if not default_storage.exists(user.photo.name):
+                    if storage_index.is_missing(user.photo.name):
                         user.photo = None
                         user.save(update_fields=['photo'])
                 except Exception as e:
@@ -140,7 +140,7 @@ class UserDetailUpdate(APIView):
             # 1. Verificación y limpieza inicial de foto fantasma
             if user.photo:
                 try:
-                    if not default_storage.exists(user.photo.name):
+                    if storage_index.is_missing(user.photo.name):
                         user.photo = None
                         user.save(update_fields=['photo'])
                 except Exception as e:
@@ -238,7 +238,7 @@ class UserDetailUpdate(APIView):
 
             # 4. Verificación final de integridad de foto
             try:
-                if user.photo and not default_storage.exists(user.photo.name):
+                if user.photo and storage_index.is_missing(user.photo.name):
                     user.photo = None
                     user.save(update_fields=['photo'])
             except Exception as e:
@@ -0,0 +1,57 @@
+# api/user/identity_cache.py
+"""
+Short-lived cache of the entity (admin User or operator Person) resolved by
+JWTAuthentication for a (person_id, company_id) pair.
+
+Entries are invalidated by signal handlers on User, Person and Operator saves
+and deletes (soft deletes go through save()), the TTL only bounds staleness
+for changes that bypass the ORM. The invalidation only reaches the other
+workers because settings.CACHES is shared between processes (Redis or the
+database cache, see the api.E001 system check).
+"""
+import threading
+import logging
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+IDENTITY_CACHE_TTL = getattr(settings, 'AUTH_IDENTITY_CACHE_TTL', 60)  # seconds
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _cache_key(person_id, company_id):
+    return f"auth:identity:{person_id}:{company_id}"
+
+
+def get_identity(person_id, company_id):
+    """Returns the cached entity or None, counting the hit or miss."""
+    entity = cache.get(_cache_key(person_id, company_id))
+    with _stats_lock:
+        _stats["hits" if entity is not None else "misses"] += 1
+    return entity
+
+
+def set_identity(person_id, company_id, entity):
+    cache.set(_cache_key(person_id, company_id), entity, IDENTITY_CACHE_TTL)
+
+
+def invalidate_identity(person_id, company_id):
+    if person_id is None:
+        return
+    logger.debug(f"Invalidating cached identity for person {person_id}, company {company_id}")
+    cache.delete(_cache_key(person_id, company_id))
+
+
+def get_identity_cache_stats():
+    """Returns the hit/miss counters of this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_identity_cache_stats():
+    with _stats_lock:
+        _stats["hits"] = 0
+        _stats["misses"] = 0
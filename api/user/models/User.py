@@ -5,9 +5,13 @@ from api.person.models import Person
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from api.company.models.Company import Company
 from django.db.models.query import QuerySet
-from api.utils.image_processor import ImageProcessor
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from api.imageJob.services.ServicesImageJob import ServicesImageJob
 from storages.backends.s3boto3 import S3Boto3Storage
-from api.utils.s3utils import upload_user_photo
+from api.utils.s3utils import upload_user_photo, delete_derivatives
+from api.user.identity_cache import invalidate_identity
+from api.utils.file_tracking import FileFieldTrackerMixin
 import uuid 
 
 import hashlib
@@ -44,7 +48,7 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault("is_staff", True)
         return self.create_user(user_name, password, **extra_fields)
 
-class User(AbstractBaseUser): 
+class User(FileFieldTrackerMixin, AbstractBaseUser): 
     person = models.OneToOneField(
         Person,
         on_delete=models.CASCADE,
@@ -73,6 +77,7 @@ class User(AbstractBaseUser):
         "Marks the user as inactive using their associated persona."
 
         if self.photo:
+            delete_derivatives(self.photo)
             self.photo.delete(save=False)  # Elimina el archivo físico
             self.photo = None  # Limpia la referencia
 
@@ -81,42 +86,19 @@ class User(AbstractBaseUser):
         
         self.save()
 
+    TRACKED_FILE_FIELDS = ('photo',)
+
     def save(self, *args, **kwargs):
         is_new = self._state.adding
-        processor = ImageProcessor()
-        old_photo = None
-        photo_changed = False
-
-        # Verificar si se están actualizando campos específicos
-        update_fields = kwargs.get('update_fields', None)
-        should_process_photo = (is_new or 
-                            update_fields is None or 
-                            (update_fields and 'photo' in update_fields))
-
-        # Obtener instancia anterior si existe
-        if not is_new:
-            try:
-                old_instance = User.all_objects.get(pk=self.pk)
-                old_photo = old_instance.photo
-                
-                # Verificar si la foto realmente cambió
-                if should_process_photo:
-                    # Comparar por contenido o por existencia
-                    if self.photo and old_photo:
-                        # Si ambas existen, comparar nombres o contenido
-                        photo_changed = (self.photo.name != old_photo.name)
-                    elif self.photo != old_photo:
-                        # Una existe y la otra no
-                        photo_changed = True
-                        
-            except User.DoesNotExist:
-                pass
-        else:
-            # Es nuevo, procesar si tiene foto
-            photo_changed = bool(self.photo) and should_process_photo
-
-        # SOLO procesar foto si cambió Y si debemos procesarla
-        if photo_changed and self.photo:
+
+        # Foto nueva, reemplazada o eliminada desde que se cargó el usuario (sin releer la fila)
+        changes = self.changed_file_fields(kwargs.get('update_fields'))
+        photo_changed = 'photo' in changes
+        old_name = changes.get('photo')
+
+        # SOLO procesar foto si cambió. Una foto ya guardada en el storage
+        # (subida directa a S3) conserva su nombre.
+        if photo_changed and self.photo and not self.photo._committed:
             try:
                 # Generar hash del contenido para nombre único
                 content = self.photo.read()
@@ -126,22 +108,28 @@ class User(AbstractBaseUser):
                 new_name = f"admin/photos/{content_hash[:10]}_{uuid.uuid4().hex[:8]}.{ext}"
                 
                 self.photo.name = new_name
-                self.photo = processor.compress_image(self.photo, prefix='user_photo')
-                logger.debug(f"{'Nueva' if is_new else 'Actualizada'} foto procesada: {new_name}")
+                logger.debug(f"{'Nueva' if is_new else 'Actualizada'} foto recibida: {new_name}")
                     
             except Exception as e:
                 logger.error(f"Error procesando foto: {str(e)}")
                 raise
 
         # Eliminar foto anterior SOLO si fue reemplazada (no si solo se actualizó otro campo)
-        if photo_changed and old_photo and self.photo != old_photo:
+        if photo_changed and old_name and old_name != self.photo.name:
             try:
-                logger.debug(f"Eliminando foto anterior: {old_photo.name}")
+                logger.debug(f"Eliminando foto anterior: {old_name}")
+                old_photo = self.photo.field.attr_class(self, self.photo.field, old_name)
+                delete_derivatives(old_photo)
                 old_photo.delete(save=False)
             except Exception as e:
                 logger.error(f"Error eliminando foto anterior: {str(e)}")
 
         super().save(*args, **kwargs)
+
+        # La compresión y las miniaturas se generan en segundo plano
+        if photo_changed and self.photo:
+            ServicesImageJob().schedule(self, {'photo': {}})
+
     @property
     def is_authenticated(self):
         return True
@@ -153,4 +141,14 @@ class User(AbstractBaseUser):
     @property
     def is_active(self):
         """User is active if their associated person is active"""
-        return self.person.status == 'active' if self.person else False
\ No newline at end of file
+        return self.person.status == 'active' if self.person else False
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_invalidate_identity(sender, instance, **kwargs):
+    """Drops the cached authentication entity of the user's person"""
+    company_id = (
+        Person.all_objects.filter(pk=instance.person_id).values_list('id_company_id', flat=True).first()
+    )
+    invalidate_identity(instance.person_id, company_id)
@@ -8,7 +8,8 @@ from drf_extra_fields.fields import Base64ImageField
 from django.db import IntegrityError
 import hashlib
 import logging
-from django.core.files.storage import default_storage
+from api.utils.s3utils import image_url_map
+from api.utils import storage_index
 
 logger = logging.getLogger(__name__)
 
@@ -16,29 +17,27 @@ logger = logging.getLogger(__name__)
 class UserSerializer(serializers.ModelSerializer):
     person = PersonSerializer()
     photo = Base64ImageField(required=False, allow_null=True, use_url=True)
+    # Size-keyed URLs ({"64": ..., "256": ..., "1200": ...}) for list thumbnails
+    photo_urls = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ('user_name', 'password', 'person', 'photo', 'created_at', 'updated_at')
+        fields = ('user_name', 'password', 'person', 'photo', 'photo_urls', 'created_at', 'updated_at')
         extra_kwargs = {
             'password': {'write_only': True},
             'user_name': {'validators': []} 
         }
 
-    def get_photo(self, obj):
-        if obj.photo:
-            try:
-                # Verificar existencia real en S3
-                if default_storage.exists(obj.photo.name):
-                    return self.context['request'].build_absolute_uri(obj.photo.url)
-                # Si no existe, limpiar referencia
-                obj.photo = None
-                obj.save(update_fields=['photo'])
-                return None
-            except Exception as e:
-                print(f"Error verificando foto: {str(e)}")
-                return None
-        return None
+    def get_photo_urls(self, obj):
+        return image_url_map(obj.photo, self.context.get('request'))
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Hide photos the storage index knows are gone (no request to S3 here)
+        if instance.photo and storage_index.is_missing(instance.photo.name):
+            data['photo'] = None
+            data['photo_urls'] = None
+        return data
 
     def validate_user_name(self, value):
         # Verificar username en usuarios activos
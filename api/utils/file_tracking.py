@@ -0,0 +1,84 @@
+"""
+Change tracking of FileField / ImageField values, so save() knows which
+files are new without re-reading the row or touching the storage.
+"""
+
+_UNKNOWN = object()
+
+
+class FileFieldTrackerMixin:
+    """
+    Model mixin that remembers the stored name of the fields listed in
+    TRACKED_FILE_FIELDS when the instance is loaded and after each save.
+
+    changed_file_fields() compares against that snapshot, so a save that
+    does not touch the files (a status flip, a soft delete) costs no query
+    and no storage round trip. The row is only read for a field that was
+    deferred when loading and assigned afterwards.
+    """
+    TRACKED_FILE_FIELDS = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stored_files()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        # Also runs when a deferred field is first read
+        self._remember_stored_files(
+            [name for name in self.TRACKED_FILE_FIELDS if name in fields] if fields is not None else None
+        )
+
+    def _remember_stored_files(self, names=None):
+        stored = getattr(self, '_stored_files', None)
+        if stored is None:
+            stored = self._stored_files = {}
+        for name in names if names is not None else self.TRACKED_FILE_FIELDS:
+            # Deferred fields stay unknown (reading them here would cost a query)
+            if self._meta.get_field(name).attname in self.__dict__:
+                field_file = getattr(self, name)
+                stored[name] = field_file.name if field_file else None
+
+    def stored_file_name(self, name):
+        """Name of the file stored in the row when loaded / last saved (None if empty or new)."""
+        return getattr(self, '_stored_files', {}).get(name)
+
+    def changed_file_fields(self, update_fields=None):
+        """
+        {field name: previously stored name} of the tracked fields being saved
+        whose file was replaced, uploaded or cleared since the last load/save.
+        """
+        stored = getattr(self, '_stored_files', {})
+        changes, unknown = {}, []
+        for name in self.TRACKED_FILE_FIELDS:
+            if update_fields is not None and name not in update_fields:
+                continue
+            if self._meta.get_field(name).attname not in self.__dict__:
+                continue  # deferred and never assigned
+            field_file = getattr(self, name)
+            current = field_file.name if field_file else None
+            previous = None if self._state.adding else stored.get(name, _UNKNOWN)
+            if previous is _UNKNOWN:
+                unknown.append(name)
+            elif (field_file and not field_file._committed) or current != previous:
+                changes[name] = previous
+
+        if unknown:
+            row = type(self)._base_manager.filter(pk=self.pk).values(*unknown).first() or {}
+            for name in unknown:
+                field_file = getattr(self, name)
+                current = field_file.name if field_file else None
+                previous = row.get(name) or None
+                if (field_file and not field_file._committed) or current != previous:
+                    changes[name] = previous
+        return changes
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        self._remember_stored_files(
+            [name for name in self.TRACKED_FILE_FIELDS if name in update_fields]
+            if update_fields is not None else None
+        )
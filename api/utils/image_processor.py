@@ -4,89 +4,119 @@ Compatible with both local and cloud storage backends (S3, DO Spaces, etc.)
 """
 import uuid
 import logging
-from io import BytesIO
+from tempfile import SpooledTemporaryFile
 from PIL import Image, ImageOps
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.base import File
 
 logger = logging.getLogger(__name__)
 
+# Images above this many pixels are rejected before decoding (decompression bombs)
+IMAGE_MAX_PIXELS = getattr(settings, 'IMAGE_MAX_PIXELS', 60_000_000)
+# Encoded images up to this size stay in memory, larger ones spill to a temp file
+IMAGE_SPOOL_MAX_MEMORY = getattr(settings, 'IMAGE_SPOOL_MAX_MEMORY', 2 * 1024 * 1024)
+
+
 class ImageProcessor:
     """
     Utility class for processing images before storage
     Works with both local file systems and cloud storage backends
     """
-    
+
     @staticmethod
-    def compress_image(image_field, quality=60, max_size=(1200, 1200), format='JPEG', prefix=None):
+    def _open(image_field, max_size=None):
         """
-        Compress an image to optimize storage and loading speed
-        Compatible with S3 and other storage backends that don't support path()
-        
-        Args:
-            image_field: Django ImageField or InMemoryUploadedFile
-            quality: Compression quality (1-100)
-            max_size: Maximum dimensions (width, height)
-            format: Output format (JPEG, PNG, etc)
-            prefix: Optional prefix for filename
-            
-        Returns:
-            ContentFile of compressed image or original if compression failed
+        Open an image for processing with bounded memory
+
+        The header is read first: images over IMAGE_MAX_PIXELS are rejected
+        before any pixel is decoded. JPEGs that will be downscaled to fit
+        `max_size` are decoded with Image.draft(), which lets libjpeg decode
+        directly at 1/2, 1/4 or 1/8 scale instead of the full resolution.
+        """
+        image = Image.open(image_field)
+        width, height = image.size
+        if width * height > IMAGE_MAX_PIXELS:
+            raise Image.DecompressionBombError(
+                f"Image of {width}x{height} pixels exceeds the limit of {IMAGE_MAX_PIXELS}"
+            )
+        if max_size and image.format == 'JPEG' and (width > max_size[0] or height > max_size[1]):
+            ratio = min(max_size[0] / width, max_size[1] / height)
+            # draft() keeps the decoded size at or above the requested one
+            image.draft('RGB', (max(1, int(width * ratio)), max(1, int(height * ratio))))
+        return image
+
+    @staticmethod
+    def _save_kwargs(format, quality, extra=None):
+        if format.upper() == 'PNG':
+            # quality is not supported by PNG
+            save_kwargs = {'optimize': True, 'compress_level': 6}
+        else:
+            save_kwargs = {'optimize': True, 'quality': quality}
+        if extra:
+            save_kwargs.update(extra)
+            if format.upper() == 'PNG':
+                save_kwargs.pop('quality', None)
+        return save_kwargs
+
+    @staticmethod
+    def _encode(image, name, format, save_kwargs):
+        """
+        Encode an image once into a spooled temporary file
+
+        Small results stay in memory and large ones spill to disk; the file is
+        handed to the storage as-is, without copying it into another buffer.
         """
+        spooled = SpooledTemporaryFile(max_size=IMAGE_SPOOL_MAX_MEMORY)
+        try:
+            image.save(spooled, format=format, **save_kwargs)
+        except Exception:
+            spooled.close()
+            raise
+        size = spooled.tell()
+        spooled.seek(0)
+        encoded = File(spooled, name=name)
+        encoded.size = size
+        return encoded
+
+    @staticmethod
+    def _compress(image_field, quality, max_size, format, prefix, extra_save_kwargs=None):
         if not image_field:
             logger.debug("No image field provided for compression")
             return image_field
-            
+
         try:
             # Safely handle all types of image fields without relying on path
             # which may not be supported by S3/cloud storage backends
             try:
-                # Try reading directly, which works for both InMemoryUploadedFile 
-                # and files from remote storage
-                image = Image.open(image_field)
+                image = ImageProcessor._open(image_field, max_size)
                 logger.debug(f"Processing image: {getattr(image_field, 'name', 'unnamed')}")
+            except Image.DecompressionBombError as e:
+                logger.error(f"Rejected image: {str(e)}")
+                return image_field
             except Exception as e:
                 logger.warning(f"Error opening image directly: {str(e)}")
                 # If direct opening fails, we have no other options
                 logger.error("Could not process image")
                 return image_field
-            
-            # Record original dimensions
+
             original_width, original_height = image.size
-            logger.debug(f"Original image dimensions: {original_width}x{original_height}")
-            
+            logger.debug(f"Decoded image dimensions: {original_width}x{original_height}")
+
             # Convert to RGB if necessary (excluding formats that support transparency)
             if format.upper() != 'PNG' and image.mode not in ('RGB', 'L'):
+                logger.debug(f"Converting image from {image.mode} to RGB")
                 image = image.convert('RGB')
-                logger.debug(f"Converted image from {image.mode} to RGB")
-            
+
             # Resize if larger than max_size
             if original_width > max_size[0] or original_height > max_size[1]:
                 image = ImageOps.contain(image, max_size, method=Image.LANCZOS)
                 new_width, new_height = image.size
                 logger.debug(f"Resized image to {new_width}x{new_height}")
-            
-            # Process in memory
-            buffer = BytesIO()
-            
-            # Save with appropriate format and compression
-            save_kwargs = {'optimize': True, 'quality': quality}
-            
-            # Remove quality parameter for PNG as it's not supported
-            if format.upper() == 'PNG':
-                save_kwargs.pop('quality', None)
-                save_kwargs['optimize'] = True
-                save_kwargs['compress_level'] = 6  # For PNG compression
-            
-            image.save(
-                buffer, 
-                format=format,
-                **save_kwargs
-            )
-            
+
             # Create unique filename to avoid cache issues
             extension = format.lower()
             timestamp = uuid.uuid4().hex[:8]
-            
+
             if prefix:
                 new_name = f"{prefix}_{timestamp}.{extension}"
             else:
@@ -101,23 +131,100 @@ class ImageProcessor:
                         new_name = f"{original_name}_{timestamp}.{extension}"
                 else:
                     new_name = f"image_{timestamp}.{extension}"
-            
-            logger.debug(f"Created compressed image with name: {new_name}")
-            buffer_size = len(buffer.getvalue())
-            logger.debug(f"Compressed size: {buffer_size} bytes")
-            
-            buffer.seek(0)  # Reset buffer position to beginning
-            return ContentFile(buffer.getvalue(), name=new_name)
-            
+
+            try:
+                compressed = ImageProcessor._encode(
+                    image, new_name, format, ImageProcessor._save_kwargs(format, quality, extra_save_kwargs)
+                )
+            except Exception as e:
+                if not extra_save_kwargs:
+                    raise
+                # Keep the compressed version without metadata
+                logger.error(f"Error adding metadata to image: {str(e)}", exc_info=True)
+                compressed = ImageProcessor._encode(image, new_name, format, ImageProcessor._save_kwargs(format, quality))
+            logger.debug(f"Created compressed image with name: {new_name}, {compressed.size} bytes")
+            return compressed
+
         except Exception as e:
             logger.error(f"Error compressing image: {str(e)}", exc_info=True)
             return image_field  # Return original if compression fails
+
+    @staticmethod
+    def compress_image(image_field, quality=60, max_size=(1200, 1200), format='JPEG', prefix=None):
+        """
+        Compress an image to optimize storage and loading speed
+        Compatible with S3 and other storage backends that don't support path()
+        
+        Args:
+            image_field: Django ImageField or InMemoryUploadedFile
+            quality: Compression quality (1-100)
+            max_size: Maximum dimensions (width, height)
+            format: Output format (JPEG, PNG, etc)
+            prefix: Optional prefix for filename
             
+        Returns:
+            File of the compressed image (spooled, not copied into memory)
+            or the original if compression failed
+        """
+        return ImageProcessor._compress(image_field, quality, max_size, format, prefix)
+
+    @staticmethod
+    def generate_derivatives(image_field, sizes=(64, 256, 1200), quality=60, format='JPEG'):
+        """
+        Render an image at several sizes from a single decode
+
+        Each size is a bounding box (size x size). JPEGs are decoded at the
+        smallest draft scale that still covers the largest size. Sizes are
+        produced from the largest to the smallest, each one resized from the
+        previous derivative, so only the first resize works on the decoded image.
+
+        Args:
+            image_field: Django ImageField, FieldFile or uploaded file
+            sizes: Bounding-box sizes in pixels
+            quality: Compression quality (1-100)
+            format: Output format (JPEG, PNG, etc)
+
+        Returns:
+            Dict {size: File}, empty if the image could not be processed
+        """
+        if not image_field:
+            return {}
+
+        derivatives = {}
+        try:
+            largest = max(sizes)
+            image = ImageProcessor._open(image_field, (largest, largest))
+
+            if format.upper() != 'PNG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+
+            save_kwargs = ImageProcessor._save_kwargs(format, quality)
+            extension = format.lower()
+            current = image
+            for size in sorted(sizes, reverse=True):
+                if current.width > size or current.height > size:
+                    current = ImageOps.contain(current, (size, size), method=Image.LANCZOS)
+
+                derivatives[size] = ImageProcessor._encode(current, f"image_{size}.{extension}", format, save_kwargs)
+                logger.debug(f"Derivative {size}px: {current.width}x{current.height}, {derivatives[size].size} bytes")
+
+            return derivatives
+
+        except Exception as e:
+            logger.error(f"Error generating image derivatives: {str(e)}", exc_info=True)
+            # Sizes already encoded are spooled temp files: release them
+            for content in derivatives.values():
+                content.close()
+            return {}
+
     @staticmethod
     def compress_image_with_metadata(image_field, quality=60, max_size=(1200, 1200), format='JPEG', prefix=None, metadata=None):
         """
         Extended version that preserves important metadata while compressing
-        
+
+        The metadata is written by the same encode that compresses the image,
+        so the result is never decoded and re-encoded a second time.
+
         Args:
             image_field: Django ImageField
             quality: Compression quality (1-100)
@@ -127,44 +234,6 @@ class ImageProcessor:
             metadata: Dict of metadata to preserve (e.g. EXIF data)
             
         Returns:
-            ContentFile of compressed image with metadata or original if compression failed
+            File of the compressed image with metadata or original if compression failed
         """
-        # Call basic compression first
-        compressed = ImageProcessor.compress_image(image_field, quality, max_size, format, prefix)
-        
-        # If metadata provided and compression successful, try to add metadata
-        if metadata and compressed != image_field:
-            try:
-                # Create a new buffer with the compressed image
-                img_buffer = BytesIO()
-                img_buffer.write(compressed.read())
-                img_buffer.seek(0)
-                
-                # Open the compressed image
-                img = Image.open(img_buffer)
-                
-                # Create a new buffer for the metadata-enhanced version
-                meta_buffer = BytesIO()
-                
-                # Save with metadata
-                save_kwargs = {'optimize': True, 'quality': quality}
-                save_kwargs.update(metadata)
-                
-                # Remove quality parameter for PNG as it's not supported
-                if format.upper() == 'PNG':
-                    save_kwargs.pop('quality', None)
-                
-                img.save(
-                    meta_buffer,
-                    format=format,
-                    **save_kwargs
-                )
-                
-                # Return the image with metadata
-                return ContentFile(meta_buffer.getvalue(), name=compressed.name)
-                
-            except Exception as e:
-                logger.error(f"Error adding metadata to image: {str(e)}", exc_info=True)
-                return compressed  # Return compressed version without metadata if this fails
-        
-        return compressed
\ No newline at end of file
+        return ImageProcessor._compress(image_field, quality, max_size, format, prefix, metadata)
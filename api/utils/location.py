@@ -0,0 +1,45 @@
+"""
+Parsing of the free-text order location ("Country, State, City", stored in
+Order.state_usa) into the structured Order.country / state / city columns,
+and the equality filters the listings run on them.
+"""
+from django.db.models import Q
+
+LOCATION_PART_MAX_LENGTH = 100
+
+
+def _clean(part):
+    part = ' '.join(part.split())
+    return part[:LOCATION_PART_MAX_LENGTH] or None
+
+
+def parse_location(value):
+    """
+    Splits "Country, State, City" into a (country, state, city) tuple, None for
+    the missing parts. Parts are separated by commas; a value without commas
+    may use hyphens ("USA-Texas-Austin"). Anything after the city stays in it.
+    """
+    if not value or not value.strip():
+        return None, None, None
+    separator = ',' if ',' in value else '-'
+    parts = [_clean(part) for part in value.split(separator, 2)]
+    parts += [None] * (3 - len(parts))
+    return tuple(parts)
+
+
+def format_location(country, state, city):
+    """Inverse of parse_location: "Country, State, City" with the present parts."""
+    return ', '.join(part for part in (country, state, city) if part)
+
+
+def location_q(country=None, state=None, city=None, prefix=''):
+    """
+    Equality filter on the location columns (served by the
+    (id_company, country, state, city) index). `prefix` targets a related
+    order, e.g. prefix='order__' from Assign.
+    """
+    q = Q()
+    for field, value in (('country', country), ('state', state), ('city', city)):
+        if value:
+            q &= Q(**{f'{prefix}{field}': _clean(value)})
+    return q
@@ -0,0 +1,21 @@
+"""
+Parsing of optional query-string filters shared by the listing endpoints.
+"""
+from django.utils.dateparse import parse_date
+
+
+def parse_date_param(params, name):
+    """
+    Date of the `name` query parameter (YYYY-MM-DD), or None when absent.
+    Raises ValueError if it is present but not a valid date.
+    """
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
+    return parsed
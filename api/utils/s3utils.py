@@ -5,6 +5,7 @@ import logging
 from django.conf import settings
 from django.utils import timezone
 import hashlib
+from api.utils import storage_index
 logger = logging.getLogger(__name__)
 
 # =====================================================================
@@ -115,4 +116,68 @@ def upload_dispatch_file(instance, filename):
         os.makedirs(local_folder, exist_ok=True)
         ext = filename.split('.')[-1].lower()
         short_uuid = str(uuid.uuid4()).split('-')[0]
-        return os.path.join('dispatch_tickets', f"{short_uuid}.{ext}")
\ No newline at end of file
+        return os.path.join('dispatch_tickets', f"{short_uuid}.{ext}")
+# =====================================================================
+# Derivados de imágenes (miniaturas)
+# =====================================================================
+# Bounding-box sizes (px) rendered for each processed image. The largest one
+# is the main file stored in the model field; the others live next to it:
+#   <folder>/<name>_1200.jpeg  (field value)
+#   <folder>/<name>_256.jpeg
+#   <folder>/<name>_64.jpeg
+IMAGE_DERIVATIVE_SIZES = (64, 256, 1200)
+IMAGE_MAIN_SIZE = max(IMAGE_DERIVATIVE_SIZES)
+IMAGE_DERIVATIVE_EXT = 'jpeg'
+
+def derivative_path(name, size):
+    """Deterministic storage key of the `size` derivative of an image"""
+    stem = os.path.splitext(name)[0]
+    for known_size in IMAGE_DERIVATIVE_SIZES:
+        suffix = f"_{known_size}"
+        if stem.endswith(suffix):
+            stem = stem[:-len(suffix)]
+            break
+    return f"{stem}_{size}.{IMAGE_DERIVATIVE_EXT}"
+
+def derivative_paths(name):
+    """
+    {size: key} of a processed image, or None if `name` is still a raw upload
+    (derivatives are only written by the image worker together with the main file).
+    """
+    if not name or name != derivative_path(name, IMAGE_MAIN_SIZE):
+        return None
+    return {size: derivative_path(name, size) for size in IMAGE_DERIVATIVE_SIZES}
+
+def image_url_map(field_file, request=None):
+    """
+    Size-keyed URLs of an image field, e.g. {"64": url, "256": url, "1200": url}.
+    Until the image has been processed every size points to the original file.
+    """
+    if not field_file:
+        return None
+    paths = derivative_paths(field_file.name) or {size: field_file.name for size in IMAGE_DERIVATIVE_SIZES}
+    urls = {}
+    for size, path in paths.items():
+        url = field_file.storage.url(path)
+        urls[str(size)] = request.build_absolute_uri(url) if request else url
+    return urls
+
+def delete_derivatives(field_file):
+    """
+    Deletes the thumbnails of an image; the main file is deleted by field_file.delete().
+    Both are recorded as gone in the storage existence index.
+    """
+    if not field_file:
+        return
+    storage_index.mark_missing(field_file.name)
+    paths = derivative_paths(field_file.name)
+    if not paths:
+        return
+    storage_index.mark_missing(*paths.values())
+    for size, path in paths.items():
+        if size == IMAGE_MAIN_SIZE:
+            continue
+        try:
+            field_file.storage.delete(path)
+        except Exception as e:
+            logger.error(f"Error eliminando miniatura {path}: {str(e)}")
@@ -0,0 +1,45 @@
+"""
+Helpers for the denormalized search columns (e.g. Order.search_document).
+
+Documents and terms go through the same normalization (accents stripped,
+lowercase, single spaces), so a term can be matched with a plain substring
+search or, on MySQL, with the FULLTEXT ngram index through FullTextMatch.
+"""
+import unicodedata
+from django.db import NotSupportedError
+from django.db.models import Lookup
+
+# ngram_token_size of the MySQL server: shorter terms cannot use the FULLTEXT index
+FULLTEXT_MIN_TERM_LENGTH = 2
+
+
+def normalize_search_text(*parts):
+    """Joins the non-empty parts into one lowercase, accent-free, single-spaced string."""
+    text = ' '.join(str(part) for part in parts if part)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+def fulltext_phrase(term):
+    """Boolean-mode phrase for a normalized term; with the ngram parser it matches substrings."""
+    return '"{}"'.format(term.replace('"', ' ').strip())
+
+
+class FullTextMatch(Lookup):
+    """
+    MATCH (column) AGAINST (query IN BOOLEAN MODE), usable directly in filter():
+
+        queryset.filter(FullTextMatch(F('search_document'), fulltext_phrase(term)))
+
+    Only MySQL has it; the column needs a FULLTEXT index.
+    """
+    lookup_name = 'match'
+
+    def as_mysql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"MATCH ({lhs}) AGAINST ({rhs} IN BOOLEAN MODE)", (*lhs_params, *rhs_params)
+
+    def as_sql(self, compiler, connection):
+        raise NotSupportedError("FULLTEXT search is only available on MySQL")
@@ -0,0 +1,117 @@
+"""
+Cached index of which stored files exist, so serializers and views can answer
+"does this photo exist?" without a HEAD request to S3.
+
+Entries are written when files are uploaded or deleted through the app and
+refreshed in bulk by the reconcile_storage_index management command, which
+lists the bucket prefixes instead of checking objects one by one. Unknown
+names are treated as existing: only files known to be gone are hidden.
+
+The command runs in its own process, so the index must live in the shared
+settings.CACHES backend (see the api.E001 system check) for the web workers
+to see what it wrote.
+"""
+import hashlib
+import logging
+import posixpath
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+STORAGE_INDEX_TTL = getattr(settings, 'STORAGE_INDEX_TTL', 60 * 60 * 24)  # seconds
+
+PRESENT = 1
+MISSING = 0
+
+
+def _cache_key(name):
+    # Storage keys can be long or contain characters memcached rejects
+    return f"storage:exists:{hashlib.md5(name.encode('utf-8')).hexdigest()}"
+
+
+def _set(names, state):
+    names = [name for name in names if name]
+    if names:
+        cache.set_many({_cache_key(name): state for name in names}, STORAGE_INDEX_TTL)
+
+
+def mark_present(*names):
+    _set(names, PRESENT)
+
+
+def mark_missing(*names):
+    _set(names, MISSING)
+
+
+def get_state(name):
+    """True/False if the file is known to exist or not, None if unknown."""
+    if not name:
+        return False
+    state = cache.get(_cache_key(name))
+    return None if state is None else state == PRESENT
+
+
+def is_missing(name):
+    """True only when the file is known to be gone. Never touches the storage."""
+    return get_state(name) is False
+
+
+def get_states(names):
+    """{name: True/False/None} for several names with a single cache round trip."""
+    names = [name for name in names if name]
+    keys = {_cache_key(name): name for name in names}
+    found = cache.get_many(list(keys))
+    return {name: (found[key] == PRESENT if key in found else None) for key, name in keys.items()}
+
+
+def reconcile_field(model, field_name, clear_missing=False):
+    """
+    Refreshes the index for every file referenced by `model.field_name`.
+
+    The referenced names are grouped by directory and each directory is
+    listed once (a bulk LIST on S3) instead of one HEAD per file. With
+    clear_missing, references to files that are gone are set to NULL here,
+    outside of any request.
+
+    Returns (present, missing) counts of referenced files.
+    """
+    field = model._meta.get_field(field_name)
+    storage = field.storage
+    rows = (
+        model._base_manager.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+        .values_list('pk', field_name)
+    )
+
+    by_directory = {}
+    for pk, name in rows.iterator():
+        by_directory.setdefault(posixpath.dirname(name), []).append((pk, name))
+
+    present = missing = 0
+    cleared = []
+    for directory, referenced in by_directory.items():
+        try:
+            _, files = storage.listdir(directory)
+        except FileNotFoundError:
+            files = []
+        listed = {posixpath.join(directory, file_name) for file_name in files}
+        # Everything listed is known to exist (thumbnails included)
+        mark_present(*listed)
+
+        gone = [(pk, name) for pk, name in referenced if name not in listed]
+        mark_missing(*[name for _, name in gone])
+        present += len(referenced) - len(gone)
+        missing += len(gone)
+
+        if clear_missing:
+            for pk, name in gone:
+                if model._base_manager.filter(pk=pk, **{field_name: name}).update(**{field_name: None}):
+                    cleared.append(pk)
+                    logger.debug(f"Cleared missing file reference {model._meta.model_name}.{field_name} {pk}: {name}")
+
+    if cleared:
+        # The updates above skip post_save: the listings' ETags must drop the dead URLs
+        from api.dataVersion.models.CompanyDataVersion import bump_for_instances
+        bump_for_instances(model._base_manager.filter(pk__in=cleared))
+
+    return present, missing
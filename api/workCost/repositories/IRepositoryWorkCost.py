@@ -1,9 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List
 from api.workCost.models.WorkCost import WorkCost
 class IRepositoryWorkCost(ABC):
 
     @abstractmethod
     def get_workCost_by_KeyOrder(self, KeyOrder) -> List[WorkCost]:
         """Returns a list of work cost."""
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def get_totals_by_orders(self, order_keys) -> Dict:
+        """Returns the summed work cost per order key."""
+        pass
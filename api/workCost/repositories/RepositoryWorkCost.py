@@ -1,4 +1,5 @@
-from typing import List
+from typing import Dict, List
+from django.db.models import Sum
 from api.workCost.models.WorkCost import WorkCost
 from api.workCost.repositories.IRepositoryWorkCost import IRepositoryWorkCost
 class RepositoryWorkCost(IRepositoryWorkCost):
@@ -7,4 +8,14 @@ class RepositoryWorkCost(IRepositoryWorkCost):
         """Returns a list of work cost."""
         result = WorkCost.objects.filter(id_order=KeyOrder)
         print("Result get_workCost_by_KeyOrder: ", result)
-        return result
\ No newline at end of file
+        return result
+
+    def get_totals_by_orders(self, order_keys) -> Dict:
+        """Returns the summed work cost per order key in a single grouped query."""
+        rows = (
+            WorkCost.objects
+            .filter(id_order_id__in=order_keys)
+            .values('id_order_id')
+            .annotate(total=Sum('cost'))
+        )
+        return {row['id_order_id']: float(row['total'] or 0) for row in rows}
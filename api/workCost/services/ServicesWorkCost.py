@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from api.workCost.models.WorkCost import WorkCost
 from api.workCost.repositories.RepositoryWorkCost import RepositoryWorkCost
 from api.workCost.services.IServicesWorkCost import IServicesWorkCost
@@ -10,3 +10,6 @@ class ServicesWorkCost(IServicesWorkCost):
         
     def get_workCost_by_KeyOrder(self, KeyOrder) -> List[WorkCost]:
         return self.repository.get_workCost_by_KeyOrder(KeyOrder)
+
+    def get_totals_by_orders(self, order_keys) -> Dict:
+        return self.repository.get_totals_by_orders(order_keys)
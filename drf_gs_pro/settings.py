@@ -152,6 +152,77 @@ DATABASES = {
 
 AUTH_USER_MODEL = 'api.User'
 
+# Shared cache behind api.user.identity_cache, api.subscription.subscription_cache,
+# api.costFuel.efficiency_cache and api.utils.storage_index. Their invalidations
+# (signal handlers, reconcile_storage_index) must reach every web worker, so a
+# per-process LocMemCache is rejected by the api.E001 system check: Redis when
+# CACHE_REDIS_URL is set (e.g. redis://127.0.0.1:6379/1), otherwise the database
+# table created by migration 0012 (`manage.py createcachetable`).
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'api_shared_cache',
+        }
+    }
+
+# Seconds the authenticated User/Person resolved from a JWT stays cached
+AUTH_IDENTITY_CACHE_TTL = config('AUTH_IDENTITY_CACHE_TTL', default=60, cast=int)
+
+# Seconds a company's subscription state stays cached by SubscriptionMiddleware
+SUBSCRIPTION_CACHE_TTL = config('SUBSCRIPTION_CACHE_TTL', default=300, cast=int)
+
+# Background compression of uploaded images (api.imageJob). With RUN_INLINE the
+# web process compresses them in a local thread pool after the upload commits and
+# retries failed jobs after RETRY_SECONDS (doubling); otherwise run
+# `manage.py process_image_jobs --loop`. Even with RUN_INLINE, schedule
+# `manage.py process_image_jobs` periodically: it requeues the jobs left in
+# processing by a crashed or restarted worker.
+IMAGE_JOBS_RUN_INLINE = config('IMAGE_JOBS_RUN_INLINE', default=True, cast=bool)
+IMAGE_JOBS_WORKERS = config('IMAGE_JOBS_WORKERS', default=2, cast=int)
+IMAGE_JOBS_MAX_ATTEMPTS = config('IMAGE_JOBS_MAX_ATTEMPTS', default=3, cast=int)
+IMAGE_JOBS_RETRY_SECONDS = config('IMAGE_JOBS_RETRY_SECONDS', default=30, cast=int)
+
+# Seconds a fuel efficiency report (costfuels/efficiency/) stays cached; 0 disables.
+# Reports are also invalidated when the company's fuel records or order dates change.
+FUEL_EFFICIENCY_CACHE_TTL = config('FUEL_EFFICIENCY_CACHE_TTL', default=300, cast=int)
+
+# Outgoing emails are queued in api.emailOutbox and sent in the background. With
+# RUN_INLINE the web process sends them from a local thread after the request
+# commits; otherwise run `manage.py send_outbox_emails --loop`. Failed emails are
+# retried after RETRY_SECONDS (doubling up to MAX_RETRY_SECONDS) and left as dead
+# after MAX_ATTEMPTS.
+EMAIL_OUTBOX_RUN_INLINE = config('EMAIL_OUTBOX_RUN_INLINE', default=True, cast=bool)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_OUTBOX_RETRY_SECONDS = config('EMAIL_OUTBOX_RETRY_SECONDS', default=60, cast=int)
+EMAIL_OUTBOX_MAX_RETRY_SECONDS = config('EMAIL_OUTBOX_MAX_RETRY_SECONDS', default=60 * 60, cast=int)
+
+# api.utils.image_processor: images above IMAGE_MAX_PIXELS are rejected before
+# decoding; encoded results larger than IMAGE_SPOOL_MAX_MEMORY bytes spill to a temp file.
+IMAGE_MAX_PIXELS = config('IMAGE_MAX_PIXELS', default=60_000_000, cast=int)
+IMAGE_SPOOL_MAX_MEMORY = config('IMAGE_SPOOL_MAX_MEMORY', default=2 * 1024 * 1024, cast=int)
+
+# Seconds an entry of the storage existence index stays cached (api.utils.storage_index).
+# Refresh it with `manage.py reconcile_storage_index`.
+STORAGE_INDEX_TTL = config('STORAGE_INDEX_TTL', default=60 * 60 * 24, cast=int)
+
+# Direct-to-S3 uploads (api.upload): largest accepted file and lifetime in
+# seconds of the presigned POST / upload token.
+DIRECT_UPLOAD_MAX_SIZE = config('DIRECT_UPLOAD_MAX_SIZE', default=10 * 1024 * 1024, cast=int)
+DIRECT_UPLOAD_EXPIRES = config('DIRECT_UPLOAD_EXPIRES', default=600, cast=int)
+
+# Geo dataset of OrderLocationController (api.geo), loaded with `manage.py load_geo_dataset`.
+# Seconds between checks for a reloaded dataset by each process; 0 disables the refresher.
+GEO_INDEX_REFRESH_SECONDS = config('GEO_INDEX_REFRESH_SECONDS', default=0, cast=int)
+
 # Rest framework config
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
@@ -29,6 +29,7 @@ from api.customerFactory.controllers.ControllerCustomerFactory import CustomerFa
 from api.user.controllers.UserDetailUpdate import UserDetailUpdate
 from api.user.controllers.UserDetailUpdate import AdminUserDetailUpdate
 from api.order.controllers.ControllerOrderLocations import OrderLocationController
+from api.upload.controllers.ControllerUpload import ControllerUpload
 #custom errors
 from api.common import error_handlers
 from anymail.webhooks import sendinblue
@@ -75,11 +76,16 @@ urlpatterns = [
     path('orders-with-operators-and-summary/', ControllerOrder.as_view({'get': 'list_orders_with_operators_and_summary'}), name='orders-with-operators-and-summary'),
     path('summary-list/', ControllerOrder.as_view({'get': 'summary_orders_list'}), name='order-summary-list'),
     path('summary-list-financial/', ControllerOrder.as_view({'get': 'summary_orders_list_financial'}), name='order-summary-list-financial'),
+    path('orders-export/', ControllerOrder.as_view({'get': 'export_orders'}), name='orders-export'),
     path('order/list_pending/', ControllerOrder.as_view({'get': 'list_pending_orders'}), name='order-list-pending'),
     path('orders-registered-locations/', ControllerOrder.as_view({'get': 'get_registered_locations'}), name='order-registered-locations'),
+    # direct uploads to S3
+    path('uploads/presign/', ControllerUpload.as_view({'post': 'presign'}), name='upload-presign'),
+    path('uploads/finalize/', ControllerUpload.as_view({'post': 'finalize'}), name='upload-finalize'),
     ##new url to workhouse
     path('orders-payByKey_ref/', ControllerOrder.as_view({'post': 'payByKey_ref'}), name='order-pay-by-key-ref'),
     path('orders-count-orders-per-day/<int:year>/<int:month>/', ControllerOrder.as_view({'get': 'count_orders_per_day'}), name='order-count-orders-per-day'),
+    path('orders-count-orders-per-day/', ControllerOrder.as_view({'get': 'count_orders_per_day_range'}), name='order-count-orders-per-day-range'),
     path('orders-filter-by-location/', ControllerOrder.as_view({'get': 'list_by_location'}), name='orders-filter-by-location'),
     #new url to workhouse
     path('workhouse/', ControllerOrder.as_view({'post': 'create_workhouse', 'get': 'list_workhouse_orders'}), name='workhouse-create-list'),
@@ -141,6 +147,7 @@ urlpatterns = [
     path('costfuels/<int:pk>/delete/', ControllerCostFuel.as_view({'delete': 'destroy'}), name='costfuel-delete'),
     path('costfuels/by-order/<str:order_key>/', ControllerCostFuel.as_view({'get': 'by_order'}), name='costfuel-by-order'),
     path('costfuels/by-truck/<int:truck_id>/', ControllerCostFuel.as_view({'get': 'by_truck'}), name='costfuel-by-truck'),
+    path('costfuels/efficiency/', ControllerCostFuel.as_view({'get': 'efficiency'}), name='costfuel-efficiency'),
     #Son
     path('sons/', SonController.as_view({'get': 'get', 'post': 'post'}), name='son-list-create'),
     path('sons/<int:son_id>/', SonController.as_view({